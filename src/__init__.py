@@ -10,11 +10,14 @@ FLAT_FILENAME = os.path.join(SRC_DIR, 'test_config1.json')
 CONFIG_FILENAME_FOR_USE = CONFIG_FILENAME
 USER_FILE = os.path.join(SRC_DIR, "users.json")
 LOG_FILE_PATH = os.path.join(SRC_DIR, 'cpf_log_file.csv')
+BINARY_LOG_PATH = os.path.join(SRC_DIR, 'cpf_log_file.bin')  # binary log, see cpf_binlog_v1.py
 DATABASE_NAME = os.path.join(SRC_DIR, 'cpf_simulation.db')
+RESULT_CACHE = os.path.join(SRC_DIR, 'cpf_result_cache.db')  # cached simulation results, see cpf_result_cache_v1.py
 DATE_DICT = os.path.join(SRC_DIR, 'cpf_date_dict.json')  # Path to the date dictionary file
 DATE_LIST = os.path.join(SRC_DIR, 'cpf_date_list.csv')  # Path to the date list file
 # Output file paths
 CPF_REPORT = os.path.join(SRC_DIR, 'cpf_report.csv')  # Full path to the report file
+CPF_REPORT_XML = os.path.join(SRC_DIR, 'cpf_report.xml')  # XML version of the report, see cpf_xml_report_v1.py
 OUTPUT_MISMATCHES = os.path.join(SRC_DIR, 'cpf_mismatches.csv')  # Output file for mismatches
 OUTPUT_BALANCES = os.path.join(SRC_DIR, 'cpf_final_balances.csv')  # Output file for final balances
 
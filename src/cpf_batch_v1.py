@@ -0,0 +1,320 @@
+# cpf_batch_v1.py
+from __init__ import SRC_DIR, CONFIG_FILENAME, DATABASE_NAME, USER_FILE
+import argparse
+import json
+import time
+from datetime import date
+from typing import Any, Dict, List
+import numpy as np
+from cpf_config_loader_v11 import CPFConfig, compile_config, to_date, MAX_AGE, RETIREMENT_SUM_TYPES
+from cpf_date_generator_v3 import month_calendar
+from cpf_db_writer_v1 import MemberDataWriter, new_run_id
+from cpf_loan_v1 import phased_payment
+from cpf_money_v1 import MONEY_MODES, check_money, to_cents, whole_cents
+from cpf_sweep_v1 import capped_salary
+
+# Profile keys a member of users.json may set; anything not given comes from the base config
+MEMBER_FIELDS = ['member_id', 'birthdate', 'salary', 'salarycap', 'oabalance', 'sabalance', 'mabalance',
+                 'rabalance', 'excessbalance', 'loanbalance', 'loanpaymentsyear12', 'loanpaymentsyear3',
+                 'loanpaymentsyear4beyond', 'ownhdb', 'pledgeyourhdbat55', 'payouttype', 'cpfpayoutage']
+BALANCE_FIELDS = ['oa', 'sa', 'ma', 'ra', 'loan', 'excess']  # cpf_data column order
+# allocation amounts that scale with the capped salary: below 55 (oa, sa, ma) and the two
+# brackets Step 16 uses from 55 (oa, ma, ra); see allocation_bracket
+ALLOCATION_BELOW55 = ['oa', 'sa', 'ma']
+ALLOCATION_ABOVE55 = ['oa', 'ma', 'ra']
+ALLOCATION_BRACKETS = ['66to70', 'above70']
+ROW_MODES = ['month', 'year', 'final']
+
+
+def round_cents(values: np.ndarray) -> np.ndarray:
+    """
+    Integer cents of round(value, 2) for every element, as the scalar path rounds.
+    np.rint(value * 100) agrees except where value * 100 lands next to a half cent; those few
+    elements are rounded with Python's round().
+    """
+    values = np.asarray(values, dtype=np.float64)
+    scaled = values * 100
+    cents = np.rint(scaled)
+    near_half = np.abs(np.abs(scaled - np.trunc(scaled)) - 0.5) < 1e-6
+    if near_half.any():
+        cents[near_half] = [round(round(value, 2) * 100) for value in values[near_half].tolist()]
+    return cents.astype(np.int64)
+
+
+def load_members(filename: str = USER_FILE) -> List[Dict[str, Any]]:
+    """The member profiles of a users.json: a list of objects with MEMBER_FIELDS keys."""
+    with open(filename) as f:
+        members = json.load(f)
+    if isinstance(members, dict):
+        members = members.get('members', [])
+    return members
+
+
+def synthetic_members(count: int, seed: int = 0, start: str = "2025-05-01") -> List[Dict[str, Any]]:
+    """`count` random profiles aged 25 to 54 at `start`, with salaries, balances and loans that vary."""
+    rng = np.random.default_rng(seed)
+    start_ordinal = to_date('startdate', start).toordinal()
+    ages = rng.integers(25, 55, count)
+    # born 25 to 54 years and up to a year before the start date
+    birth_ordinals = start_ordinal - np.rint(ages * 365.25).astype(np.int64) - rng.integers(0, 365, count)
+    scale = (ages - 20) / 30
+    columns = {
+        'salary': rng.uniform(2_000, 12_000, count).round(2),
+        'oabalance': (rng.uniform(0, 150_000, count) * scale).round(2),
+        'sabalance': (rng.uniform(0, 200_000, count) * scale).round(2),
+        'mabalance': (rng.uniform(0, 70_000, count) * scale).round(2),
+        'loanbalance': np.where(rng.random(count) < 0.5, 0.0, rng.uniform(50_000, 400_000, count)).round(2),
+    }
+    pledge = np.where(rng.random(count) < 0.5, 'yes', 'no').tolist()
+    columns = {key: values.tolist() for key, values in columns.items()}
+    members = [{'member_id': f"M{i:07d}", 'birthdate': date.fromordinal(ordinal).isoformat(),
+                **{key: values[i] for key, values in columns.items()}, 'pledgeyourhdbat55': pledge[i]}
+               for i, ordinal in enumerate(birth_ordinals.tolist())]
+    return members
+
+
+class BatchSimulation:
+    """
+    The monthly loop of cpf_run_simulation_v9 for many members at once.
+    Every member is a column of struct-of-arrays state: integer-cent balances, birth year and
+    month, and the salary-scaled allocation, loan, payout and transfer amounts. Each calendar month
+    is applied to all members with whole-array operations. The loan schedule, age brackets,
+    the birthday month at 55 (RA transfer), the payout age and the month the RA runs out are all
+    masks. Members share the base config's dates and rates; per member only MEMBER_FIELDS differ.
+    A member simulated alone produces the cpf_data balances of main() for the same config and
+    money mode (round_cents emulates the 'float' rounding, to_cents and whole_cents are the
+    'cents' mode's); no transaction log is written.
+    """
+    def __init__(self, config: CPFConfig, members: List[Dict[str, Any]], money: str = 'float'):
+        self.money = check_money(money)
+        cents = round_cents if money == 'float' else to_cents
+        if not members:
+            raise ValueError("No members to simulate.")
+        unknown = sorted({key for member in members for key in member} - set(MEMBER_FIELDS))
+        if unknown:
+            raise KeyError(f"Unknown member fields: {unknown}. Use any of {MEMBER_FIELDS}")
+        self.config = config
+        self.rates = rates = compile_config(config)
+        self.n = n = len(members)
+        values = rates._values
+        column = lambda key: [member.get(key, values.get(key)) for member in members]
+
+        self.member_ids = [str(member.get('member_id', i)) for i, member in enumerate(members)]
+        if len(set(self.member_ids)) != n:
+            raise ValueError("member_id values must be unique.")
+        self.birthdates = [to_date('birthdate', value) for value in column('birthdate')]
+        start, end = to_date('startdate', rates.startdate), to_date('enddate', rates.enddate)
+        too_old = [mid for mid, birth in zip(self.member_ids, self.birthdates) if birth > start or end.year - birth.year > MAX_AGE]
+        if too_old:
+            raise ValueError(f"Members born after {start} or older than {MAX_AGE} at {end}: {too_old[:10]}")
+        self.birth_year = np.array([birth.year for birth in self.birthdates], dtype=np.int64)
+        self.birth_month = np.array([birth.month for birth in self.birthdates], dtype=np.int64)
+
+        # Steps 5-10: initial balances, recorded as round(amount, 2)
+        self.initial = {account: cents(np.array(column(f'{account}balance'), dtype=np.float64))
+                        for account in BALANCE_FIELDS}
+        # Step 13: year 1-2, year 3 and year 4+ loan payments
+        self.loan_payments = [cents(np.array(column(key), dtype=np.float64))
+                              for key in ['loanpaymentsyear12', 'loanpaymentsyear3', 'loanpaymentsyear4beyond']]
+
+        # Steps 14-16: allocation amounts rescaled to each member's capped salary as apply_overrides does
+        base_salary = capped_salary(config)
+        salary = np.minimum(np.array(column('salary'), dtype=np.float64), np.array(column('salarycap'), dtype=np.float64))
+        if base_salary <= 0 and np.any(salary != base_salary):
+            raise ValueError("Cannot rescale allocation amounts: the base config has no salary.")
+        rescale = lambda amount: cents(amount * salary / base_salary) if base_salary > 0 else cents(np.full(n, amount))
+        self.allocation_below55 = {account: rescale(values.get(f'allocationbelow55{account}amount', 0.0))
+                                   for account in ALLOCATION_BELOW55}
+        self.allocation_above55 = {
+            (account, bracket): rescale(values.get(f'allocationabove55{account}{bracket}amount',
+                                                   values.get(f'allocationabove55{account}amount', 0.0)))
+            for account in ALLOCATION_ABOVE55 for bracket in ALLOCATION_BRACKETS}
+
+        # Steps 19 and 22: payout by payout type and age, the RA transfer amount by pledge choice
+        payouttype = [str(value).lower() for value in column('payouttype')]
+        unknown_types = sorted(set(payouttype) - set(RETIREMENT_SUM_TYPES))
+        if unknown_types:
+            raise ValueError(f"Unsupported payouttype: {unknown_types}. Use one of {RETIREMENT_SUM_TYPES}")
+        self.payout_age = np.array(column('cpfpayoutage'), dtype=np.int64)
+        self.payout_cents = cents(np.array([float(rates.retirement_payouts[t]) for t in payouttype]))
+        pledged = [str(own).lower() == 'yes' and str(pledge).lower() == 'yes'
+                   for own, pledge in zip(column('ownhdb'), column('pledgeyourhdbat55'))]
+        half_frs = (rates.retirement_sums['frs'] / 2).__round__(2)
+        self.transfer_amount = np.array([half_frs if p else float(rates.retirement_sums[t]).__round__(2)
+                                         for p, t in zip(pledged, payouttype)])
+
+        self.calendar = month_calendar(start, end, self.birthdates[0])
+        # age-indexed rates of the base config
+        self.interest_rate = {account: np.array(rates.interest_rate[account]) for account in ['oa', 'sa', 'ma', 'ra']}
+        self.extra_first = np.array(rates.extra_interest_first)
+        self.extra_next = np.array(rates.extra_interest_next)
+
+        self.months = np.zeros(n, dtype=np.int64)
+        self.stop_age = np.full(n, -1, dtype=np.int64)
+        self.final = np.zeros((len(BALANCE_FIELDS), n), dtype=np.int64)
+        self.total_payout = np.zeros(n, dtype=np.int64)
+
+    def _interest(self, age, oa, sa, ma, ra):
+        """
+        Steps 17-18: December interest and extra interest in cents, from the balances before either;
+        worked out on dollars in the 'float' money mode and on cents in the 'cents' mode.
+        """
+        if self.money == 'cents':
+            scale, rounded = 100, whole_cents
+            balances = {'oa': oa, 'sa': sa, 'ma': ma, 'ra': ra}
+        else:
+            scale, rounded = 1, round_cents
+            balances = {'oa': oa / 100, 'sa': sa / 100, 'ma': ma / 100, 'ra': ra / 100}
+        interest = {account: np.where(balance > 0, rounded(self.interest_rate[account][age] * balance), 0)
+                    for account, balance in balances.items()}
+        oa_f, sa_f, ma_f, ra_f = balances.values()
+        first = self.extra_first[age]
+        below = age < 55
+        # combined_balance_for_extra_interest and extra_interest_on_cpf for both age groups
+        oa_c = np.minimum(oa_f, 20_000 * scale)
+        sa_c = np.minimum(sa_f, 40_000 * scale)
+        ma_below = np.where(oa_c + sa_c == 60_000 * scale, 0.0, np.minimum(ma_f, 40_000 * scale))
+        ma_above = np.minimum(ma_f, 30_000 * scale - oa_c)
+        ra_above = np.where(oa_c + ma_above == 30_000 * scale, 0.0, np.minimum(ra_f, 30_000 * scale))
+        total = oa_c + 0.0 + ma_above + ra_above
+        first_30k = np.minimum(total, 30_000 * scale)
+        next_30k = np.minimum(total - first_30k, 30_000 * scale)
+        ra_extra = np.where(first_30k == 30_000 * scale, 30_000 * scale * first,
+                            np.where(next_30k == 30_000 * scale, 30_000 * scale * self.extra_next[age], 0.0))
+        extra = {
+            'oa': np.zeros(len(age), dtype=np.int64),
+            'sa': np.where(below, rounded(oa_c * first + sa_c * first), 0),
+            'ma': np.where(below, rounded(ma_below * first), 0),
+            'ra': np.where(below, 0, rounded(ra_extra)),
+        }
+        return {account: interest[account] + extra[account] for account in balances}
+
+    def run(self, writer: MemberDataWriter = None, rows: str = 'month') -> "BatchSimulation":
+        """
+        Simulate every member over the calendar. With a writer, the balances of the active
+        members go to cpf_member_data every month (rows='month'), every December ('year') or
+        not at all ('final'), and one cpf_members summary row per member is written at the end.
+        """
+        if rows not in ROW_MODES:
+            raise ValueError(f"Unsupported rows mode: {rows}. Use one of {ROW_MODES}")
+        n = self.n
+        oa, sa, ma, ra, loan, excess = (self.initial[account].copy() for account in BALANCE_FIELDS)
+        active = np.ones(n, dtype=bool)
+        y12, y3, y4 = self.loan_payments
+        below55, above55 = self.allocation_below55, self.allocation_above55
+        member_ids = np.array(self.member_ids, dtype=object)
+        cal = self.calendar
+        for i, (year, month, date_key) in enumerate(zip(cal["year"].tolist(), cal["month"].tolist(), cal["date_key"].tolist())):
+            age = year - self.birth_year - (month < self.birth_month)
+            # Step 13: the loan counter is the month of the run, the same for every member
+            pay = np.where(active, phased_payment(i, loan, y12, y3, y4), 0)
+            oa -= pay
+            loan -= pay
+
+            # Steps 14-16: below 55 and in the birthday month at 55 the below-55 split, then by bracket
+            transfer = active & (age == 55) & (month == self.birth_month)
+            below = (age < 55) | transfer
+            above = active & ~below
+            below &= active
+            bracket = (age >= 65) & (age < 70)
+            for account, balance in (('oa', oa), ('ma', ma), ('ra', ra)):
+                balance += np.where(above, np.where(bracket, above55[account, '66to70'], above55[account, 'above70']), 0)
+            for account, balance in (('oa', oa), ('sa', sa), ('ma', ma)):
+                balance += np.where(below, below55[account], 0)
+
+            if month == 12:
+                credits = self._interest(np.clip(age, 0, MAX_AGE), oa, sa, ma, ra)
+                for account, balance in zip(['oa', 'sa', 'ma', 'ra'], (oa, sa, ma, ra)):
+                    balance += np.where(active, credits[account], 0)
+
+            # Step 19: the payout, capped by the RA, from the payout age; members whose RA is empty stop
+            due = np.where(age >= self.payout_age, self.payout_cents, 0)
+            payout = np.where(active & (ra > 0), np.maximum(np.minimum(due, ra), 0), 0)
+            ra -= payout
+            excess += payout
+            stopped = active & (ra == 0) & (age > 55)
+            self.stop_age[stopped] = age[stopped]
+            active &= ~stopped
+
+            # Step 20/24: the month's row, with the balances before the age-55 transfer
+            self.months += active
+            self.total_payout += np.where(active, payout, 0)
+            balances = (oa, sa, ma, ra, loan, excess)
+            for row, balance in enumerate(balances):
+                np.copyto(self.final[row], balance, where=active)
+            if writer is not None and (rows == 'month' or (rows == 'year' and month == 12)):
+                index = np.flatnonzero(active)
+                writer.add_month(date_key, member_ids[index].tolist(), age[index].tolist(),
+                                 [(balance[index] / 100).tolist() for balance in balances],
+                                 (payout[index] / 100).tolist())
+
+            # Steps 21-23: SA and OA go to the RA, the loan is settled, the rest goes to excess
+            transfer &= active
+            if transfer.any():
+                index = np.flatnonzero(transfer)
+                if self.money == 'cents':
+                    transfer_cents = to_cents(self.transfer_amount[index])
+                    excess[index] += oa[index] + sa[index] - loan[index] - transfer_cents
+                    ra[index] += transfer_cents
+                else:
+                    oa_f, sa_f, loan_f, excess_f = oa[index] / 100, sa[index] / 100, loan[index] / 100, excess[index] / 100
+                    moved = oa_f + sa_f - loan_f - self.transfer_amount[index]
+                    excess[index] = np.where(np.abs(moved) < 1e-9, excess[index], round_cents(excess_f + moved))
+                    ra[index] += round_cents(self.transfer_amount[index])
+                oa[index] = 0
+                sa[index] = 0
+                loan[index] = np.where(loan[index] > 0, 0, loan[index])
+            if not active.any():
+                break
+
+        if writer is not None:
+            writer.add_members(self.summary())
+        return self
+
+    def summary(self) -> List[tuple]:
+        """One (member_id, birthdate, months, ra_exhausted_age, final balances..., total_payout) per member."""
+        final = (self.final / 100).T.tolist()
+        stop_age = [None if age < 0 else age for age in self.stop_age.tolist()]
+        return [(member_id, birth.isoformat(), months, stopped, *balances, payout)
+                for member_id, birth, months, stopped, balances, payout in zip(
+                    self.member_ids, self.birthdates, self.months.tolist(), stop_age, final,
+                    (self.total_payout / 100).tolist())]
+
+
+def run_batch(config: CPFConfig = None, members: List[Dict[str, Any]] = None, database: str = DATABASE_NAME,
+              run_id: str = None, rows: str = 'month', money: str = 'float') -> BatchSimulation:
+    """Simulate `members` (default: users.json) against `config` into cpf_member_data / cpf_members under run_id."""
+    if config is None:
+        config = CPFConfig(CONFIG_FILENAME)
+    if members is None:
+        members = load_members()
+    simulation = BatchSimulation(config, members, money=money)
+    with MemberDataWriter(database, run_id=run_id) as writer:
+        simulation.run(writer, rows=rows)
+    simulation.run_id = writer.run_id
+    return simulation
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate many members at once into cpf_member_data.")
+    parser.add_argument('--config', default=CONFIG_FILENAME, help="base configuration file (dates and rates)")
+    parser.add_argument('--users', default=USER_FILE, help="JSON list of member profiles")
+    parser.add_argument('--synthetic', type=int, default=None, metavar='N', help="simulate N random members instead")
+    parser.add_argument('--rows', choices=ROW_MODES, default='month',
+                        help="cpf_member_data rows: every month, every December or none (summary only)")
+    parser.add_argument('--database', default=DATABASE_NAME, help="simulation database")
+    parser.add_argument('--run-id', default=None, help="run_id of the rows (default: a timestamp)")
+    parser.add_argument('--money', choices=MONEY_MODES, default='float', help="money mode (see cpf_money_v1)")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    config = CPFConfig(args.config)
+    members = synthetic_members(args.synthetic, start=str(compile_config(config).startdate)) if args.synthetic else load_members(args.users)
+    start = time.perf_counter()
+    simulation = run_batch(config, members, args.database, args.run_id or new_run_id(), rows=args.rows, money=args.money)
+    elapsed = time.perf_counter() - start
+    exhausted = int((simulation.stop_age >= 0).sum())
+    print(f"run {simulation.run_id}: {simulation.n:,} members, {int(simulation.months.sum()):,} member-months "
+          f"in {elapsed:.1f} s; RA exhausted for {exhausted:,}")
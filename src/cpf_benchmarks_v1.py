@@ -0,0 +1,318 @@
+# cpf_benchmarks_v1.py
+from __init__ import SRC_DIR, CONFIG_FILENAME
+import argparse
+import contextlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+import numpy as np
+import pandas as pd
+from cpf_config_loader_v11 import CPFConfig, is_duplicate_blob
+from cpf_date_generator_v3 import DateGenerator
+from cpf_data_saver_v3 import DataSaver
+from cpf_build_reports_v1 import CPFLogEntry, synthetic_log
+from cpf_run_simulation_v9 import ENGINE_VERSION, main
+from cpf_renderer_v1 import make_renderer
+
+BENCHMARK_RESULTS = os.path.join(SRC_DIR, 'cpf_benchmark_results.json')  # default output of the CLI
+DEFAULT_THRESHOLD = 0.25  # a benchmark is flagged when its median is more than 25% above the baseline
+DEFAULT_REPEAT = 5
+REPORT_ROWS = 100_000     # rows of the synthetic log given to build_report
+
+# name -> (setup, repeat); setup(workdir) prepares the inputs and returns the callable that is timed
+BENCHMARKS: Dict[str, Any] = {}
+
+
+def register(name: str, repeat: int = DEFAULT_REPEAT):
+    def decorator(setup: Callable[[str], Callable[[], Any]]):
+        BENCHMARKS[name] = (setup, repeat)
+        return setup
+    return decorator
+
+
+def synthetic_config(years: int = 55, age_at_start: int = 50, start: str = "2025-05-01", salary: float = 7400.0,
+                     balance_scale: float = 1.0, **overrides) -> Dict[str, Any]:
+    """
+    A flat config like cpf_config.json (without its 'data' copies) for a member aged
+    `age_at_start` on `start`, simulated for `years` years, with the salary, the allocation
+    amounts and the starting balances scaled from the shipped config.
+    """
+    with open(CONFIG_FILENAME) as f:
+        base = json.load(f)
+    values = {key: value for key, value in base.items() if not is_duplicate_blob(base, key, value)}
+    start_date = datetime.strptime(start, "%Y-%m-%d").date()
+    birth = start_date.replace(year=start_date.year - age_at_start, day=min(start_date.day, 28))
+    end = start_date.replace(year=start_date.year + years, day=1)
+    salarycap = overrides.get('salarycap', values['salarycap'])
+    salary_scale = min(salary, salarycap) / min(values['salary'], values['salarycap'])
+    values.update(startdate=start_date.isoformat(), birthdate=birth.isoformat(), enddate=end.isoformat(), salary=salary)
+    for key, value in values.items():
+        if key.startswith('allocation') and key.endswith('amount'):
+            values[key] = value * salary_scale
+        elif key in ('oabalance', 'sabalance', 'mabalance', 'loanbalance'):
+            values[key] = value * balance_scale
+    values.update(overrides)
+    return values
+
+
+def write_config(values: Dict[str, Any], filename: str) -> CPFConfig:
+    """Write a synthetic_config() and load it back as a CPFConfig."""
+    with open(filename, "w") as f:
+        json.dump(values, f, indent=4)
+    return CPFConfig(filename)
+
+
+def date_rows(years: int) -> List[Dict[str, Any]]:
+    """cpf_date_list.csv rows over `years` years, the payload of the DataSaver benchmarks."""
+    generator = DateGenerator(start_date="1990-01-01", end_date=f"{1990 + years}-01-01", birth_date="1970-01-01")
+    return [{'date_key': key, 'period_start': str(value['period_start']), 'period_end': str(value['period_end']),
+             'age': value['age']} for key, value in generator.generate_date_dict().items()]
+
+
+@register("config_load", repeat=20)
+def bench_config_load(workdir):
+    return lambda: CPFConfig(CONFIG_FILENAME)
+
+
+@register("config_compile", repeat=20)
+def bench_config_compile(workdir):
+    config = CPFConfig(CONFIG_FILENAME)
+    return lambda: config.compile()
+
+
+@register("date_dict_10y", repeat=20)
+def bench_date_dict_short(workdir):
+    generator = DateGenerator(start_date="2025-05-01", end_date="2035-04-30", birth_date="1974-07-06")
+    return generator.generate_date_dict
+
+
+@register("date_dict_135y", repeat=10)
+def bench_date_dict_long(workdir):
+    generator = DateGenerator(start_date="1990-01-01", end_date="2124-12-31", birth_date="1989-06-15")
+    return generator.generate_date_dict
+
+
+def _main_benchmark(workdir: str, name: str, log_format: str, sqlite: bool, renderer: str = 'table', **config):
+    cpf_config = write_config(synthetic_config(**config), os.path.join(workdir, f"{name}.json"))
+    runs = iter(range(1_000_000))
+
+    def run():
+        i = next(runs)
+        database = os.path.join(workdir, f"{name}_{i}.db") if sqlite else ":memory:"
+        main(cpf_config, database=database, log_file=os.path.join(workdir, f"{name}.csv"), log_format=log_format,
+             checkpoint_at=[], date_list=os.path.join(workdir, "cpf_date_list.csv"), renderer=make_renderer(renderer))
+    return run
+
+
+@register("main_log_sqlite")
+def bench_main(workdir):
+    return _main_benchmark(workdir, "main_log_sqlite", "csv", True)
+
+
+@register("main_log_only")
+def bench_main_log_only(workdir):
+    return _main_benchmark(workdir, "main_log_only", "csv", False)
+
+
+@register("main_sqlite_only")
+def bench_main_sqlite_only(workdir):
+    return _main_benchmark(workdir, "main_sqlite_only", "none", True)
+
+
+@register("main_no_outputs")
+def bench_main_no_outputs(workdir):
+    return _main_benchmark(workdir, "main_no_outputs", "none", False)
+
+
+@register("main_headless")
+def bench_main_headless(workdir):
+    # no log, no database and the silent renderer: the simulation loop alone
+    return _main_benchmark(workdir, "main_headless", "none", False, renderer='none')
+
+
+@register("main_log_sqlite_age25", repeat=3)
+def bench_main_long(workdir):
+    # a member starting at 25 with a richer salary: about 95 years until the RA runs out
+    return _main_benchmark(workdir, "main_log_sqlite_age25", "csv", True, years=95, age_at_start=25,
+                           salary=12000.0, salarycap=12000.0)
+
+
+def _vector_benchmark(workdir: str, name: str, jump_ahead: bool):
+    from cpf_vector_engine_v1 import VectorizedSimulation
+    from cpf_sweep_v1 import summarize
+    cpf_config = write_config(synthetic_config(), os.path.join(workdir, f"{name}.json"))
+    return lambda: summarize(VectorizedSimulation(cpf_config, jump_ahead=jump_ahead).run())
+
+
+@register("vector_milestones")
+def bench_vector_milestones(workdir):
+    # sweep workload: every month expanded, then only the milestones read
+    return _vector_benchmark(workdir, "vector_milestones", False)
+
+
+@register("vector_jump_ahead")
+def bench_vector_jump_ahead(workdir):
+    return _vector_benchmark(workdir, "vector_jump_ahead", True)
+
+
+@register("build_report", repeat=3)
+def bench_build_report(workdir):
+    log_file = os.path.join(workdir, "report_log.csv")
+    synthetic_log(REPORT_ROWS).to_csv(log_file, index=False)
+    output_file = os.path.join(workdir, "cpf_report.csv")
+    return lambda: CPFLogEntry(log_file).build_report(output_file=output_file)
+
+
+def _saver_benchmark(workdir: str, data_format: str, stream: bool):
+    rows = date_rows(135)
+    extension = {'pickle': 'pkl', 'shelve': 'shelf'}.get(data_format, data_format)
+    filename = os.path.join(workdir, f"date_list.{extension}")
+    if stream:
+        def run():
+            saver = DataSaver(data_format, filename)
+            for row in rows:
+                saver.append(row)
+            saver.close()
+    else:
+        saver = DataSaver('pickle', os.path.join(workdir, "unused.pkl"))  # save_results does not use the stream
+        def run():
+            saver.save_results(rows, filename, data_format)
+    return run
+
+
+for _format in ['pickle', 'csv', 'xml']:
+    register(f"datasaver_append_{_format}")(lambda workdir, f=_format: _saver_benchmark(workdir, f, True))
+for _format in ['pickle', 'json', 'shelve', 'csv', 'xml']:
+    register(f"datasaver_save_{_format}")(lambda workdir, f=_format: _saver_benchmark(workdir, f, False))
+
+
+def machine_metadata() -> Dict[str, Any]:
+    """Where and on what the benchmarks ran."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=SRC_DIR, capture_output=True, text=True,
+                                timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'timestamp': datetime.now().isoformat(timespec="seconds"),
+        'engine_version': ENGINE_VERSION,
+        'git_commit': commit,
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+    }
+
+
+def run_benchmarks(names: List[str] = None, repeat: int = None, progress: bool = True) -> Dict[str, Any]:
+    """
+    Time the registered benchmarks (all, or `names`) in a temporary directory: one untimed
+    warm-up call, then `repeat` timed calls (the benchmark's own count by default).
+    Output of the code under test is discarded.
+    """
+    names = names or list(BENCHMARKS)
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for name in names:
+            setup, default_repeat = BENCHMARKS[name]
+            runs = repeat or default_repeat
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
+                func = setup(workdir)
+                func()
+                times = []
+                for _ in range(runs):
+                    start = time.perf_counter()
+                    func()
+                    times.append(time.perf_counter() - start)
+            results[name] = {
+                'runs': runs,
+                'min': min(times),
+                'median': statistics.median(times),
+                'mean': statistics.fmean(times),
+                'stdev': statistics.stdev(times) if runs > 1 else 0.0,
+            }
+            if progress:
+                print(f"{name:<28}{results[name]['median'] * 1000:>12.2f} ms  (min {results[name]['min'] * 1000:.2f} ms, {runs} runs)")
+    return {'metadata': machine_metadata(), 'results': results}
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float = DEFAULT_THRESHOLD) -> List[Dict[str, Any]]:
+    """
+    Median of every benchmark against the baseline. status is 'slower' when the ratio exceeds
+    1 + threshold, 'faster' below 1 / (1 + threshold), 'ok' in between, or 'new' / 'missing'.
+    """
+    rows = []
+    cur, base = current['results'], baseline['results']
+    for name in list(base) + [n for n in cur if n not in base]:
+        if name not in cur or name not in base:
+            rows.append({'name': name, 'baseline': base.get(name, {}).get('median'), 'current': cur.get(name, {}).get('median'),
+                         'ratio': None, 'status': 'missing' if name not in cur else 'new'})
+            continue
+        ratio = cur[name]['median'] / base[name]['median'] if base[name]['median'] else float('inf')
+        status = 'slower' if ratio > 1 + threshold else ('faster' if ratio < 1 / (1 + threshold) else 'ok')
+        rows.append({'name': name, 'baseline': base[name]['median'], 'current': cur[name]['median'], 'ratio': ratio, 'status': status})
+    return rows
+
+
+def print_comparison(rows: List[Dict[str, Any]]) -> None:
+    print(f"{'benchmark':<28}{'baseline ms':>14}{'current ms':>14}{'ratio':>9}  status")
+    for row in rows:
+        base = f"{row['baseline'] * 1000:.2f}" if row['baseline'] is not None else "-"
+        cur = f"{row['current'] * 1000:.2f}" if row['current'] is not None else "-"
+        ratio = f"{row['ratio']:.2f}" if row['ratio'] is not None else "-"
+        print(f"{row['name']:<28}{base:>14}{cur:>14}{ratio:>9}  {row['status']}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Time the CPF simulation, calendar, config, report and DataSaver paths.")
+    parser.add_argument('--filter', action='append', default=[], metavar='TEXT',
+                        help="only run benchmarks whose name contains TEXT (repeatable)")
+    parser.add_argument('--repeat', type=int, default=None, help="timed runs per benchmark (default: per benchmark)")
+    parser.add_argument('--output', default=BENCHMARK_RESULTS, help="JSON file for the results")
+    parser.add_argument('--compare', metavar='BASELINE', help="JSON results of an earlier run to compare with")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="relative slowdown of the median that counts as a regression")
+    parser.add_argument('--list', action='store_true', help="list the benchmarks and exit")
+    return parser.parse_args(argv)
+
+
+def cli(argv=None) -> int:
+    """Run the suite; the exit status is 1 when --compare finds a regression."""
+    args = parse_args(argv)
+    if args.list:
+        print("\n".join(BENCHMARKS))
+        return 0
+    names = [name for name in BENCHMARKS if not args.filter or any(text in name for text in args.filter)]
+    if not names:
+        raise SystemExit(f"No benchmark matches {args.filter}")
+    results = run_benchmarks(names, args.repeat)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results saved to {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if args.filter:  # benchmarks left out by --filter are not missing
+            baseline['results'] = {name: value for name, value in baseline['results'].items() if name in names}
+        rows = compare(results, baseline, args.threshold)
+        print_comparison(rows)
+        slower = [row['name'] for row in rows if row['status'] == 'slower']
+        if slower:
+            print(f"{len(slower)} benchmark(s) slower than the baseline by more than {args.threshold:.0%}: {', '.join(slower)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(cli())
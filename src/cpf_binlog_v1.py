@@ -0,0 +1,273 @@
+# cpf_binlog_v1.py
+from __init__ import SRC_DIR, LOG_FILE_PATH, BINARY_LOG_PATH
+import json
+import os
+import struct
+from typing import TYPE_CHECKING, Iterator, List
+import numpy as np
+if TYPE_CHECKING:  # pandas is imported where a DataFrame is built, off the simulation's startup path
+    import pandas as pd
+from cpf_ledger_v1 import (LOG_FIELDNAMES, LEDGER_COLUMNS, ACCOUNTS, TRANSACTION_TYPES, DEFAULT_BLOCK_SIZE,
+                           LedgerBlock, CSVLogSink)
+
+# File layout:
+#   MAGIC | header length (u4) | JSON header, padded to 8 bytes | fixed-width records ...
+#   | JSON table {"messages", "old_balances"} | trailer: table offset, record count, table length,
+#   first reference, MAGIC
+MAGIC = b"CPFLOG1\0"
+LOG_VERSION = 2  # version 1 records also stored reference and old_balance; its table is the message list
+HEADER_LENGTH = struct.Struct("<I")
+TRAILER = struct.Struct("<QQQq8s")
+TRAILER_V1 = struct.Struct("<QQQ8s")
+LOG_FORMATS = ["csv", "binary", "none"]
+
+# Ledger columns the records leave out: the references count up from the first one, and the old
+# balance is round(new_balance - amount, 2) because both are rounded to cents; the rare old balance
+# that is not (such as -0.0) is kept in the table as [record index, old balance]
+DERIVED_COLUMNS = ["reference", "old_balance"]
+
+# One packed little-endian record per transaction: 28 bytes, against 44 for every ledger column
+# and about 95 for a CSV row, most of which is the message text the records only refer to
+LOG_DTYPE = np.dtype([(name, np.dtype(code).newbyteorder("<")) for name, code in LEDGER_COLUMNS
+                      if name not in DERIVED_COLUMNS])
+
+
+def old_balances(new_balance: np.ndarray, amount: np.ndarray) -> np.ndarray:
+    """The old balances of records, as the ledger logged them."""
+    return np.round(new_balance - amount, 2)
+
+
+def is_binary_log(filename: str) -> bool:
+    """True when the file starts with the binary log magic."""
+    try:
+        with open(filename, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def binary_log_name(log_file: str) -> str:
+    """The binary log next to a CSV log: cpf_log_file.csv -> cpf_log_file.bin."""
+    root, ext = os.path.splitext(log_file)
+    return root + ".bin" if ext.lower() == ".csv" else log_file
+
+
+def log_sink(log_file: str = LOG_FILE_PATH, log_format: str = "csv"):
+    """
+    Ledger sink for a log format: CSVLogSink, BinaryLogSink (written as <name>.bin), or None for
+    "none", where the ledger only counts the transactions.
+    """
+    if log_format == "none":
+        return None
+    if log_format == "csv":
+        return CSVLogSink(log_file)
+    if log_format == "binary":
+        return BinaryLogSink(binary_log_name(log_file))
+    raise ValueError(f"Unsupported log format: {log_format}. Use one of {LOG_FORMATS}")
+
+
+class BinaryLogSink:
+    """
+    Writes ledger blocks as fixed-width LOG_DTYPE records.
+    Message texts are stored once in a table at the end of the file, the records only carry
+    their ids, so the file is a fraction of the CSV size and can be memory-mapped by BinaryLog.
+    The transactions must have consecutive references, as the ledger numbers them; a block with a
+    gap raises ValueError.
+    Like CSVLogSink, the file is opened lazily.
+    """
+    def __init__(self, filename: str = BINARY_LOG_PATH):
+        self.filename = filename
+        self.messages: List[str] = []
+        self.count = 0
+        self.first_reference = 0
+        self.old_balances: List[List[float]] = []  # [index, old balance] where old_balances() differs
+        self._file = None
+
+    def open(self):
+        if self._file is None:
+            self._file = open(self.filename, "wb")
+            header = json.dumps({
+                "version": LOG_VERSION,
+                "fields": [[name, LOG_DTYPE[name].str] for name in LOG_DTYPE.names],
+                "accounts": ACCOUNTS,
+                "types": TRANSACTION_TYPES,
+            }).encode("utf-8")
+            header += b" " * (-(len(MAGIC) + HEADER_LENGTH.size + len(header)) % 8)
+            self._file.write(MAGIC + HEADER_LENGTH.pack(len(header)) + header)
+
+    def write_block(self, block: LedgerBlock):
+        self.open()
+        columns = {name: np.frombuffer(block.columns[name], dtype=code, count=block.size) for name, code in LEDGER_COLUMNS}
+        if block.size:
+            if not self.count:
+                self.first_reference = int(columns["reference"][0])
+            expected = np.arange(self.first_reference + self.count, self.first_reference + self.count + block.size)
+            if not np.array_equal(columns["reference"], expected):
+                raise ValueError(f"{self.filename}: the binary log needs consecutive transaction references")
+            # compared bit for bit, so a -0.0 that would read back as 0.0 is kept too
+            derived = old_balances(columns["new_balance"], columns["amount"])
+            for index in np.flatnonzero(derived.view(np.int64) != columns["old_balance"].view(np.int64)).tolist():
+                self.old_balances.append([self.count + index, float(columns["old_balance"][index])])
+        self.messages.extend(block.new_messages)
+        records = np.empty(block.size, dtype=LOG_DTYPE)
+        for name in LOG_DTYPE.names:
+            records[name] = columns[name]
+        self._file.write(records.tobytes())
+        self.count += block.size
+
+    def close(self):
+        if self._file is None:
+            return
+        table = json.dumps({"messages": self.messages, "old_balances": self.old_balances}).encode("utf-8")
+        offset = self._file.tell()
+        self._file.write(table)
+        self._file.write(TRAILER.pack(offset, self.count, len(table), self.first_reference, MAGIC))
+        self._file.close()
+        self._file = None
+
+
+class BinaryLog:
+    """
+    Memory-mapped reader of a BinaryLogSink file.
+    log["amount"], log["account"], ... are zero-copy views on the mapped records, log["reference"]
+    and log["old_balance"] are computed (see DERIVED_COLUMNS); `accounts`, `types` and `messages`
+    decode the integer codes. Version 1 files, which store every column, are read as well.
+    """
+    def __init__(self, filename: str = BINARY_LOG_PATH):
+        self.filename = filename
+        with open(filename, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"Not a binary CPF log: {filename}")
+            (header_length,) = HEADER_LENGTH.unpack(f.read(HEADER_LENGTH.size))
+            header = json.loads(f.read(header_length))
+            self.data_offset = len(MAGIC) + HEADER_LENGTH.size + header_length
+            trailer = TRAILER_V1 if header["version"] == 1 else TRAILER
+            f.seek(0, os.SEEK_END)
+            if f.tell() < self.data_offset + trailer.size:
+                raise ValueError(f"Binary CPF log is incomplete (not closed?): {filename}")
+            f.seek(-trailer.size, os.SEEK_END)
+            table_offset, count, table_length, *first_reference, magic = trailer.unpack(f.read(trailer.size))
+            if magic != MAGIC:
+                raise ValueError(f"Binary CPF log is incomplete (not closed?): {filename}")
+            f.seek(table_offset)
+            table = json.loads(f.read(table_length))
+        if isinstance(table, list):
+            table = {"messages": table, "old_balances": []}
+        self.messages: List[str] = table["messages"]
+        fixed = np.array(table["old_balances"], dtype=np.float64).reshape(-1, 2)
+        self._fixed_index, self._fixed_balance = fixed[:, 0].astype(np.int64), fixed[:, 1]
+        self.dtype = np.dtype([(name, code) for name, code in header["fields"]])
+        self.accounts: List[str] = header["accounts"]
+        self.types: List[str] = header["types"]
+        self.count = count
+        self.first_reference = first_reference[0] if first_reference else None
+        if count:
+            self.records = np.memmap(filename, dtype=self.dtype, mode="r", offset=self.data_offset, shape=(count,))
+        else:
+            self.records = np.empty(0, dtype=self.dtype)
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.column(name)
+
+    def column(self, name: str, start: int = 0, stop: int = None) -> np.ndarray:
+        """Ledger column `name` of records [start, stop)."""
+        records = self.records[start:stop]
+        if name in records.dtype.names:
+            return records[name]
+        if name == "reference":
+            start = range(self.count)[start:stop].start
+            return np.arange(self.first_reference + start, self.first_reference + start + len(records), dtype=np.int64)
+        if name == "old_balance":
+            balances = old_balances(records["new_balance"], records["amount"])
+            start = range(self.count)[start:stop].start
+            first, last = np.searchsorted(self._fixed_index, [start, start + len(records)])
+            balances[self._fixed_index[first:last] - start] = self._fixed_balance[first:last]
+            return balances
+        raise KeyError(name)
+
+    def frame(self, start: int = 0, stop: int = None) -> 'pd.DataFrame':
+        """Records [start, stop) decoded to the columns and text of cpf_log_file.csv."""
+        import pandas as pd
+        records = self.records[start:stop]
+        account = np.array(self.accounts, dtype=object)[records["account"]]
+        flow_type = np.array(self.types, dtype=object)[records["type"]]
+        ordinals, date_index = np.unique(records["date"], return_inverse=True)
+        dates = np.array([pd.Timestamp.fromordinal(int(o)).strftime("%Y-%m-%d") for o in ordinals], dtype=object)
+        messages = self.messages
+        amount = records["amount"]
+        return pd.DataFrame({
+            "date": dates[date_index],
+            "transaction_reference": self.column("reference", start, stop),
+            "age": records["age"],
+            "account": account,
+            "old_balance": self.column("old_balance", start, stop),
+            "new_balance": records["new_balance"],
+            "amount": amount,
+            "type": flow_type,
+            "message": [f"{a}-{messages[m]}-{x:.2f}" for a, m, x in
+                        zip(account.tolist(), records["message"].tolist(), amount.tolist())],
+        }, columns=LOG_FIELDNAMES)
+
+    def frames(self, chunksize: int) -> Iterator['pd.DataFrame']:
+        """frame() in chunks of `chunksize` records."""
+        for start in range(0, self.count, chunksize):
+            yield self.frame(start, start + chunksize)
+
+    def blocks(self, block_size: int = DEFAULT_BLOCK_SIZE) -> Iterator[LedgerBlock]:
+        """The records as ledger blocks, e.g. to feed another sink; the first carries all messages."""
+        for start in range(0, self.count, block_size):
+            columns = {name: np.ascontiguousarray(self.column(name, start, start + block_size)) for name, _ in LEDGER_COLUMNS}
+            yield LedgerBlock(columns, len(columns["date"]), self.messages if start == 0 else [])
+
+    def to_arrow(self):
+        """The log as a pyarrow Table with coded columns (pyarrow is optional)."""
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise ImportError("Arrow export needs pyarrow: pip install pyarrow")
+        columns = {name: pa.array(np.asarray(self[name])) for name, _ in LEDGER_COLUMNS}
+        columns["account"] = pa.DictionaryArray.from_arrays(columns["account"], pa.array(self.accounts))
+        columns["type"] = pa.DictionaryArray.from_arrays(columns["type"], pa.array(self.types))
+        columns["message"] = pa.DictionaryArray.from_arrays(columns["message"], pa.array(self.messages))
+        return pa.table(columns)
+
+
+def export_csv(binary_file: str = BINARY_LOG_PATH, csv_file: str = LOG_FILE_PATH) -> int:
+    """Write a binary log as cpf_log_file.csv text; returns the number of transactions."""
+    log = BinaryLog(binary_file)
+    sink = CSVLogSink(csv_file)
+    sink.open()
+    try:
+        for block in log.blocks():
+            sink.write_block(block)
+    finally:
+        sink.close()
+    return len(log)
+
+
+if __name__ == "__main__":
+    # Example usage: convert the CSV log of the last run to the binary format and back
+    import tempfile
+    import time
+    import pandas as pd
+    from cpf_ledger_v1 import TransactionLedger
+    logs = pd.read_csv(LOG_FILE_PATH)
+    binary_file = os.path.join(tempfile.gettempdir(), "cpf_log_file.bin")
+    with TransactionLedger(BinaryLogSink(binary_file)) as ledger:
+        for row in logs.itertuples(index=False):
+            message = row.message[len(row.account) + 1:-len(f"-{row.amount:.2f}")]
+            ledger.log(pd.Timestamp(row.date).date(), row.transaction_reference, row.age, row.account,
+                       row.old_balance, row.new_balance, row.amount, message)
+    start = time.perf_counter()
+    log = BinaryLog(binary_file)
+    total = float(log["amount"].sum())
+    elapsed = time.perf_counter() - start
+    print(f"{len(log)} transactions, {os.path.getsize(binary_file):,} bytes binary vs "
+          f"{os.path.getsize(LOG_FILE_PATH):,} bytes CSV; opened and summed in {elapsed * 1000:.2f} ms ({total:,.2f})")
+    csv_file = os.path.join(tempfile.gettempdir(), "cpf_log_file_export.csv")
+    export_csv(binary_file, csv_file)
+    with open(csv_file) as a, open(LOG_FILE_PATH) as b:
+        print("CSV export identical:", a.read() == b.read())
@@ -1,10 +1,17 @@
 from __init__ import SRC_DIR, CONFIG_FILENAME, LOG_FILE_PATH
+import argparse
+import csv
+import numpy as np
 import pandas as pd
 from datetime import datetime, date
 from dateutil.relativedelta import relativedelta
 from typing import Any
 import os
+import tempfile
+import time
 from pathlib import Path
+from cpf_binlog_v1 import BinaryLog, is_binary_log
+from cpf_xml_report_v1 import XMLReportWriter
 
 #a=os.path.dirname(os.path.abspath(__file__))
 #b=Path(__file__).resolve().parent 
@@ -14,8 +21,88 @@ from pathlib import Path
 
 #PATH="$HOME/miniconda3/bin:$PATcd srH"
 
+# report balance column -> log account, in report column order
+BALANCE_COLUMNS = {"OA": "oa", "SA": "sa", "MA": "ma", "RA": "ra", "LOANS": "loan", "EXCESS": "excess"}
+REPORT_COLUMNS = ["DATE_KEY", "REF", "AGE", "ACCOUNT", "TYPE", "INFLOW", "OUTFLOW",
+                  *BALANCE_COLUMNS, "MESSAGE"]
+SKIPPED_LOAN_AGE = 55        # the age-55 transfer writes the loan off in the RA; those rows are left out
+SKIPPED_LOAN_AMOUNT = 2000   # ... when the loan amount is above this
+DEFAULT_CHUNK_SIZE = 100_000  # log rows per chunk in streaming mode
+REPORT_FORMATS = ["csv", "excel", "xml"]
+
+
+def _column_values(series: pd.Series) -> list:
+    """Cell values of a column as to_csv writes them: missing values become empty strings."""
+    if series.hasnans:
+        return series.astype(object).where(series.notna(), "").tolist()
+    return series.tolist()
+
+
+class ReportWriter:
+    """
+    Appends report DataFrames to one output file, chunk after chunk.
+    CSV is written as the same text as DataFrame.to_csv; Excel uses an openpyxl write-only
+    workbook, which keeps only the current rows in memory (openpyxl is optional); XML is
+    streamed as cpf_report.xml <item> elements by XMLReportWriter.
+    """
+    def __init__(self, output_file: str, output_format: str = "csv"):
+        self.output_file = output_file
+        self.output_format = output_format
+        self.rows = 0
+        self._file = None
+        self._writer = None
+        self._workbook = None
+        self._sheet = None
+        self._xml = None
+        if output_format == "csv":
+            self._file = open(output_file, "w", newline="")
+            self._writer = csv.writer(self._file, lineterminator=os.linesep)
+            self._writer.writerow(REPORT_COLUMNS)
+        elif output_format == "excel":
+            try:
+                from openpyxl import Workbook
+            except ImportError:
+                raise ImportError("Excel output needs openpyxl: pip install openpyxl")
+            self._workbook = Workbook(write_only=True)
+            self._sheet = self._workbook.create_sheet()
+            self._sheet.append(REPORT_COLUMNS)
+        elif output_format == "xml":
+            self._xml = XMLReportWriter(output_file)
+        else:
+            raise ValueError(f"Invalid output format. Use one of {REPORT_FORMATS}.")
+
+    def write(self, df: pd.DataFrame) -> None:
+        rows = zip(*(_column_values(df[column]) for column in df.columns))
+        if self._writer is not None:
+            self._writer.writerows(rows)
+        elif self._xml is not None:
+            self._xml.write_rows(list(df.columns), rows)
+        else:
+            for row in rows:
+                self._sheet.append(row)
+        self.rows += len(df)
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._workbook is not None:
+            self._workbook.save(self.output_file)
+            self._workbook = None
+        if self._xml is not None:
+            self._xml.close()
+            self._xml = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+
 class CPFLogEntry:
-    def __init__(self, csv_file_path: str):
+    def __init__(self, csv_file_path: str, load: bool = True):
         self.csv_file_path = csv_file_path
         self.logs = None
         self.xdate: datetime.date = None
@@ -33,13 +120,17 @@ class CPFLogEntry:
         self.message: str = ''
         self.birth_date = datetime(1974, 7, 6).date()
 
-        # Load logs from the CSV file
-        self._load_logs()
+        # Load logs from the CSV file (not needed by build_report_streaming)
+        if load:
+            self._load_logs()
 
     def _load_logs(self):
         """
-        Load logs from the CSV file into a DataFrame.
+        Load logs from the CSV file (or a binary log, see cpf_binlog_v1) into a DataFrame.
         """
+        if is_binary_log(self.csv_file_path):
+            self.logs = BinaryLog(self.csv_file_path).frame()
+            return
         try:
             self.logs = pd.read_csv(self.csv_file_path)
         except FileNotFoundError:
@@ -104,10 +195,123 @@ class CPFLogEntry:
     #    setattr(self, f"{account}_balance", new_balance.__round__(2))
     #    self.outflow += amount
 
-    def build_report(self, output_format="csv"):
+    def build_report(self, output_format="csv", output_file: str = None):
+        """
+        Build a report from the logs and save it as a CSV, Excel or XML file.
+        The running balances are a cumulative sum per account over the amount column, which
+        adds the amounts in the same order as build_report_legacy and gives the same report.
+        :param output_format: The format to save the report ("csv", "excel" or "xml").
+        """
+        # Ensure logs are loaded
+        if self.logs is None or self.logs.empty:
+            raise ValueError("Logs data is empty or not loaded.")
+        return self.save_report(self.report_frame(self.logs), output_format, output_file)
+
+    def build_report_streaming(self, output_format="csv", output_file: str = None,
+                               chunksize: int = DEFAULT_CHUNK_SIZE, progress=None):
+        """
+        Build the same report as build_report while reading the log `chunksize` rows at a time.
+        The running balances carry over from one chunk to the next and every finished chunk is
+        appended to the output, so memory depends on the chunk size, not on the log length.
+        :param progress: optional callable(rows_done, bytes_read, total_bytes), called per chunk.
+        """
+        if chunksize is None or chunksize < 1:
+            raise ValueError(f"chunksize must be a positive integer, got {chunksize}")
+        if not os.path.exists(self.csv_file_path):
+            raise FileNotFoundError(f"CSV file not found: {self.csv_file_path}")
+        output_file = output_file or f"cpf_report.{output_format}"
+        if is_binary_log(self.csv_file_path):
+            # the binary log is memory-mapped, chunks are decoded straight from the records
+            log = BinaryLog(self.csv_file_path)
+            rows_done = 0
+            with ReportWriter(output_file, output_format) as writer:
+                for chunk in log.frames(chunksize):
+                    writer.write(self.report_frame(chunk))
+                    rows_done += len(chunk)
+                    if progress is not None:
+                        progress(rows_done, log.data_offset + rows_done * log.dtype.itemsize, os.path.getsize(log.filename))
+            if rows_done == 0:
+                raise ValueError("Logs data is empty or not loaded.")
+            print(f"Report saved as {output_file}")
+            return output_file
+        total_bytes = os.path.getsize(self.csv_file_path)
+        rows_done = 0
+        with open(self.csv_file_path, "rb") as f, ReportWriter(output_file, output_format) as writer:
+            try:
+                for chunk in pd.read_csv(f, chunksize=chunksize):
+                    writer.write(self.report_frame(chunk))
+                    rows_done += len(chunk)
+                    if progress is not None:
+                        progress(rows_done, f.tell(), total_bytes)
+            except pd.errors.ParserError as e:
+                raise ValueError(f"Error parsing CSV file: {e}")
+        if rows_done == 0:
+            raise ValueError("Logs data is empty or not loaded.")
+        print(f"Report saved as {output_file}")
+        return output_file
+
+    def report_frame(self, logs: pd.DataFrame) -> pd.DataFrame:
+        """
+        Report rows for a block of log rows, continuing from the running balances of this
+        entry, which are left at the balances after the block.
+        """
+        # validate the dates like the row-by-row version; they are written back unchanged
+        pd.to_datetime(logs["date"], format="%Y-%m-%d")
+        amount = logs["amount"].to_numpy(dtype=np.float64).round(2)
+        account = logs["account"].to_numpy()
+        age = logs["age"].to_numpy()
+        keep = ~((account == "loan") & (age == SKIPPED_LOAN_AGE) & (np.abs(amount) > SKIPPED_LOAN_AMOUNT))
+        amount, account = amount[keep], account[keep]
+        kept = logs[keep]
+        flow_type = kept["type"].to_numpy()
+
+        # pivot the amounts into one column per account and accumulate them, starting from
+        # the balances the entry already holds
+        balances = {}
+        for column, name in BALANCE_COLUMNS.items():
+            start = getattr(self, f"{name}_balance")
+            running = np.cumsum(np.concatenate(([start], np.where(account == name, amount, 0.0))))
+            balances[column] = running[1:]
+            setattr(self, f"{name}_balance", running[-1])
+
+        df = pd.DataFrame({
+            "DATE_KEY": kept["date"].to_numpy(),
+            "REF": kept["transaction_reference"].to_numpy(),
+            "AGE": kept["age"].to_numpy(),
+            "ACCOUNT": account,
+            "TYPE": flow_type,
+            "INFLOW": np.where(flow_type == "inflow", amount, 0.0),
+            "OUTFLOW": np.where(flow_type == "outflow", amount, 0.0),
+            **{column: values.round(2) for column, values in balances.items()},
+            "MESSAGE": kept["message"].to_numpy(),
+        }, columns=REPORT_COLUMNS)
+
+        if len(kept):
+            last = kept.iloc[-1]
+            self.xdate = datetime.strptime(last["date"], "%Y-%m-%d").date()
+            self.reference, self.age = last["transaction_reference"], last["age"]
+            self.flow_type, self.message = last["type"], last["message"]
+        return df
+
+    def save_report(self, df: pd.DataFrame, output_format="csv", output_file: str = None) -> str:
+        """Save the report DataFrame as cpf_report.csv, cpf_report.excel or cpf_report.xml."""
+        output_file = output_file or f"cpf_report.{output_format}"
+        if output_format in ("csv", "xml"):
+            # csv: same text as df.to_csv(output_file, index=False), without pandas' per-cell formatting
+            with ReportWriter(output_file, output_format) as writer:
+                writer.write(df)
+        elif output_format == "excel":
+            df.to_excel(output_file, index=False, engine="openpyxl")
+        else:
+            raise ValueError(f"Invalid output format. Use one of {REPORT_FORMATS}.")
+
+        print(f"Report saved as {output_file}")
+        return output_file
+
+    def build_report_legacy(self, output_format="csv", output_file: str = None):
         """
-        Build a report from the logs and save it as a CSV or Excel file.
-        :param output_format: The format to save the report ("csv" or "excel").
+        Row-by-row version of build_report, kept for comparison and benchmarking.
+        :param output_format: The format to save the report ("csv", "excel" or "xml").
         """
         report_data = []
 
@@ -182,24 +386,96 @@ class CPFLogEntry:
 
         # Convert the report data to a DataFrame
         df = pd.DataFrame(report_data)
-
-        # Save the report as CSV or Excel
-        output_file = f"cpf_report.{output_format}"
-        if output_format == "csv":
-            df.to_csv(output_file, index=False)
-        elif output_format == "excel":
-            df.to_excel(output_file, index=False, engine="openpyxl")
-        else:
-            raise ValueError("Invalid output format. Use 'csv' or 'excel'.")
-
-        print(f"Report saved as {output_file}")
+        return self.save_report(df, output_format, output_file)
+
+
+
+def synthetic_log(rows: int, seed: int = 0) -> pd.DataFrame:
+    """A cpf_log_file.csv shaped log of `rows` random transactions, for benchmarks."""
+    rng = np.random.default_rng(seed)
+    accounts = np.array(["oa", "sa", "ma", "ra", "loan", "excess"])
+    types = np.array(["outflow", "no change", "inflow"])
+    months = np.arange(rows) * 1600 // max(rows, 1)
+    dates = (np.datetime64("2025-05-31") + (months * 30.44).astype("timedelta64[D]")).astype(str)
+    amount = (rng.normal(0, 1500, rows) * 100).round() / 100
+    account = accounts[rng.integers(0, len(accounts), rows)]
+    return pd.DataFrame({
+        "date": dates,
+        "transaction_reference": 100000001 + np.arange(rows),
+        "age": 50 + months // 12,
+        "account": account,
+        "old_balance": 0.0,
+        "new_balance": amount,
+        "amount": amount,
+        "type": types[np.sign(amount).astype(int) + 1],
+        "message": np.char.add(account, "-synthetic"),
+    })
+
+
+def benchmark(rows: int = 1_000_000, legacy_rows: int = None, seed: int = 0):
+    """
+    Time build_report against build_report_legacy on a synthetic log of `rows` transactions.
+    The legacy builder runs on the first `legacy_rows` rows (all by default) and its time is
+    scaled to `rows`; when both ran on the same rows their reports are compared.
+    """
+    legacy_rows = rows if legacy_rows is None else min(legacy_rows, rows)
+    with tempfile.TemporaryDirectory() as workdir:
+        log_file = os.path.join(workdir, "cpf_log_file.csv")
+        synthetic_log(rows, seed).to_csv(log_file, index=False)
+        entry = CPFLogEntry(log_file)
+        start = time.perf_counter()
+        columnar_file = entry.build_report(output_file=os.path.join(workdir, "columnar.csv"))
+        columnar = time.perf_counter() - start
+
+        entry = CPFLogEntry(log_file)
+        entry.logs = entry.logs.iloc[:legacy_rows]
+        start = time.perf_counter()
+        legacy_file = entry.build_report_legacy(output_file=os.path.join(workdir, "legacy.csv"))
+        legacy = (time.perf_counter() - start) * rows / legacy_rows
+
+        print(f"rows: {rows:,}")
+        print(f"build_report:        {columnar:9.2f} s")
+        print(f"build_report_legacy: {legacy:9.2f} s" + ("" if legacy_rows == rows else f" (scaled from {legacy_rows:,} rows)"))
+        print(f"speedup:             {legacy / columnar:9.1f}x")
+        if legacy_rows == rows:
+            with open(columnar_file) as a, open(legacy_file) as b:
+                print("reports identical:", a.read() == b.read())
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build cpf_report.csv from the transaction log.")
+    parser.add_argument('--benchmark', type=int, nargs='?', const=1_000_000, metavar='ROWS',
+                        help="compare build_report with build_report_legacy on a synthetic log")
+    parser.add_argument('--legacy-rows', type=int, default=None,
+                        help="rows given to the legacy builder in the benchmark (default: all)")
+    parser.add_argument('--chunksize', type=int, default=None,
+                        help="stream the log in chunks of this many rows")
+    parser.add_argument('--format', choices=REPORT_FORMATS, default="csv",
+                        help="report format (the output file is cpf_report.<format>)")
+    return parser.parse_args(argv)
+
+
+def cli(argv=None) -> int:
+    """Build the report with the options of parse_args (also `cpf_cli_v1.py report`)."""
+    args = parse_args(argv)
+    if args.benchmark:
+        benchmark(args.benchmark, args.legacy_rows)
+    elif args.chunksize:
+        def show_progress(rows_done, bytes_read, total_bytes):
+            print(f"\rBuilding report: {rows_done:,} rows ({bytes_read / max(total_bytes, 1):.0%})", end="", flush=True)
+        cpflogs = CPFLogEntry(LOG_FILE_PATH, load=False)
+        cpflogs.build_report_streaming(args.format, chunksize=args.chunksize, progress=show_progress)
+        print()
+    else:
+        cpflogs = CPFLogEntry(LOG_FILE_PATH)
+        cpflogs.build_report(args.format)
+    return 0
 
 
 if __name__ == "__main__":
     # Example usage
     #csv_file_path = "cpf_log_file.csv"
-    cpflogs = CPFLogEntry(LOG_FILE_PATH)
-    cpflogs.build_report()
+    cli()
 
 
 
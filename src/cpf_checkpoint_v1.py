@@ -0,0 +1,284 @@
+# cpf_checkpoint_v1.py
+from __init__ import SRC_DIR, DATABASE_NAME
+import json
+import pickle
+import sqlite3
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from cpf_config_loader_v11 import CompiledCPFConfig
+from cpf_date_generator_v3 import MonthCalendar, ORDINAL_1970
+from cpf_db_writer_v1 import create_checkpoint_tables
+from cpf_ledger_v1 import ACCOUNT_CODES, TRANSACTION_TYPES, LEDGER_COLUMNS, TransactionLedger
+from cpf_binlog_v1 import BinaryLog
+
+# Months after which the simulation state is saved: every December, the birthday month at 55
+# (after the RA transfer) and the first month of the CPF payout
+CHECKPOINT_KINDS = ['december', 'age55', 'payout']
+
+# How a change of each CompiledCPFConfig field reaches the monthly loop (see first_affected_month)
+AGE_TABLES = ['allocation', 'interest_rate', 'extra_interest_first', 'extra_interest_next']
+PAYOUT_FIELDS = ['payouttype', 'cpfpayoutage', 'retirement_payouts']
+# not read by the loop, or only through transfer_amount / the calendar length
+NOT_SIMULATED = ['_values', 'enddate', 'ownhdb', 'pledgeyourhdbat55', 'salary', 'salarycap', 'retirement_sums',
+                 'payout_amount', 'employee_rate', 'employer_rate']
+
+
+class Checkpoint:
+    """Saved simulation state after calendar month `position` of a run."""
+    def __init__(self, run_id: str, position: int, date_key: str, age: int, kind: str, state: Dict[str, Any]):
+        self.run_id = run_id
+        self.position = position
+        self.date_key = date_key
+        self.age = age
+        self.kind = kind
+        self.state = state
+
+    def __repr__(self):
+        return f"Checkpoint(run_id={self.run_id!r}, position={self.position}, date_key={self.date_key!r}, kind={self.kind!r})"
+
+
+def _first_month_at_age(calendar: MonthCalendar, age: int) -> int:
+    return int(np.searchsorted(calendar.columns["age"], age, side="left"))
+
+
+def _transfer_month(calendar: MonthCalendar, birth_month: int) -> int:
+    """Position of the birthday month at 55, when the SA and OA go to the RA; len(calendar) if outside."""
+    cols = calendar.columns
+    positions = np.flatnonzero((cols["age"] == 55) & (cols["month"] == birth_month))
+    return int(positions[0]) if len(positions) else len(calendar)
+
+
+def checkpoint_positions(calendar: MonthCalendar, rates: CompiledCPFConfig, kinds: Iterable[str] = CHECKPOINT_KINDS) -> Dict[int, str]:
+    """{calendar position: 'december,age55,...'} of the months after which a checkpoint is saved."""
+    kinds = list(kinds or [])
+    unknown = [kind for kind in kinds if kind not in CHECKPOINT_KINDS]
+    if unknown:
+        raise ValueError(f"Unsupported checkpoint kinds: {unknown}. Use any of {CHECKPOINT_KINDS}")
+    marks: Dict[int, List[str]] = {}
+    if 'december' in kinds:
+        for position in np.flatnonzero(calendar.columns["month"] == 12).tolist():
+            marks.setdefault(position, []).append('december')
+    if 'age55' in kinds:
+        position = _transfer_month(calendar, calendar.birth_date.month)
+        if position < len(calendar):
+            marks.setdefault(position, []).append('age55')
+    if 'payout' in kinds:
+        position = _first_month_at_age(calendar, rates.cpfpayoutage)
+        if position < len(calendar):
+            marks.setdefault(position, []).append('payout')
+    return {position: ','.join(names) for position, names in sorted(marks.items())}
+
+
+def first_affected_month(old: CompiledCPFConfig, new: CompiledCPFConfig, calendar: MonthCalendar) -> int:
+    """
+    Position of the first month of `calendar` whose simulation can differ between `old` and
+    `new`, or len(calendar) when nothing the monthly loop reads has changed.
+    Age-indexed tables only matter from the first age at which they differ, the RA transfer
+    amount from the birthday month at 55 and the payout settings from the earlier payout age;
+    any other change (dates, balances, loan payments, ...) affects the run from the start.
+    A field that is not classified here also counts as affecting the start.
+    """
+    first = len(calendar)
+    for name in CompiledCPFConfig.__slots__:
+        if name in NOT_SIMULATED or name in PAYOUT_FIELDS:
+            continue
+        a, b = getattr(old, name), getattr(new, name)
+        if name in AGE_TABLES:
+            pairs = [(a, b)] if isinstance(a, tuple) else [(a[key], b.get(key)) for key in set(a) | set(b)]
+            for table_a, table_b in pairs:
+                if table_a != table_b:
+                    if table_a is None or table_b is None:
+                        return 0
+                    age = next(age for age, (x, y) in enumerate(zip(table_a, table_b)) if x != y)
+                    first = min(first, _first_month_at_age(calendar, age))
+        elif name == 'transfer_amount':
+            if a != b:
+                first = min(first, _transfer_month(calendar, calendar.birth_date.month))
+        elif a != b:
+            return 0
+    old_payout = (old.cpfpayoutage, old.retirement_payouts.get(old.payouttype, 0.0))
+    new_payout = (new.cpfpayoutage, new.retirement_payouts.get(new.payouttype, 0.0))
+    if old_payout != new_payout:
+        first = min(first, _first_month_at_age(calendar, min(old.cpfpayoutage, new.cpfpayoutage)))
+    return first
+
+
+def latest_run(database: str = DATABASE_NAME) -> Optional[str]:
+    """run_id of the most recently started run with checkpoints."""
+    conn = sqlite3.connect(database)
+    try:
+        create_checkpoint_tables(conn)
+        row = conn.execute("SELECT run_id FROM cpf_runs ORDER BY rowid DESC LIMIT 1").fetchone()
+    finally:
+        conn.close()
+    return row[0] if row else None
+
+
+def log_signature(log_file: str) -> Optional[Tuple[int, int, str]]:
+    """(size, mtime in ns, SHA-256 hex digest) of a transaction log, None when the file is missing."""
+    import hashlib
+    import os
+    try:
+        stat = os.stat(log_file)
+        digest = hashlib.sha256()
+        with open(log_file, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns, digest.hexdigest()
+
+
+def seal_run_log(database: str, run_id: str, log_file: str) -> None:
+    """Record the signature of a run's closed transaction log in cpf_runs (see find_resume_point)."""
+    signature = log_signature(log_file)
+    if signature is None:
+        return
+    conn = sqlite3.connect(database)
+    try:
+        create_checkpoint_tables(conn)
+        with conn:
+            conn.execute("UPDATE cpf_runs SET log_size = ?, log_mtime_ns = ?, log_sha256 = ? WHERE run_id = ?",
+                         (*signature, run_id))
+    finally:
+        conn.close()
+
+
+class RunLogSeal:
+    """
+    Seal a checkpointed run's transaction log when the block exits, also when the run is
+    interrupted. Enter it before the account whose ledger writes the log, so the log has been
+    closed (and flushed) by the time it is sealed; register() the run once it has started.
+    """
+    def __init__(self, database: str = DATABASE_NAME):
+        self.database = database
+        self.run_id = None
+        self.log_file = None
+
+    def register(self, run_id: str, log_file: Optional[str]) -> None:
+        self.run_id, self.log_file = run_id, log_file
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.run_id is not None and self.log_file:
+            seal_run_log(self.database, self.run_id, self.log_file)
+        return False
+
+
+def find_resume_point(database: str, source_run_id: str, rates: CompiledCPFConfig,
+                      calendar: MonthCalendar, money: str = 'float') -> Tuple[Optional[Checkpoint], Optional[Dict[str, str]]]:
+    """
+    The latest checkpoint of `source_run_id` that a run of `rates` over `calendar` can continue
+    from, i.e. taken before the first month the config changes affect, and the source run's
+    transaction log ({'log_file', 'log_format'}). (None, None) when there is no such checkpoint,
+    when the source run kept its balances in another money mode (see cpf_money_v1), or when its
+    log is no longer the file it wrote, e.g. a later run has overwritten it (see seal_run_log).
+    """
+    conn = sqlite3.connect(database)
+    try:
+        create_checkpoint_tables(conn)
+        run = conn.execute("SELECT config, log_file, log_format, log_size, log_mtime_ns, log_sha256 "
+                           "FROM cpf_runs WHERE run_id = ?", (source_run_id,)).fetchone()
+        if run is None or run[2] == "none":  # nothing to resume without the source run's log
+            return None, None
+        if run[5] is None or log_signature(run[1]) != tuple(run[3:6]):
+            return None, None
+        limit = min(first_affected_month(pickle.loads(run[0]), rates, calendar), len(calendar))
+        row = conn.execute("SELECT run_id, position, date_key, age, kind, state FROM cpf_checkpoints "
+                           "WHERE run_id = ? AND position < ? ORDER BY position DESC LIMIT 1",
+                           (source_run_id, limit)).fetchone()
+    finally:
+        conn.close()
+    if row is None:
+        return None, None
+    checkpoint = Checkpoint(*row[:5], json.loads(row[5]))
+    if checkpoint.date_key != calendar.date_keys[checkpoint.position] or checkpoint.state.get('money', 'float') != money:
+        return None, None
+    return checkpoint, {'log_file': run[1], 'log_format': run[2]}
+
+
+def load_log_prefix(log_file: str, log_format: str, count: int) -> Tuple[Dict[str, np.ndarray], List[str]]:
+    """
+    The first `count` transactions of a log as LEDGER_COLUMNS arrays plus the message texts their
+    message ids refer to. Everything is read into memory, so the file may then be overwritten.
+    """
+    if log_format == "binary":
+        log = BinaryLog(log_file)
+        if len(log) < count:
+            raise ValueError(f"{log_file} has {len(log)} transactions, the checkpoint needs {count}")
+        columns = {name: np.array(log.column(name, 0, count)) for name, _ in LEDGER_COLUMNS}
+        messages = list(log.messages)
+        del log
+    else:
+        import pandas as pd
+        logs = pd.read_csv(log_file, nrows=count)
+        if len(logs) < count:
+            raise ValueError(f"{log_file} has {len(logs)} transactions, the checkpoint needs {count}")
+        account = logs["account"].to_numpy()
+        amount = logs["amount"].to_numpy(dtype=np.float64)
+        # "<account>-<message>-<amount>" back to the message text, as the ledger interns it
+        texts = [text[len(a) + 1:-len(f"-{x:.2f}")] for text, a, x in zip(logs["message"].tolist(), account.tolist(), amount.tolist())]
+        messages, message_ids = np.unique(np.array(texts, dtype=object), return_inverse=True)
+        type_codes = {name: code for code, name in enumerate(TRANSACTION_TYPES)}
+        columns = {
+            "date": pd.to_datetime(logs["date"], format="%Y-%m-%d").to_numpy().astype("datetime64[D]").astype(np.int64) + ORDINAL_1970,
+            "reference": logs["transaction_reference"].to_numpy(dtype=np.int64),
+            "age": logs["age"].to_numpy(dtype=np.int16),
+            "account": np.array([ACCOUNT_CODES[a] for a in account.tolist()], dtype=np.int8),
+            "old_balance": logs["old_balance"].to_numpy(dtype=np.float64),
+            "new_balance": logs["new_balance"].to_numpy(dtype=np.float64),
+            "amount": amount,
+            "type": np.array([type_codes[t] for t in logs["type"].tolist()], dtype=np.int8),
+            "message": message_ids.astype(np.int32),
+        }
+        messages = messages.tolist()
+    if count and int(columns["reference"][-1]) != int(columns["reference"][0]) + count - 1:
+        raise ValueError(f"{log_file} does not hold the transactions of the checkpoint")
+    return columns, messages
+
+
+def prefix_balances_match(columns: Dict[str, np.ndarray], state: Dict[str, Any]) -> bool:
+    """
+    Whether the last new_balance of every account in a load_log_prefix() result is the balance
+    the checkpoint state saved, i.e. the prefix is the one that led to the checkpoint.
+    Accounts without a transaction in the prefix are not checked.
+    """
+    for account, balance in state["balances"].items():
+        rows = np.flatnonzero(columns["account"] == ACCOUNT_CODES[account])
+        if len(rows) and round(float(columns["new_balance"][rows[-1]]) - float(balance), 2) != 0:
+            return False
+    return True
+
+
+def replay_log_prefix(ledger: TransactionLedger, columns: Dict[str, np.ndarray], messages: List[str]) -> None:
+    """
+    Append a load_log_prefix() result to `ledger`, re-interning the message texts the prefix uses
+    in the order they first appear, so the ledger's message table is the one of a full run.
+    """
+    if not len(columns["reference"]):
+        return
+    used, first = np.unique(columns["message"], return_index=True)
+    ids = np.zeros(len(messages), dtype=np.int32)
+    for message_id in used[np.argsort(first)].tolist():
+        ids[message_id] = ledger.intern_message(messages[message_id])
+    columns = dict(columns, message=ids[columns["message"]])
+    ledger.append_block(columns)
+
+
+if __name__ == "__main__":
+    # Example usage: list the checkpoints of the latest run and what a later payout age would reuse
+    from cpf_config_loader_v11 import CPFConfig, compile_config
+    from cpf_date_generator_v3 import DateGenerator
+    from __init__ import CONFIG_FILENAME
+    run_id = latest_run()
+    if run_id is None:
+        print("No checkpointed run in the database; run cpf_run_simulation_v9.py first.")
+    else:
+        config = CPFConfig(CONFIG_FILENAME)
+        config.cpfpayoutage = compile_config(config).cpfpayoutage + 1
+        rates = compile_config(config)
+        calendar = DateGenerator(start_date=rates.startdate, end_date=rates.enddate, birth_date=rates.birthdate).generate_calendar()
+        checkpoint, _ = find_resume_point(DATABASE_NAME, run_id, rates, calendar)
+        print(f"run {run_id}: with cpfpayoutage={rates.cpfpayoutage} resume from {checkpoint}")
@@ -0,0 +1,153 @@
+# cpf_cli_v1.py
+from __init__ import SRC_DIR
+import argparse
+import importlib
+import os
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+
+# command -> (module, entry point, summary); a module is imported only when its command runs,
+# and its entry point takes the rest of the command line (see the parse_args of each module)
+COMMANDS = {
+    'simulate': ('cpf_run_simulation_v9', 'cli', "run the monthly CPF simulation"),
+    'report': ('cpf_build_reports_v1', 'cli', "build cpf_report.csv from the transaction log"),
+    'reconcile': ('cpf_reconcile_v1', 'main', "reconcile the transaction log with the report"),
+    'sweep': ('cpf_sweep_v1', 'main', "run what-if scenarios in parallel"),
+}
+# modules a command must not import before its first output: they are imported where they are used
+DEFERRED_MODULES = {
+    'simulate': ['pandas', 'tqdm', 'dateutil', 'multiprocessing', 'shelve', 'cpf_data_saver_v3', 'cpf_build_reports_v1'],
+}
+IMPORT_BUDGET_MS = 250.0  # cumulative import time of a command's module in check_imports; numpy is most of it
+FIRST_OUTPUT_BUDGET_MS = 100.0  # time to the first line of `simulate` that `imports --first-output` enforces
+FIRST_OUTPUT_RUNS = 3  # simulate runs timed by `imports --first-output`, the fastest counts
+
+
+def load_command(command: str) -> Callable[[List[str]], int]:
+    """The entry point of a command, importing its module."""
+    if command not in COMMANDS:
+        raise ValueError(f"Unsupported command: {command}. Use one of {list(COMMANDS)}")
+    module, entry, _ = COMMANDS[command]
+    return getattr(importlib.import_module(module), entry)
+
+
+def import_times(command: str) -> Dict[str, Tuple[int, int]]:
+    """
+    The modules imported by a command's module in a fresh interpreter, from the output of
+    `python -X importtime`: module -> (self, cumulative) microseconds, in import order.
+    A first, untimed import brings the bytecode caches up to date.
+    """
+    import subprocess
+    statement = f"import {COMMANDS[command][0]}"
+    subprocess.run([sys.executable, '-c', statement], cwd=SRC_DIR, check=True, capture_output=True)
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement], cwd=SRC_DIR, check=True,
+                            capture_output=True, text=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or line.endswith('imported package'):
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        if self_us.strip().isdigit():
+            times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def check_imports(command: str = 'simulate', budget_ms: float = IMPORT_BUDGET_MS,
+                  times: Dict[str, Tuple[int, int]] = None) -> List[str]:
+    """
+    The import-time regression check of a command: the problems found, empty when it passes.
+    A problem is a DEFERRED_MODULES module imported by the command's module, or the import of
+    the module taking longer than `budget_ms` (None to only check the modules).
+    """
+    times = times if times is not None else import_times(command)
+    module = COMMANDS[command][0]
+    problems = [f"{module} imports {name} at startup" for name in DEFERRED_MODULES.get(command, []) if name in times]
+    elapsed_ms = times[module][1] / 1000
+    if budget_ms is not None and elapsed_ms > budget_ms:
+        problems.append(f"importing {module} took {elapsed_ms:.1f} ms, over the {budget_ms:.0f} ms budget")
+    return problems
+
+
+def first_output_time(argv: List[str]) -> float:
+    """Seconds from starting `cpf_cli_v1.py <argv>` in a new interpreter to its first line of output."""
+    import subprocess
+    start = time.perf_counter()
+    with subprocess.Popen([sys.executable, os.path.join(SRC_DIR, 'cpf_cli_v1.py'), *argv], cwd=SRC_DIR,
+                          stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True) as process:
+        process.stdout.readline()
+        elapsed = time.perf_counter() - start
+        process.stdout.read()
+    if process.returncode:
+        raise RuntimeError(f"cpf_cli_v1.py {' '.join(argv)} exited with status {process.returncode}")
+    return elapsed
+
+
+def parse_imports_args(argv=None):
+    parser = argparse.ArgumentParser(prog="cpf_cli_v1.py imports",
+                                     description="Check what a command imports at startup, from python -X importtime.")
+    parser.add_argument('--command', choices=list(COMMANDS), default='simulate', help="command to check")
+    parser.add_argument('--budget-ms', type=float, default=IMPORT_BUDGET_MS,
+                        help="fail when importing the command's module takes longer (0: no limit)")
+    parser.add_argument('--top', type=int, default=15, help="slowest modules to list")
+    parser.add_argument('--first-output', action='store_true',
+                        help="also time simulation runs (in a temporary directory) to their first line of output")
+    parser.add_argument('--first-output-budget-ms', type=float, default=FIRST_OUTPUT_BUDGET_MS,
+                        help="with --first-output, fail when the fastest run takes longer (0: no limit)")
+    return parser.parse_args(argv)
+
+
+def imports_cli(argv=None) -> int:
+    """
+    The `imports` command; the exit status is 1 when check_imports finds a problem, or with
+    --first-output when the fastest of FIRST_OUTPUT_RUNS simulations is over its budget.
+    """
+    args = parse_imports_args(argv)
+    times = import_times(args.command)
+    module = COMMANDS[args.command][0]
+    print(f"{'module':<40}{'self ms':>10}{'cumulative ms':>15}")
+    for name, (self_us, cumulative_us) in sorted(times.items(), key=lambda item: -item[1][1])[:args.top]:
+        print(f"{name:<40}{self_us / 1000:>10.1f}{cumulative_us / 1000:>15.1f}")
+    print(f"{len(times)} modules, import {module}: {times[module][1] / 1000:.1f} ms")
+    problems = check_imports(args.command, args.budget_ms or None, times)
+    if args.first_output:
+        import tempfile
+        with tempfile.TemporaryDirectory() as workdir:
+            elapsed_ms = 1000 * min(first_output_time(['simulate', '--no-checkpoints', '--renderer', 'table',
+                                                       '--database', os.path.join(workdir, 'cpf_simulation.db'),
+                                                       '--log-file', os.path.join(workdir, 'cpf_log_file.csv')])
+                                    for _ in range(FIRST_OUTPUT_RUNS))
+        budget_ms = args.first_output_budget_ms
+        print(f"simulate first output: {elapsed_ms:.1f} ms (budget {budget_ms:.0f} ms)" if budget_ms else
+              f"simulate first output: {elapsed_ms:.1f} ms")
+        if budget_ms and elapsed_ms > budget_ms:
+            problems.append(f"simulate took {elapsed_ms:.1f} ms to its first output, over the {budget_ms:.0f} ms budget")
+    for problem in problems:
+        print(f"FAIL: {problem}")
+    if not problems:
+        print("OK")
+    return 1 if problems else 0
+
+
+def parse_args(argv=None):
+    summaries = "\n".join(f"  {command:<10} {summary}" for command, (_, _, summary) in COMMANDS.items())
+    parser = argparse.ArgumentParser(
+        description="The CPF program's commands. Every command takes its own options; see <command> --help.",
+        epilog=f"commands:\n{summaries}\n  {'imports':<10} check what a command imports at startup",
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('command', choices=list(COMMANDS) + ['imports'], help="command to run")
+    parser.add_argument('args', nargs=argparse.REMAINDER, help="options of the command")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if argv is None:  # the usage messages of the command read "cpf_cli_v1.py <command>"
+        sys.argv[0] = f"{os.path.basename(sys.argv[0])} {args.command}"
+    if args.command == 'imports':
+        return imports_cli(args.args)
+    return load_command(args.command)(args.args) or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
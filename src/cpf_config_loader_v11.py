@@ -1,10 +1,11 @@
 from __init__ import SRC_DIR, CONFIG_FILENAME, CONFIG_FILENAME_FOR_USE, DATABASE_NAME
 import json
+import weakref
 from datetime import datetime, date
+from types import MappingProxyType
 import os
-from typing import Any
+from typing import Any, Mapping
 import re   
-from pprint import pprint
 import re 
 
 
@@ -15,6 +16,11 @@ import re
 
 DATE_FORMAT = "%Y-%m-%d"    
 PATTERN  = r"\b\d{4}-\d{2}-\d{2}\b"
+MAX_AGE = 120  # the age tables of CompiledCPFConfig cover ages 0..MAX_AGE
+ACCOUNTS = ['oa', 'sa', 'ma', 'ra']
+RETIREMENT_SUM_TYPES = ['brs', 'frs', 'ers']
+LOAN_KEY = re.compile(r"loans\[(\d+)\](.+)")  # flattened keys of the optional `loans` list, e.g. loans[0]rate
+RATE_CHANGE_KEY = re.compile(r"ratechanges\[(\d+)\](month|rate)")
 
 def custom_serializer(obj):
     """Custom serializer for non-serializable objects like datetime."""
@@ -69,6 +75,8 @@ class CPFConfig:
         def extract(data, parent_key=""):
             if isinstance(data, dict):
                 for key, value in data.items():
+                    if not parent_key and is_duplicate_blob(data, key, value):
+                        continue
                     full_key = f"{parent_key}{key}" if parent_key else key
                     if isinstance(value, (dict, list)):
                         extract(value, full_key)
@@ -97,6 +105,196 @@ class CPFConfig:
         #iterate in both list and set the attributes
         for key, val in zip(keys, values):
             setattr(self, key, val)
+
+    def compile(self) -> "CompiledCPFConfig":
+        """Build the read-only, table-driven view of the current attributes (see CompiledCPFConfig)."""
+        return CompiledCPFConfig(vars(self))
+
+
+def is_duplicate_blob(data: dict, key: str, value: Any) -> bool:
+    """
+    cpf_config.json carries a copy of itself: the whole file as a JSON string under 'data' and
+    every key again with a 'data' prefix. Those copies are not loaded as attributes.
+    """
+    if key == 'data':
+        return isinstance(value, str)
+    return key.startswith('data') and key[len('data'):] in data
+
+
+def to_date(key: str, value) -> date:
+    """Accept a YYYY-MM-DD string or a date/datetime from the config."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, str):
+        return datetime.strptime(value, DATE_FORMAT).date()
+    raise ValueError(f"Invalid date format for {key}: {value}. Expected format: YYYY-MM-DD")
+
+
+def loan_terms(values: Mapping[str, Any]) -> tuple:
+    """
+    The loans of a config, for cpf_loan_v1.LoanSchedule: first the phased loan of loanbalance with
+    the loanpaymentsyear12/year3/year4beyond payments, then one amortized loan per entry of the
+    optional `loans` list, e.g. {"name": "bank", "balance": 200000, "rate": 2.6, "termmonths": 300,
+    "ratechanges": [{"month": 24, "rate": 3.8}]}. `month` counts the months of the run from 0;
+    "payment" fixes the monthly payment instead of levelling it over the rest of the term, and
+    "startmonth" delays the first payment.
+    """
+    get = values.get
+    phased = {'kind': 'phased', 'name': 'loan', 'balance': float(get('loanbalance', 0.0)),
+              'payments': (float(get('loanpaymentsyear12', 0.0)), float(get('loanpaymentsyear3', 0.0)),
+                           float(get('loanpaymentsyear4beyond', 0.0)))}
+    fields: dict = {}
+    for key, value in values.items():
+        match = LOAN_KEY.fullmatch(key) if isinstance(key, str) else None
+        if match:
+            fields.setdefault(int(match.group(1)), {})[match.group(2)] = value
+    loans = [MappingProxyType(phased)]
+    for index in sorted(fields):
+        loan = fields[index]
+        changes = {}
+        for key, value in loan.items():
+            match = RATE_CHANGE_KEY.fullmatch(key)
+            if match:
+                changes.setdefault(int(match.group(1)), {})[match.group(2)] = value
+        if 'balance' not in loan or 'termmonths' not in loan and 'payment' not in loan:
+            raise ValueError(f"loans[{index}] needs a balance and a termmonths or payment")
+        loans.append(MappingProxyType({
+            'kind': 'amortized',
+            'name': str(loan.get('name', f"loan{index + 1}")),
+            'balance': float(loan['balance']),
+            'rate': float(loan.get('rate', 0.0)),
+            'term_months': int(loan.get('termmonths', 0)),
+            'payment': float(loan.get('payment', 0.0)),
+            'start_month': int(loan.get('startmonth', 0)),
+            'rate_changes': tuple(sorted((int(change['month']), float(change['rate'])) for change in changes.values())),
+        }))
+    return tuple(loans)
+
+
+def contribution_bracket(age: int) -> str:
+    """Age bracket of the cpfcontributionrates... keys."""
+    if age < 55:
+        return 'below55'
+    elif age < 60:
+        return '55to60'
+    elif age < 65:
+        return '60to65'
+    elif age < 70:
+        return '65to70'
+    return 'above70'
+
+
+def allocation_bracket(age: int) -> str:
+    """
+    Age bracket of the allocationabove55... amounts as Step 16 of the run loop resolves it:
+    its last if/else always wins, so only 66to70 (65 to 69) and above70 are ever used.
+    """
+    return '66to70' if 65 <= age < 70 else 'above70'
+
+
+class CompiledCPFConfig:
+    """
+    Read-only config for the simulation hot path.
+    The bracketed keys (allocations, contribution rates, interest and extra-interest rates)
+    are resolved once into tuples indexed by age 0..MAX_AGE, so a monthly lookup is
+    `table[age]` instead of building a key and calling getattr. Interest rates are stored as
+    the monthly fraction rate / 100 / 12.
+    """
+    __slots__ = (
+        '_values', 'startdate', 'enddate', 'birthdate', 'payouttype', 'cpfpayoutage', 'ownhdb',
+        'pledgeyourhdbat55', 'salary', 'salarycap', 'balances', 'loan_payments', 'loans',
+        'retirement_sums', 'retirement_payouts', 'payout_amount', 'transfer_amount',
+        'allocation_below55', 'allocation', 'employee_rate', 'employer_rate', 'interest_rate',
+        'extra_interest_first', 'extra_interest_next',
+    )
+
+    def __init__(self, values: Mapping[str, Any]):
+        """`values` are the flattened attributes of a CPFConfig, e.g. vars(config)."""
+        values = dict(values)
+        get = values.get
+        assign = lambda name, value: object.__setattr__(self, name, value)
+        ages = range(MAX_AGE + 1)
+
+        assign('_values', values)
+        for name in ['startdate', 'enddate', 'birthdate', 'payouttype', 'cpfpayoutage', 'ownhdb',
+                     'pledgeyourhdbat55', 'salary', 'salarycap']:
+            assign(name, values[name])
+        start, end, birth = (to_date(key, values[key]) for key in ['startdate', 'enddate', 'birthdate'])
+        if birth > start:
+            raise ValueError(f"birthdate {birth} is after startdate {start}")
+        if end.year - birth.year > MAX_AGE:
+            raise ValueError(f"enddate {end} is beyond age {MAX_AGE}")
+
+        assign('loans', loan_terms(values))
+        balances = {account: float(get(f'{account}balance', 0.0)) for account in ACCOUNTS + ['excess', 'loan']}
+        if len(self.loans) > 1:  # the loan account carries every loan
+            balances['loan'] = sum(loan['balance'] for loan in self.loans).__round__(2)
+        assign('balances', MappingProxyType(balances))
+        assign('loan_payments', self.loans[0]['payments'])
+        assign('retirement_sums', MappingProxyType({t: get(f'retirementsums{t}amount', 0) for t in RETIREMENT_SUM_TYPES}))
+        assign('retirement_payouts', MappingProxyType({t: get(f'retirementsums{t}payout', 0.0) for t in RETIREMENT_SUM_TYPES}))
+        assign('payout_amount', get(f'retirementsums{self.payouttype}payout', 0.0))
+        # Step 22: the RA is set to the chosen sum at 55, or half the FRS when the HDB flat is pledged
+        if str(self.ownhdb).lower() == 'yes' and str(self.pledgeyourhdbat55).lower() == 'yes':
+            assign('transfer_amount', (get('retirementsumsfrsamount', 0) / 2).__round__(2))
+        else:
+            assign('transfer_amount', get(f'retirementsums{self.payouttype}amount', 0.0).__round__(2))
+
+        below55 = {account: get(f'allocationbelow55{account}amount', 0.0).__round__(2) for account in ['oa', 'sa', 'ma']}
+        below55['ra'] = 0.0
+        assign('allocation_below55', MappingProxyType(below55))
+        allocation = {}
+        for account in ACCOUNTS:
+            above55 = {key: get(f'allocationabove55{account}{key}amount', get(f'allocationabove55{account}amount', 0.0)).__round__(2)
+                       for key in ['66to70', 'above70']}
+            allocation[account] = tuple(below55[account] if age < 55 else above55[allocation_bracket(age)] for age in ages)
+        assign('allocation', MappingProxyType(allocation))
+
+        assign('employee_rate', tuple(get(f'cpfcontributionrates{contribution_bracket(age)}employee', 0.0) for age in ages))
+        assign('employer_rate', tuple(get(f'cpfcontributionrates{contribution_bracket(age)}employer', 0.0) for age in ages))
+
+        monthly = lambda key: get(key, 0.0) / 100 / 12
+        interest = {account: tuple(monthly(f'interestrates{account}') for age in ages) for account in ['sa', 'ma', 'ra']}
+        interest['oa'] = tuple(monthly('interestratesoabelow55' if age < 55 else 'interestratesoaabove55') for age in ages)
+        assign('interest_rate', MappingProxyType(interest))
+        # below 55 one rate on the first 60k; from 55 the first and next 30k tiers
+        assign('extra_interest_first', tuple(
+            monthly('extrainterestbelow55' if age < 55 else 'extrainterestfirst30kabove55') for age in ages))
+        assign('extra_interest_next', tuple(
+            0.0 if age < 55 else monthly('extrainterestnext30kabove55') for age in ages))
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+    def __reduce__(self):
+        return type(self), (self._values,)
+
+
+# CPFConfig -> (its CompiledCPFConfig, the attributes it was compiled from), see compile_config
+_PRECOMPILED = weakref.WeakKeyDictionary()
+
+
+def compile_config(config) -> CompiledCPFConfig:
+    """
+    Return `config` compiled, or unchanged when it already is a CompiledCPFConfig.
+    A CPFConfig is compiled once per process: later calls return the same tables as long as
+    none of its attributes has been changed since.
+    """
+    if isinstance(config, CompiledCPFConfig):
+        return config
+    precompiled = _PRECOMPILED.get(config)
+    if precompiled is not None:
+        compiled, attributes = precompiled
+        if vars(config) == attributes:
+            return compiled
+    compiled = CompiledCPFConfig(vars(config))
+    _PRECOMPILED[config] = (compiled, dict(vars(config)))
+    return compiled
             
             
 def main():
@@ -106,10 +304,9 @@ def main():
     newdict = {}
   
     print("\nAttributes of the config object:")
-    for attr in dir(config):
-        if not attr.startswith("__") and not callable(getattr(config, attr)):
-            print(f"{attr}: {getattr(config, attr)}")
-            newdict[attr] = getattr(config, attr)
+    for attr, value in sorted(vars(config).items()):
+        print(f"{attr}: {value}")
+        newdict[attr] = value
     with open(CONFIG_FILENAME_FOR_USE, 'w') as f:
         json.dump(newdict, f, indent=4, default=custom_serializer)
     
@@ -8,6 +8,7 @@ import csv
 from datetime import datetime
 from typing import Any, Union, List
 import os
+from cpf_xml_report_v1 import XMLReportWriter
 
 #SRC_DIR = os.path.dirname(os.path.abspath(__file__))  # Path to the src directory
 #CONFIG_FILENAME = os.path.join(SRC_DIR, 'cpf_config.json')  # Full path to the config file
@@ -22,7 +23,7 @@ def custom_serializer(obj):
 
 class DataSaver:
     """
-    Class for efficient data storage (optional use). Supports streaming writes in pickle, shelve, or csv.
+    Class for efficient data storage (optional use). Supports streaming writes in pickle, shelve, csv or xml.
     """
     def __init__(self, format: str = None,filename: str = None):
         self.format = format.lower()
@@ -36,6 +37,8 @@ class DataSaver:
         elif self.format == 'csv':
             self._file = open(filename, 'w', newline='')
             self._csv_writer = None  # Initialize later when the first item is appended
+        elif self.format == 'xml':
+            self._xml_writer = XMLReportWriter(filename)  # <CPFReport><item>...</item></CPFReport>
         else:
             raise ValueError("Unsupported format for DataSaver")
 
@@ -60,10 +63,15 @@ class DataSaver:
                 self._csv_writer.writerow(item)
             else:
                 raise ValueError("Item must be a dictionary for CSV format.")
+        elif self.format == 'xml':
+            if isinstance(item, dict):
+                self._xml_writer.write_item(item)
+            else:
+                raise ValueError("Item must be a dictionary for XML format.")
             
     def save_results(self,data: Union[dict, List], file_path: str, format: str = None):
         """
-        Save the results data to file in the specified format: 'pickle' (binary), 'json', 'shelve', or 'csv'.
+        Save the results data to file in the specified format: 'pickle' (binary), 'json', 'shelve', 'csv' or 'xml'.
         """
         longfile = os.path.join(SRC_DIR, file_path)
         format = format.lower()
@@ -94,6 +102,14 @@ class DataSaver:
                     writer.writerows(data)
             else:
                 raise ValueError("Data must be a list of dictionaries to save as CSV.")
+        elif format == 'xml':
+            # Stream a list of dictionaries as <item> elements
+            if isinstance(data, list) and all(isinstance(item, dict) for item in data):
+                with XMLReportWriter(longfile) as writer:
+                    for item in data:
+                        writer.write_item(item)
+            else:
+                raise ValueError("Data must be a list of dictionaries to save as XML.")
         else:
             raise ValueError(f"Unknown format: {format}")
     
@@ -109,6 +125,8 @@ class DataSaver:
             self._shelf.close()
         elif self.format == 'csv':
             self._file.close()
+        elif self.format == 'xml':
+            self._xml_writer.close()
         self._data_list = []
 
     #def build_report(self, output_format="csv"):
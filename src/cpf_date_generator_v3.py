@@ -1,12 +1,10 @@
 # cpf_date_generator_v2.py
 from __init__ import SRC_DIR, CONFIG_FILENAME, LOG_FILE_PATH, DATE_DICT, DATE_LIST
 from datetime import date, datetime # Ensure date is imported
-from dateutil.relativedelta import relativedelta
-from calendar import monthrange
-from cpf_data_saver_v3 import DataSaver
+import numpy as np
 import os
 import json,csv
-from typing import Any
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
 
 #SRC_DIR = os.path.dirname(os.path.abspath(__file__))  # Path to the src directory
 #CONFIG_FILENAME = os.path.join(SRC_DIR, 'cpf_config.json')  # Full path to the config file
@@ -15,6 +13,8 @@ DATE_KEYS = ['start_date', 'end_date', 'birth_date']
 DATE_FORMAT = "%Y-%m-%d"
 #DATE_DICT = os.path.join(SRC_DIR, 'cpf_date_dict.json')  # Path to the date dictionary file
 #DATE_LIST = os.path.join(SRC_DIR, 'cpf_date_list.csv')  # Path to the date list file
+DAYS_IN_MONTH = (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+ORDINAL_1970 = date(1970, 1, 1).toordinal()
 
 def serialize(obj):
     for key, value in obj.items():
@@ -35,6 +35,126 @@ def custom_serializer(obj):
         return obj.strftime("%Y-%m-%d %H:%M:%S")
     raise TypeError(f"Type {type(obj)} not serializable")
 
+def days_in_month(year: int, month: int) -> int:
+    """Number of days of a month, Gregorian leap years included."""
+    if month == 2 and year % 4 == 0 and (year % 100 != 0 or year % 400 == 0):
+        return 29
+    return DAYS_IN_MONTH[month - 1]
+
+
+def age_on(xdate: date, birth_date: date) -> int:
+    """Completed years between birth_date and xdate, as relativedelta(xdate, birth_date).years."""
+    # a 29 February birthday counts as reached on 28 February in common years, like relativedelta
+    if xdate < birth_date:
+        return -age_on(birth_date, xdate)
+    birthday = min(birth_date.day, days_in_month(xdate.year, birth_date.month))
+    return xdate.year - birth_date.year - ((xdate.month, xdate.day) < (birth_date.month, birthday))
+
+
+def month_calendar(start_date: date, end_date: date, birth_date: date) -> Dict[str, np.ndarray]:
+    """
+    Month-end calendar for the horizon as NumPy arrays, matching DateGenerator.generate_date_dict:
+    one entry per month from the start month to the end month, aged at the end of the month.
+    """
+    first = np.datetime64(f"{start_date.year:04d}-{start_date.month:02d}", "M")
+    last = np.datetime64(f"{end_date.year:04d}-{end_date.month:02d}", "M")
+    months = np.arange(first, last + 1)
+    period_start = months.astype("datetime64[D]")
+    period_end = (months + 1).astype("datetime64[D]") - 1
+    if len(months):
+        period_start[0] = max(period_start[0], np.datetime64(start_date, "D"))
+    month_number = months.astype(np.int64)
+    year = month_number // 12 + 1970
+    month = month_number % 12 + 1
+    # at the end of the birth month the birthday has always been reached
+    age = year - birth_date.year - (month < birth_date.month)
+    before_birth = np.flatnonzero(period_end < np.datetime64(birth_date, "D"))
+    for i in before_birth.tolist():
+        age[i] = age_on(date.fromordinal(int(period_end[i].astype(np.int64)) + ORDINAL_1970), birth_date)
+    return {
+        "year": year,
+        "month": month,
+        "age": age,
+        "start_ordinal": period_start.astype(np.int64) + ORDINAL_1970,
+        "ordinal": period_end.astype(np.int64) + ORDINAL_1970,
+        "date_key": np.datetime_as_string(months, unit="M"),
+    }
+
+
+class MonthCalendar(object):
+    """
+    Array-backed month calendar of a DateGenerator.
+    Holds one NumPy column per field (see month_calendar) instead of a dict per month, and reads
+    like the date_dict: calendar[date_key] returns {'period_start', 'period_end', 'age'}.
+    """
+    def __init__(self, start_date: date, end_date: date, birth_date: date):
+        self.birth_date = birth_date
+        self.columns = month_calendar(start_date, end_date, birth_date)
+        self.date_keys: List[str] = self.columns["date_key"].tolist()
+        self._index = None
+
+    def __len__(self):
+        return len(self.date_keys)
+
+    def __iter__(self):
+        return iter(self.date_keys)
+
+    def __contains__(self, date_key):
+        return self.index(date_key) is not None
+
+    def __getitem__(self, date_key: str) -> Dict[str, Any]:
+        i = self.index(date_key)
+        if i is None:
+            raise KeyError(date_key)
+        return self.entry(i)
+
+    def index(self, date_key: str):
+        """Position of a YYYY-MM key, or None when the month is outside the calendar."""
+        if self._index is None:
+            self._index = {key: i for i, key in enumerate(self.date_keys)}
+        return self._index.get(date_key)
+
+    def entry(self, i: int) -> Dict[str, Any]:
+        return {
+            'period_start': date.fromordinal(int(self.columns["start_ordinal"][i])),
+            'period_end': date.fromordinal(int(self.columns["ordinal"][i])),
+            'age': int(self.columns["age"][i]),
+        }
+
+    def get(self, date_key: str, default=None):
+        return self[date_key] if date_key in self else default
+
+    def keys(self):
+        return list(self.date_keys)
+
+    def values(self):
+        return [self.entry(i) for i in range(len(self))]
+
+    def items(self):
+        return [(key, self.entry(i)) for i, key in enumerate(self.date_keys)]
+
+    def rows(self) -> Iterator[Tuple[str, date, date, int]]:
+        """(date_key, period_start, period_end, age) per month, converting one month at a time."""
+        fromordinal = date.fromordinal
+        for date_key, start, end, age in zip(self.date_keys, self.columns["start_ordinal"].tolist(),
+                                             self.columns["ordinal"].tolist(), self.columns["age"].tolist()):
+            yield date_key, fromordinal(start), fromordinal(end), age
+
+    def ages_for(self, birth_dates: Sequence[date]) -> np.ndarray:
+        """Ages at every month end for many members at once, shape (members, months), from birth on."""
+        birth_year = np.array([b.year for b in birth_dates], dtype=np.int64)[:, None]
+        birth_month = np.array([b.month for b in birth_dates], dtype=np.int64)[:, None]
+        return self.columns["year"][None, :] - birth_year - (self.columns["month"][None, :] < birth_month)
+
+    def csv_lines(self) -> List[str]:
+        """The lines of cpf_date_list.csv: date_key,period_start,period_end,age."""
+        cols = self.columns
+        starts = np.datetime_as_string((cols["start_ordinal"] - ORDINAL_1970).astype("datetime64[D]"))
+        ends = np.datetime_as_string((cols["ordinal"] - ORDINAL_1970).astype("datetime64[D]"))
+        return [f"{key},{start},{end},{age}\n"
+                for key, start, end, age in zip(self.date_keys, starts.tolist(), ends.tolist(), cols["age"].tolist())]
+
+
 class DateGenerator(object):
     """
     Class to generate a dictionary of dates with start/end of month and age.
@@ -113,43 +233,42 @@ class DateGenerator(object):
        #else:
        #    raise TypeError("start_date, end_date, and birth_date must be date or datetime objects")                                    
     
-        self.date_dict = {}
-        # Start from the first day of the start month
-        current_date =date(self.start_date.year, self.start_date.month, 1)
-    
-        while current_date <= self.end_date:
-            date_list = []
-            year = current_date.year
-            month = current_date.month
-    
-            # Calculate period start and end as date objects
+        self.date_dict = dict(self.iter_months())
+        self.data = self.date_dict
+        return self.date_dict
+
+    def generate_calendar(self) -> MonthCalendar:
+        """
+        Build the calendar as NumPy columns in one pass (see MonthCalendar).
+        The result replaces date_dict, so get_data and save_file work on it unchanged.
+        """
+        self.date_dict = MonthCalendar(self.start_date, self.end_date, self.birth_date)
+        self.data = self.date_dict
+        return self.date_dict
+
+    def iter_months(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Lazily yield (date_key, {'period_start', 'period_end', 'age'}) month by month,
+        using integer month arithmetic only.
+        """
+        year, month = self.start_date.year, self.start_date.month
+        end = (self.end_date.year, self.end_date.month)
+        birth_year, birth_month = self.birth_date.year, self.birth_date.month
+        while (year, month) <= end:
             period_start = date(year, month, 1) # First day of month
-            last_day_of_month = monthrange(year, month)[1]
-            period_end = date(year, month, last_day_of_month) # Last day of month
-    
-            # Comparison is now between two date objects
-            if self.start_date > period_end:
-                # If the simulation start date is after the end of the current month, skip
-                current_date = current_date + relativedelta(months=1)
-                continue
-            
-            # Calculate age at the end of the period
-            age_at_period_end = relativedelta(period_end, self.birth_date).years
-    
-            date_key = period_end.strftime('%Y-%m')
-            self.date_dict[date_key] = {
+            period_end = date(year, month, days_in_month(year, month)) # Last day of month
+            # at the end of the birth month the birthday has always been reached
+            age_at_period_end = year - birth_year - (month < birth_month)
+            if period_end < self.birth_date:
+                age_at_period_end = age_on(period_end, self.birth_date)
+            yield f"{year:04d}-{month:02d}", {
                 # Ensure period_start isn't before the actual simulation start_date
                 'period_start': max(period_start, self.start_date),
                 'period_end': period_end,
                 'age': age_at_period_end
             }
-            date_list.append(self.date_dict)  # Append the current date_dict to the list
-            # Move to the first day of the next month (date + relativedelta -> date)
-            current_date = current_date + relativedelta(months=1)
-        #    print(f'Procfessing Date Dictionary key = {date_key}, {age_at_period_end}')  # Debugging line to print each entry
-           # self.save_file('date_dict', format='pickle')  # Save the date_dict to file after each entry
-            self.data = self.date_dict
-        return self.date_dict
+            # Move to the next month
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
     
 #    def convert_dates_to_datetime(self, date_str):
 #        """
@@ -162,18 +281,22 @@ class DateGenerator(object):
 #            except ValueError:
 #                raise ValueError(f"Invalid date format: {date_str}. Expected format: YYYY-MM-DD")
        
-    def save_file(self, file , format='csv'):
+    def save_file(self, file , format='csv', filename: str = None):
         """
         Save the date_dict to a file in the specified format.
+        filename defaults to DATE_LIST (csv) or DATE_DICT (json).
         """
        
         if format == 'csv':
-            with open(DATE_LIST, 'w') as f:
+            with open(filename or DATE_LIST, 'w') as f:
+                if isinstance(self.date_dict, MonthCalendar):
+                    f.writelines(self.date_dict.csv_lines())
+                    return
                 for key, value in self.date_dict.items():
                     f.write(f"{key},{value['period_start']},{value['period_end']},{value['age']}\n")
         elif format == 'json':
             serialized = serialize(file)
-            with open(DATE_DICT, 'w') as f:
+            with open(filename or DATE_DICT, 'w') as f:
                 json.dump(serialized, f, default=custom_serializer)
         else:
             raise ValueError("Unsupported format. Use 'csv' or 'json'.")
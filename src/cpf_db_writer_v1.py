@@ -0,0 +1,420 @@
+# cpf_db_writer_v1.py
+from __init__ import SRC_DIR, DATABASE_NAME
+import sqlite3
+import time
+from datetime import datetime
+from itertools import repeat
+from typing import Any, List, Sequence, Tuple
+
+DEFAULT_BATCH_SIZE = 500  # rows kept in memory before an executemany flush
+JOURNAL_MODES = ['DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF']
+SYNCHRONOUS_MODES = ['OFF', 'NORMAL', 'FULL', 'EXTRA']
+
+CPF_DATA_COLUMNS = [
+    "run_id",
+    "date_key",
+    "dbreference",
+    "age",
+    "oa_balance",
+    "sa_balance",
+    "ma_balance",
+    "ra_balance",
+    "loan_balance",
+    "excess_balance",
+    "cpf_payout",
+    "message",
+]
+
+CREATE_CPF_DATA_SQL = """
+    CREATE TABLE IF NOT EXISTS cpf_data (
+        run_id TEXT NOT NULL DEFAULT 'default',
+        date_key TEXT NOT NULL,
+        dbreference INTEGER,
+        age INTEGER,
+        oa_balance REAL,
+        sa_balance REAL,
+        ma_balance REAL,
+        ra_balance REAL,
+        loan_balance REAL,
+        excess_balance REAL,
+        cpf_payout REAL,
+        message TEXT,
+        PRIMARY KEY (run_id, date_key)
+    );
+"""
+
+INSERT_CPF_DATA_SQL = f"""
+    INSERT OR REPLACE INTO cpf_data ({', '.join(CPF_DATA_COLUMNS)})
+    VALUES ({', '.join('?' for _ in CPF_DATA_COLUMNS)});
+"""
+
+# Runs that record checkpoints, with their compiled config and transaction log (see cpf_checkpoint_v1)
+CREATE_CPF_RUNS_SQL = """
+    CREATE TABLE IF NOT EXISTS cpf_runs (
+        run_id TEXT PRIMARY KEY,
+        config BLOB NOT NULL,
+        log_file TEXT,
+        log_format TEXT,
+        log_size INTEGER,
+        log_mtime_ns INTEGER,
+        log_sha256 TEXT
+    );
+"""
+# columns added to cpf_runs after it was first created: the signature of the closed transaction log
+CPF_RUNS_LOG_COLUMNS = [("log_size", "INTEGER"), ("log_mtime_ns", "INTEGER"), ("log_sha256", "TEXT")]
+
+CPF_CHECKPOINT_COLUMNS = ["run_id", "position", "date_key", "age", "kind", "state"]
+
+CREATE_CPF_CHECKPOINTS_SQL = """
+    CREATE TABLE IF NOT EXISTS cpf_checkpoints (
+        run_id TEXT NOT NULL,
+        position INTEGER NOT NULL,
+        date_key TEXT NOT NULL,
+        age INTEGER NOT NULL,
+        kind TEXT NOT NULL,
+        state TEXT NOT NULL,
+        PRIMARY KEY (run_id, position)
+    );
+"""
+
+INSERT_CPF_CHECKPOINT_SQL = f"""
+    INSERT OR REPLACE INTO cpf_checkpoints ({', '.join(CPF_CHECKPOINT_COLUMNS)})
+    VALUES ({', '.join('?' for _ in CPF_CHECKPOINT_COLUMNS)});
+"""
+
+# Per-run timings (a step of the monthly loop: calls, seconds) and counters (value), see cpf_metrics_v1
+RUN_METRICS_COLUMNS = ["run_id", "metric", "kind", "calls", "seconds", "value"]
+
+CREATE_RUN_METRICS_SQL = """
+    CREATE TABLE IF NOT EXISTS run_metrics (
+        run_id TEXT NOT NULL,
+        metric TEXT NOT NULL,
+        kind TEXT NOT NULL,
+        calls INTEGER,
+        seconds REAL,
+        value REAL,
+        PRIMARY KEY (run_id, metric)
+    );
+"""
+
+INSERT_RUN_METRICS_SQL = f"""
+    INSERT OR REPLACE INTO run_metrics ({', '.join(RUN_METRICS_COLUMNS)})
+    VALUES ({', '.join('?' for _ in RUN_METRICS_COLUMNS)});
+"""
+
+
+def new_run_id() -> str:
+    """Generate a run id that sorts by the time the run was started."""
+    return datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+
+
+def create_cpf_data_table(conn: sqlite3.Connection) -> None:
+    """
+    Create the cpf_data table, migrating a table from before run_id existed.
+    Rows of the old single-run table are kept under the run_id 'legacy'.
+    """
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(cpf_data)")]
+    with conn:
+        if columns and "run_id" not in columns:
+            conn.execute("ALTER TABLE cpf_data RENAME TO cpf_data_legacy")
+            conn.execute(CREATE_CPF_DATA_SQL)
+            old_columns = ', '.join(CPF_DATA_COLUMNS[1:])
+            conn.execute(
+                f"INSERT INTO cpf_data (run_id, {old_columns}) "
+                f"SELECT 'legacy', {old_columns} FROM cpf_data_legacy"
+            )
+            conn.execute("DROP TABLE cpf_data_legacy")
+        else:
+            conn.execute(CREATE_CPF_DATA_SQL)
+
+
+def create_checkpoint_tables(conn: sqlite3.Connection) -> None:
+    """Create the cpf_runs and cpf_checkpoints tables used to resume runs, adding newer cpf_runs columns."""
+    with conn:
+        conn.execute(CREATE_CPF_RUNS_SQL)
+        conn.execute(CREATE_CPF_CHECKPOINTS_SQL)
+        existing = {row[1] for row in conn.execute("PRAGMA table_info(cpf_runs)")}
+        for name, kind in CPF_RUNS_LOG_COLUMNS:
+            if name not in existing:
+                conn.execute(f"ALTER TABLE cpf_runs ADD COLUMN {name} {kind}")
+
+
+# Batch runs of many members (see cpf_batch_v1): the monthly balances of every member as in cpf_data
+# but without the per-row message, clustered by month as they are written, and one summary row per member
+MEMBER_DATA_COLUMNS = ["run_id", "date_key", "member_id", "age", "oa_balance", "sa_balance", "ma_balance",
+                       "ra_balance", "loan_balance", "excess_balance", "cpf_payout"]
+
+CREATE_MEMBER_DATA_SQL = """
+    CREATE TABLE IF NOT EXISTS cpf_member_data (
+        run_id TEXT NOT NULL,
+        date_key TEXT NOT NULL,
+        member_id TEXT NOT NULL,
+        age INTEGER,
+        oa_balance REAL,
+        sa_balance REAL,
+        ma_balance REAL,
+        ra_balance REAL,
+        loan_balance REAL,
+        excess_balance REAL,
+        cpf_payout REAL,
+        PRIMARY KEY (run_id, date_key, member_id)
+    ) WITHOUT ROWID;
+"""
+
+INSERT_MEMBER_DATA_SQL = f"""
+    INSERT OR REPLACE INTO cpf_member_data ({', '.join(MEMBER_DATA_COLUMNS)})
+    VALUES ({', '.join('?' for _ in MEMBER_DATA_COLUMNS)});
+"""
+
+MEMBER_COLUMNS = ["run_id", "member_id", "birthdate", "months", "ra_exhausted_age", "final_oa", "final_sa",
+                  "final_ma", "final_ra", "final_loan", "final_excess", "total_payout"]
+
+CREATE_MEMBERS_SQL = """
+    CREATE TABLE IF NOT EXISTS cpf_members (
+        run_id TEXT NOT NULL,
+        member_id TEXT NOT NULL,
+        birthdate TEXT,
+        months INTEGER,
+        ra_exhausted_age INTEGER,
+        final_oa REAL,
+        final_sa REAL,
+        final_ma REAL,
+        final_ra REAL,
+        final_loan REAL,
+        final_excess REAL,
+        total_payout REAL,
+        PRIMARY KEY (run_id, member_id)
+    );
+"""
+
+INSERT_MEMBERS_SQL = f"""
+    INSERT OR REPLACE INTO cpf_members ({', '.join(MEMBER_COLUMNS)})
+    VALUES ({', '.join('?' for _ in MEMBER_COLUMNS)});
+"""
+
+
+def create_run_metrics_table(conn: sqlite3.Connection) -> None:
+    """Create the run_metrics table written by cpf_metrics_v1."""
+    with conn:
+        conn.execute(CREATE_RUN_METRICS_SQL)
+
+
+class CPFDataWriter:
+    """
+    Buffered, transactional sink for the per-month cpf_data rows.
+    Rows are kept in memory and written with executemany inside one transaction,
+    every `batch_size` rows and once more when the writer is flushed or closed.
+    Every row carries the writer's run_id, so many runs can share one database.
+    Checkpoints (add_checkpoint) are buffered the same way and committed in the same
+    transaction as the rows they follow, so a stored checkpoint always has its rows.
+    """
+    def __init__(self, database: str = DATABASE_NAME, run_id: str = None,
+                 batch_size: int = DEFAULT_BATCH_SIZE, journal_mode: str = 'WAL',
+                 synchronous: str = 'NORMAL'):
+        if batch_size is None or batch_size < 1:
+            raise ValueError(f"batch_size must be a positive integer, got {batch_size}")
+        if journal_mode is not None and journal_mode.upper() not in JOURNAL_MODES:
+            raise ValueError(f"Unsupported journal_mode: {journal_mode}. Use one of {JOURNAL_MODES}")
+        if synchronous is not None and synchronous.upper() not in SYNCHRONOUS_MODES:
+            raise ValueError(f"Unsupported synchronous mode: {synchronous}. Use one of {SYNCHRONOUS_MODES}")
+
+        self.database = database
+        self.run_id = run_id or new_run_id()
+        self.batch_size = batch_size
+        self.rows_written = 0
+        self.commits = 0
+        self.flush_seconds = 0.0
+        self._rows: List[Tuple[Any, ...]] = []
+        self._checkpoints: List[Tuple[Any, ...]] = []
+
+        self.conn = sqlite3.connect(database)
+        if journal_mode is not None:
+            self.conn.execute(f"PRAGMA journal_mode={journal_mode.upper()}")
+        if synchronous is not None:
+            self.conn.execute(f"PRAGMA synchronous={synchronous.upper()}")
+        create_cpf_data_table(self.conn)
+
+    def add_row(self, date_key, dbreference, age, oa_balance, sa_balance, ma_balance,
+                ra_balance, loan_balance, excess_balance, payout, message) -> None:
+        """Buffer one month of balances; flushes when the batch is full."""
+        self._rows.append((
+            self.run_id,
+            str(date_key),
+            int(dbreference),
+            int(age),
+            float(oa_balance),
+            float(sa_balance),
+            float(ma_balance),
+            float(ra_balance),
+            float(loan_balance),
+            float(excess_balance),
+            float(payout),
+            str(message),
+        ))
+        if len(self._rows) >= self.batch_size:
+            self.flush()
+
+    def start_run(self, config: bytes, log_file: str, log_format: str) -> None:
+        """
+        Register this run for checkpointing: its pickled compiled config and transaction log. The
+        log's signature is recorded once it is closed (cpf_checkpoint_v1.RunLogSeal).
+        """
+        create_checkpoint_tables(self.conn)
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO cpf_runs (run_id, config, log_file, log_format) VALUES (?, ?, ?, ?)",
+                              (self.run_id, config, log_file, log_format))
+
+    def add_checkpoint(self, position: int, date_key: str, age: int, kind: str, state: str) -> None:
+        """Buffer the state (JSON) after calendar month `position`; written with the next flush."""
+        self._checkpoints.append((self.run_id, int(position), str(date_key), int(age), kind, state))
+
+    def copy_run(self, source_run_id: str, position: int, dbreference: int) -> None:
+        """
+        Start this run with the cpf_data rows up to `dbreference` and the checkpoints up to
+        `position` of `source_run_id`. Resuming a run under its own run_id drops its later rows.
+        """
+        self.flush()
+        with self.conn:
+            if source_run_id == self.run_id:
+                self.conn.execute("DELETE FROM cpf_data WHERE run_id = ? AND dbreference > ?", (self.run_id, dbreference))
+                self.conn.execute("DELETE FROM cpf_checkpoints WHERE run_id = ? AND position > ?", (self.run_id, position))
+                return
+            columns = ', '.join(CPF_DATA_COLUMNS[1:])
+            self.conn.execute(f"INSERT OR REPLACE INTO cpf_data (run_id, {columns}) "
+                              f"SELECT ?, {columns} FROM cpf_data WHERE run_id = ? AND dbreference <= ?",
+                              (self.run_id, source_run_id, dbreference))
+            columns = ', '.join(CPF_CHECKPOINT_COLUMNS[1:])
+            self.conn.execute(f"INSERT OR REPLACE INTO cpf_checkpoints (run_id, {columns}) "
+                              f"SELECT ?, {columns} FROM cpf_checkpoints WHERE run_id = ? AND position <= ?",
+                              (self.run_id, source_run_id, position))
+
+    def flush(self) -> None:
+        """Write all buffered rows (and checkpoints) in a single transaction."""
+        if not self._rows and not self._checkpoints:
+            return
+        start = time.perf_counter()
+        try:
+            with self.conn:
+                if self._rows:
+                    self.conn.executemany(INSERT_CPF_DATA_SQL, self._rows)
+                if self._checkpoints:
+                    self.conn.executemany(INSERT_CPF_CHECKPOINT_SQL, self._checkpoints)
+        except sqlite3.Error as e:
+            print(f"Database insertion error: {e}")
+            raise
+        self.rows_written += len(self._rows)
+        self.commits += 1
+        self.flush_seconds += time.perf_counter() - start
+        self._rows = []
+        self._checkpoints = []
+
+    def close(self) -> None:
+        """Flush the remaining rows and close the connection."""
+        if self.conn is None:
+            return
+        try:
+            self.flush()
+        finally:
+            self.conn.close()
+            self.conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+
+class MemberDataWriter:
+    """
+    Sink for the rows of a batch run (see cpf_batch_v1), keyed by run_id and member_id.
+    A month of all active members arrives as one block of columns and is written with one
+    executemany; the blocks are committed together every `batch_size` rows.
+    """
+    def __init__(self, database: str = DATABASE_NAME, run_id: str = None, batch_size: int = 100_000,
+                 journal_mode: str = 'WAL', synchronous: str = 'NORMAL'):
+        if batch_size is None or batch_size < 1:
+            raise ValueError(f"batch_size must be a positive integer, got {batch_size}")
+        if journal_mode is not None and journal_mode.upper() not in JOURNAL_MODES:
+            raise ValueError(f"Unsupported journal_mode: {journal_mode}. Use one of {JOURNAL_MODES}")
+        if synchronous is not None and synchronous.upper() not in SYNCHRONOUS_MODES:
+            raise ValueError(f"Unsupported synchronous mode: {synchronous}. Use one of {SYNCHRONOUS_MODES}")
+        self.database = database
+        self.run_id = run_id or new_run_id()
+        self.batch_size = batch_size
+        self.rows_written = 0
+        self.commits = 0
+        self.flush_seconds = 0.0
+        self._pending = 0
+
+        self.conn = sqlite3.connect(database)
+        if journal_mode is not None:
+            self.conn.execute(f"PRAGMA journal_mode={journal_mode.upper()}")
+        if synchronous is not None:
+            self.conn.execute(f"PRAGMA synchronous={synchronous.upper()}")
+        with self.conn:
+            self.conn.execute(CREATE_MEMBER_DATA_SQL)
+            self.conn.execute(CREATE_MEMBERS_SQL)
+
+    def add_month(self, date_key: str, member_ids: Sequence[str], ages: Sequence[int],
+                  balances: Sequence[Sequence[float]], payouts: Sequence[float]) -> None:
+        """
+        One month of `member_ids`: their ages, the six balance columns in cpf_data order
+        (oa, sa, ma, ra, loan, excess) and the payouts, as equal-length sequences.
+        """
+        start = time.perf_counter()
+        try:
+            self.conn.executemany(INSERT_MEMBER_DATA_SQL,
+                                  zip(repeat(self.run_id), repeat(str(date_key)), member_ids, ages, *balances, payouts))
+        except sqlite3.Error as e:
+            print(f"Database insertion error: {e}")
+            raise
+        self._pending += len(member_ids)
+        self.flush_seconds += time.perf_counter() - start
+        if self._pending >= self.batch_size:
+            self.flush()
+
+    def add_members(self, rows: Sequence[Tuple[Any, ...]]) -> None:
+        """Summary rows in MEMBER_COLUMNS order without the run_id."""
+        self.conn.executemany(INSERT_MEMBERS_SQL, ((self.run_id, *row) for row in rows))
+        self._pending += len(rows)
+        self.flush()
+
+    def flush(self) -> None:
+        """Commit the rows written since the last commit."""
+        if not self._pending:
+            return
+        start = time.perf_counter()
+        self.conn.commit()
+        self.rows_written += self._pending
+        self.commits += 1
+        self._pending = 0
+        self.flush_seconds += time.perf_counter() - start
+
+    def close(self) -> None:
+        if self.conn is None:
+            return
+        try:
+            self.flush()
+        finally:
+            self.conn.close()
+            self.conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+
+if __name__ == "__main__":
+    # Example usage: buffer two months for a throwaway run in memory and read them back
+    writer = CPFDataWriter(database=":memory:", run_id="example", batch_size=1000, journal_mode=None)
+    writer.add_row("2025-05", 100000001, 50, 1.0, 2.0, 3.0, 0.0, 4.0, 0.0, 0.0, "example row")
+    writer.add_row("2025-06", 100000002, 50, 1.5, 2.5, 3.5, 0.0, 3.5, 0.0, 0.0, "example row")
+    writer.flush()
+    print(writer.conn.execute("SELECT * FROM cpf_data WHERE run_id = 'example'").fetchall())
+    print(f"rows written: {writer.rows_written}, commits: {writer.commits} in {writer.flush_seconds * 1000:.2f} ms")
+    writer.close()
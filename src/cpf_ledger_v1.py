@@ -0,0 +1,379 @@
+# cpf_ledger_v1.py
+from __init__ import SRC_DIR, LOG_FILE_PATH
+from array import array
+from datetime import date
+import csv
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+DEFAULT_BLOCK_SIZE = 4096  # transactions buffered before a block is handed to the sink
+
+LOG_FIELDNAMES = [
+    "date",
+    "transaction_reference",
+    "age",
+    "account",
+    "old_balance",
+    "new_balance",
+    "amount",
+    "type",
+    "message",
+]
+
+# Account and type codes stored in the column buffers; the index is the code.
+ACCOUNTS = ["oa", "sa", "ma", "ra", "excess", "loan", "combined", "combined_below_55", "combined_above_55"]
+ACCOUNT_CODES = {account: code for code, account in enumerate(ACCOUNTS)}
+OA, SA, MA, RA, EXCESS, LOAN = range(6)  # codes of the member accounts, the indexes of CPFAccount.balances
+BALANCE_ACCOUNTS = ACCOUNTS[:6]
+TRANSACTION_TYPES = ["no change", "inflow", "outflow"]
+NO_CHANGE, INFLOW, OUTFLOW = 0, 1, 2
+
+# (column name, array typecode) for every column buffer of a block
+LEDGER_COLUMNS = [
+    ("date", "i"),          # date.toordinal()
+    ("reference", "q"),
+    ("age", "h"),
+    ("account", "b"),       # index into ACCOUNTS
+    ("old_balance", "d"),
+    ("new_balance", "d"),
+    ("amount", "d"),
+    ("type", "b"),          # index into TRANSACTION_TYPES
+    ("message", "i"),       # id of the interned message text
+]
+
+
+def transaction_type(amount: float) -> int:
+    """Type code of a balance change, following the sign of the amount."""
+    return INFLOW if amount > 0 else (OUTFLOW if amount < 0 else NO_CHANGE)
+
+
+def _to_column(code: str, values: Any) -> array:
+    """Convert a sequence or a same-typed buffer (such as a NumPy array) to a column array."""
+    if isinstance(values, array) and values.typecode == code:
+        return values
+    column = array(code)
+    try:
+        view = memoryview(values)
+    except TypeError:
+        return array(code, values)
+    kind = view.format.lstrip("@=<")
+    if view.itemsize != column.itemsize or (kind in "bhilq") != (code in "bhilq") or kind not in "bhilqd":
+        return array(code, view.tolist())
+    column.frombytes(view.cast("B") if view.c_contiguous else view.tobytes())
+    return column
+
+
+class Transaction:
+    """
+    One transaction in readable form, as a row of cpf_log_file.csv without its derived `type`
+    and message text. The ledger itself stores transactions as column codes (see append);
+    this record is for code that builds or inspects single transactions.
+    """
+    __slots__ = ("date", "reference", "age", "account", "old_balance", "new_balance", "amount", "message")
+
+    def __init__(self, xdate: date, reference: int, age: int, account: str, old_balance: float,
+                 new_balance: float, amount: float, message: str):
+        self.date = xdate
+        self.reference = reference
+        self.age = age
+        self.account = account
+        self.old_balance = old_balance
+        self.new_balance = new_balance
+        self.amount = amount
+        self.message = message
+
+    @classmethod
+    def from_dict(cls, entry: Dict[str, Any]) -> "Transaction":
+        """A Transaction from a cpf_log_file.csv row given as a dict (dates as YYYY-MM-DD)."""
+        account, message, amount = entry["account"], entry["message"], float(entry["amount"])
+        prefix, suffix = f"{account}-", f"-{amount:.2f}"
+        if message.startswith(prefix) and message.endswith(suffix):
+            message = message[len(prefix):-len(suffix)]
+        xdate = entry["date"]
+        if isinstance(xdate, str):
+            xdate = date.fromisoformat(xdate)
+        return cls(xdate, int(entry["transaction_reference"]), int(entry["age"]), account,
+                   float(entry["old_balance"]), float(entry["new_balance"]), amount, message)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The transaction as a cpf_log_file.csv row (LOG_FIELDNAMES), amounts rounded as logged."""
+        amount = round(self.amount, 2)
+        return {
+            "date": self.date.isoformat(),
+            "transaction_reference": self.reference,
+            "age": self.age,
+            "account": self.account,
+            "old_balance": round(self.old_balance, 2),
+            "new_balance": round(self.new_balance, 2),
+            "amount": amount,
+            "type": TRANSACTION_TYPES[transaction_type(amount)],
+            "message": f"{self.account}-{self.message}-{amount:.2f}",
+        }
+
+    def __eq__(self, other):
+        if not isinstance(other, Transaction):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self):
+        return (f"Transaction({self.date}, {self.reference}, age={self.age}, {self.account}, "
+                f"{self.old_balance:.2f} -> {self.new_balance:.2f}, {self.message!r})")
+
+
+class LedgerBlock:
+    """
+    A finished block of transactions as handed to a sink.
+    `columns` holds one array per LEDGER_COLUMNS entry; `new_messages` are the message texts
+    interned since the previous block, so a sink in another thread or process can keep its
+    own copy of the message table.
+    """
+    __slots__ = ("columns", "size", "new_messages")
+
+    def __init__(self, columns: Dict[str, array], size: int, new_messages: List[str]):
+        self.columns = columns
+        self.size = size
+        self.new_messages = new_messages
+
+    def __getstate__(self):
+        return self.columns, self.size, self.new_messages
+
+    def __setstate__(self, state):
+        self.columns, self.size, self.new_messages = state
+
+    def transactions(self, messages: List[str]):
+        """The block's transactions as Transaction records; `messages` is the full message table."""
+        cols = self.columns
+        for ordinal, reference, age, account, old_balance, new_balance, amount, message_id in zip(
+                cols["date"], cols["reference"], cols["age"], cols["account"], cols["old_balance"],
+                cols["new_balance"], cols["amount"], cols["message"]):
+            yield Transaction(date.fromordinal(ordinal), reference, age, ACCOUNTS[account],
+                              old_balance, new_balance, amount, messages[message_id])
+
+
+class CSVLogSink:
+    """
+    Writes ledger blocks as the cpf_log_file.csv text format.
+    The file is opened lazily, so the sink can be created in one process and written in another.
+    """
+    def __init__(self, filename: str = LOG_FILE_PATH):
+        self.filename = filename
+        self.messages: List[str] = []
+        self._file = None
+        self._writer = None
+        self._dates: Dict[int, str] = {}
+
+    def open(self):
+        if self._file is None:
+            self._file = open(self.filename, "w", newline="")
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(LOG_FIELDNAMES)
+
+    def _date_str(self, ordinal: int) -> str:
+        text = self._dates.get(ordinal)
+        if text is None:
+            text = self._dates[ordinal] = date.fromordinal(ordinal).isoformat()
+        return text
+
+    def write_block(self, block: LedgerBlock):
+        self.open()
+        self.messages.extend(block.new_messages)
+        cols = block.columns
+        messages = self.messages
+        date_str = self._date_str
+        self._writer.writerows(
+            (
+                date_str(ordinal),
+                reference,
+                age,
+                ACCOUNTS[account],
+                old_balance,
+                new_balance,
+                amount,
+                TRANSACTION_TYPES[type_code],
+                f"{ACCOUNTS[account]}-{messages[message_id]}-{amount:.2f}",
+            )
+            for ordinal, reference, age, account, old_balance, new_balance, amount, type_code, message_id in zip(
+                cols["date"], cols["reference"], cols["age"], cols["account"], cols["old_balance"],
+                cols["new_balance"], cols["amount"], cols["type"], cols["message"],
+            )
+        )
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._writer = None
+
+
+def _ledger_sink_worker(block_queue, sink):
+    """Thread or process target: write whole blocks to the sink until None arrives."""
+    sink.open()
+    try:
+        while True:
+            block = block_queue.get()
+            if block is None:
+                break
+            sink.write_block(block)
+    finally:
+        sink.close()
+
+
+class TransactionLedger:
+    """
+    In-process transaction ledger.
+    Transactions are appended to preallocated column buffers (see LEDGER_COLUMNS) and handed to
+    the sink one block at a time, either inline or through a background thread or process that
+    receives whole blocks instead of single rows. With sink=None transactions are only counted.
+    `write_seconds` is the time spent handing blocks to the sink (with a background writer: waiting
+    for room in the queue, and for the writer to finish on close).
+    """
+    def __init__(self, sink: Any = None, block_size: int = DEFAULT_BLOCK_SIZE, background: Optional[str] = None):
+        if block_size is None or block_size < 1:
+            raise ValueError(f"block_size must be a positive integer, got {block_size}")
+        if background not in (None, "thread", "process"):
+            raise ValueError("Unsupported background mode. Use None, 'thread' or 'process'.")
+        self.sink = sink
+        self.block_size = block_size
+        self.background = background
+        self.transactions = 0
+        self.blocks = 0
+        self.queue_puts = 0
+        self.write_seconds = 0.0
+        self._size = 0
+        self._columns = {name: array(code, bytes(array(code).itemsize * block_size))
+                         for name, code in LEDGER_COLUMNS}
+        self._message_ids: Dict[str, int] = {}
+        self._new_messages: List[str] = []
+        self._queue = None
+        self._worker = None
+        self._closed = False
+
+        if sink is not None and background == "thread":
+            self._queue = queue.Queue(maxsize=8)
+            self._worker = threading.Thread(target=_ledger_sink_worker, args=(self._queue, sink), daemon=True)
+            self._worker.start()
+        elif sink is not None and background == "process":
+            from multiprocessing import Process, Queue
+            self._queue = Queue(maxsize=8)
+            self._worker = Process(target=_ledger_sink_worker, args=(self._queue, sink), daemon=True)
+            self._worker.start()
+
+    def intern_message(self, message: str) -> int:
+        """Return the id of a message text, adding it to the message table if it is new."""
+        message_id = self._message_ids.get(message)
+        if message_id is None:
+            message_id = self._message_ids[message] = len(self._message_ids)
+            self._new_messages.append(message)
+        return message_id
+
+    def append(self, date_ordinal: int, reference: int, age: int, account: int, old_balance: float,
+               new_balance: float, amount: float, type_code: int, message_id: int) -> None:
+        """Append one transaction given as column codes; see `log` for the readable form."""
+        i = self._size
+        cols = self._columns
+        cols["date"][i] = date_ordinal
+        cols["reference"][i] = reference
+        cols["age"][i] = age
+        cols["account"][i] = account
+        cols["old_balance"][i] = old_balance
+        cols["new_balance"][i] = new_balance
+        cols["amount"][i] = amount
+        cols["type"][i] = type_code
+        cols["message"][i] = message_id
+        self._size = i + 1
+        self.transactions += 1
+        if self._size == self.block_size:
+            self.flush()
+
+    def log(self, xdate: date, reference: int, age: int, account: str, old_balance: float,
+            new_balance: float, amount: float, message: str) -> None:
+        """Append one transaction; amounts are logged rounded to 2 decimals as in cpf_log_file.csv."""
+        self.append(
+            xdate.toordinal(),
+            reference,
+            age,
+            ACCOUNT_CODES[account],
+            round(old_balance, 2),
+            round(new_balance, 2),
+            round(amount, 2),
+            transaction_type(amount),
+            self.intern_message(message),
+        )
+
+    def log_transaction(self, transaction: Transaction) -> None:
+        """Append one Transaction record."""
+        self.log(transaction.date, transaction.reference, transaction.age, transaction.account,
+                 transaction.old_balance, transaction.new_balance, transaction.amount, transaction.message)
+
+    def append_block(self, columns: Dict[str, Any]) -> None:
+        """
+        Append many transactions at once, e.g. produced by the vectorized engine.
+        `columns` maps every LEDGER_COLUMNS name to an equal-length sequence or buffer of that
+        column's type; message ids must come from `intern_message` of this ledger.
+        """
+        self.flush()
+        converted = {name: _to_column(code, columns[name]) for name, code in LEDGER_COLUMNS}
+        size = len(converted["reference"])
+        for start in range(0, size, self.block_size):
+            stop = min(start + self.block_size, size)
+            self._size = stop - start
+            for name, col in converted.items():
+                self._columns[name][:self._size] = col[start:stop]
+            self.transactions += self._size
+            self.flush()
+
+    def flush(self) -> None:
+        """Hand the buffered transactions to the sink as one block."""
+        if self._size == 0:
+            return
+        size = self._size
+        block = LedgerBlock({name: col[:size] for name, col in self._columns.items()}, size, self._new_messages)
+        self._new_messages = []
+        self._size = 0
+        self.blocks += 1
+        if self.sink is None:
+            return
+        start = time.perf_counter()
+        if self._queue is not None:
+            self._queue.put(block)
+            self.queue_puts += 1
+        else:
+            self.sink.write_block(block)
+        self.write_seconds += time.perf_counter() - start
+
+    def close(self) -> None:
+        """Flush the last block and stop the background writer, if any."""
+        if self._closed:
+            return
+        self._closed = True
+        self.flush()
+        start = time.perf_counter()
+        if self._worker is not None:
+            self._queue.put(None)
+            self._worker.join(timeout=30)
+        elif self.sink is not None:
+            self.sink.close()
+        self.write_seconds += time.perf_counter() - start
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+
+if __name__ == "__main__":
+    # Example usage: write a few transactions through a background thread
+    import os
+    import tempfile
+    filename = os.path.join(tempfile.gettempdir(), "cpf_ledger_example.csv")
+    with TransactionLedger(CSVLogSink(filename), block_size=2, background="thread") as ledger:
+        today = date.today()
+        ledger.log(today, 100000001, 50, "oa", 0.0, 1000.0, 1000.0, "Initial Balance of oa")
+        ledger.log(today, 100000002, 50, "sa", 0.0, 2000.0, 2000.0, "Initial Balance of sa")
+        ledger.log(today, 100000003, 50, "sa", 2000.0, 1700.0, -300.0, "Medical expenses")
+    with open(filename) as f:
+        print(f.read())
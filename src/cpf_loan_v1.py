@@ -0,0 +1,168 @@
+# cpf_loan_v1.py
+from __init__ import SRC_DIR, CONFIG_FILENAME
+from typing import Any, Dict, Sequence, Tuple
+import numpy as np
+
+LOAN_KINDS = ['phased', 'amortized']
+SCHEDULE_FIELDS = ['payment', 'interest', 'principal', 'balance']
+MAX_CACHED_SCHEDULES = 256
+
+
+def cents(amount: float) -> int:
+    """Convert an amount to integer cents."""
+    return int(round(amount * 100))
+
+
+def phased_payment(month: int, balance, y12, y3, y4):
+    """
+    Step 13 payment of the phased (loanpayments...) loan in month `month` of the run (0 for the
+    first month): year12 for the first two months, year3 for the third and min(year4beyond,
+    balance) after that, while the balance is positive. Works on cents, as scalars or as arrays
+    (one loan per member in cpf_batch_v1).
+    """
+    if month < 2:
+        return np.where(balance > 0, y12, 0)
+    if month == 2:
+        return np.where(balance > 0, y3, 0)
+    return np.where(balance > 0, np.minimum(y4, balance), 0)
+
+
+def annuity_payment(balance, monthly_rate, months):
+    """Level monthly payment (cents, rounded up) that repays `balance` cents over `months` at `monthly_rate`."""
+    balance = np.asarray(balance, dtype=np.float64)
+    monthly_rate = np.asarray(monthly_rate, dtype=np.float64)
+    months = np.maximum(np.asarray(months, dtype=np.float64), 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        level = balance * monthly_rate / (1 - (1 + monthly_rate) ** -months)
+    level = np.where(monthly_rate > 0, level, balance / months)
+    return np.ceil(level - 1e-9).astype(np.int64)
+
+
+def amortized_step(balance, monthly_rate, payment):
+    """
+    One month of an amortized loan on cents (scalars or arrays): the interest on the balance,
+    the payment (capped at what is owed) and the new balance. Returns (payment, interest, balance).
+    """
+    owing = balance > 0
+    interest = np.where(owing, np.rint(balance * monthly_rate), 0).astype(np.int64)
+    pay = np.where(owing, np.minimum(payment, balance + interest), 0)
+    return pay, interest, balance + interest - pay
+
+
+class LoanSchedule:
+    """
+    Month-by-month amortization of every loan of a config, as (loans, months) arrays of cents:
+    `payment` leaves the OA, `interest` is its interest part and `principal` the part that
+    reduces the loan account, `balance` the loan left after the month. Row 0 is the phased loan
+    of loanbalance and loanpayments... (no interest, as the run loop always had it), followed by
+    the amortized loans of the config's `loans` list. No loan is paid after `last_month` (the
+    age-55 transfer settles the loan account), and the totals per month are what main() and the
+    vectorized engine debit and credit.
+    """
+    def __init__(self, loans: Sequence[Dict[str, Any]], months: int, last_month: int = None):
+        self.loans = tuple(loans)
+        self.months = months
+        self.last_month = months - 1 if last_month is None else min(last_month, months - 1)
+        shape = (len(self.loans), months)
+        self.payment_by_loan = np.zeros(shape, dtype=np.int64)
+        self.interest_by_loan = np.zeros(shape, dtype=np.int64)
+        self.balance_by_loan = np.zeros(shape, dtype=np.int64)
+        phased = [i for i, loan in enumerate(self.loans) if loan['kind'] == 'phased']
+        amortized = [i for i, loan in enumerate(self.loans) if loan['kind'] == 'amortized']
+        if phased:
+            self._phased(phased)
+        if amortized:
+            self._amortized(amortized)
+        self.principal_by_loan = self.payment_by_loan - self.interest_by_loan
+        self.payment = self.payment_by_loan.sum(axis=0)
+        self.interest = self.interest_by_loan.sum(axis=0)
+        self.principal = self.principal_by_loan.sum(axis=0)
+        self.balance = self.balance_by_loan.sum(axis=0)
+
+    def _phased(self, rows):
+        balance = np.array([cents(self.loans[i]['balance']) for i in rows], dtype=np.int64)
+        y12, y3, y4 = (np.array([cents(self.loans[i]['payments'][phase]) for i in rows], dtype=np.int64)
+                       for phase in range(3))
+        for month in range(self.last_month + 1):
+            pay = phased_payment(month, balance, y12, y3, y4)
+            balance = balance - pay
+            self.payment_by_loan[rows, month] = pay
+            self.balance_by_loan[rows, month] = balance
+
+    def _amortized(self, rows):
+        loans = [self.loans[i] for i in rows]
+        balance = np.array([cents(loan['balance']) for loan in loans], dtype=np.int64)
+        start = np.array([loan['start_month'] for loan in loans], dtype=np.int64)
+        term = np.array([loan['term_months'] for loan in loans], dtype=np.int64)
+        fixed = np.array([cents(loan['payment']) for loan in loans], dtype=np.int64)
+        rate = np.zeros(len(loans))
+        payment = np.zeros(len(loans), dtype=np.int64)
+        changes = {}  # month -> [(position in rows, annual rate %)]
+        for k, loan in enumerate(loans):
+            for month, annual in ((loan['start_month'], loan['rate']),) + tuple(loan['rate_changes']):
+                changes.setdefault(month, []).append((k, annual))
+        for month in range(self.last_month + 1):
+            for k, annual in changes.get(month, ()):
+                # a new rate re-levels the payment over the rest of the term, unless it is fixed
+                rate[k] = annual / 100 / 12
+                remaining = term[k] - (month - start[k])
+                payment[k] = fixed[k] if fixed[k] > 0 else annuity_payment(balance[k], rate[k], remaining)
+            started = month >= start
+            pay, interest, new_balance = amortized_step(balance, rate, payment)
+            pay, interest = np.where(started, pay, 0), np.where(started, interest, 0)
+            balance = np.where(started, new_balance, balance)
+            self.payment_by_loan[rows, month] = pay
+            self.interest_by_loan[rows, month] = interest
+            self.balance_by_loan[rows, month] = balance
+
+    def payments(self) -> Tuple[list, list]:
+        """The OA debit and loan-account credit of every month as amounts (floats)."""
+        return (self.payment / 100).tolist(), (self.principal / 100).tolist()
+
+    def to_dict(self) -> Dict[str, list]:
+        """The total per month of every SCHEDULE_FIELDS array, as amounts."""
+        return {field: (getattr(self, field) / 100).tolist() for field in SCHEDULE_FIELDS}
+
+    def __repr__(self):
+        return (f"LoanSchedule(loans={len(self.loans)}, months={self.months}, "
+                f"paid={self.payment.sum() / 100:,.2f}, interest={self.interest.sum() / 100:,.2f})")
+
+
+_SCHEDULES: Dict[Any, LoanSchedule] = {}
+
+
+def _freeze(value):
+    if isinstance(value, dict) or hasattr(value, 'items'):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def loan_schedule(rates, months: int, last_month: int = None) -> LoanSchedule:
+    """
+    The LoanSchedule of a compiled config's `loans` over `months` months, computed once per
+    distinct set of loans and horizon and then served from a small in-process cache.
+    """
+    key = (_freeze(rates.loans), months, last_month)
+    schedule = _SCHEDULES.get(key)
+    if schedule is None:
+        if len(_SCHEDULES) >= MAX_CACHED_SCHEDULES:
+            _SCHEDULES.pop(next(iter(_SCHEDULES)))
+        schedule = _SCHEDULES[key] = LoanSchedule(rates.loans, months, last_month)
+    return schedule
+
+
+if __name__ == "__main__":
+    # Example usage: the config's phased loan next to a 25-year loan whose rate rises after two years
+    from cpf_config_loader_v11 import CPFConfig, compile_config
+    rates = compile_config(CPFConfig(CONFIG_FILENAME))
+    print("config loans:", [dict(loan) for loan in rates.loans])
+    loans = list(rates.loans) + [{'kind': 'amortized', 'name': 'bank', 'balance': 200000.0, 'rate': 2.6,
+                                  'term_months': 300, 'payment': 0.0, 'start_month': 0,
+                                  'rate_changes': ((24, 3.8),)}]
+    schedule = LoanSchedule(loans, months=60)
+    print(schedule)
+    for month in [0, 1, 2, 3, 23, 24, 59]:
+        print(month, [int(getattr(schedule, f'{field}_by_loan')[1, month]) / 100
+                      for field in SCHEDULE_FIELDS], int(schedule.payment[month]) / 100)
@@ -0,0 +1,192 @@
+# cpf_metrics_v1.py
+from __init__ import SRC_DIR, DATABASE_NAME
+import argparse
+import json
+import os
+import sqlite3
+from time import perf_counter
+from typing import Any, Dict, Optional
+from cpf_db_writer_v1 import create_run_metrics_table, INSERT_RUN_METRICS_SQL, RUN_METRICS_COLUMNS
+
+RUN_METRICS_JSON = os.path.join(SRC_DIR, 'cpf_run_metrics.json')  # default JSON export of the simulation CLI
+
+# Timed sections of main() in cpf_run_simulation_v9, in loop order, with the steps they cover
+STEP_LABELS = {
+    'setup': "Steps 1-11 config, calendar, headers, initial balances",
+    'progress': "next month of the calendar",
+    'age_update': "Step 12 date and age update",
+    'loans': "Step 13 loan payments",
+    'allocation': "Steps 14-16 allocation",
+    'interest': "Steps 17-18 year-end interest",
+    'payout': "Step 19 CPF payout",
+    'display': "Steps 20-22 balance rows to the renderer",
+    'transfer': "Step 23 RA transfer at 55",
+    'db_insert': "Step 24 cpf_data row",
+    'checkpoint': "Step 25 checkpoint",
+    'close_db': "final cpf_data flush",
+    'close_log': "final log flush and close",
+}
+
+# Counters read from the ledger and the cpf_data writer at the end of a run (see RunMetrics.collect).
+# The *_seconds counters are time already included in the steps that triggered the writes.
+COUNTERS = ['transactions', 'log_blocks', 'queue_puts', 'log_write_seconds',
+            'db_rows', 'db_commits', 'db_flush_seconds']
+
+
+class RunMetrics:
+    """
+    Time and call count per step of the monthly loop, plus run counters.
+    main() calls lap(step) at the end of every step, which charges the time since the previous
+    lap to that step: one perf_counter() call and two dict updates per step and month. The
+    counters come from the ledger and writer, which count anyway, so they cost nothing in the loop.
+    """
+    enabled = True
+
+    def __init__(self):
+        self.run_id: Optional[str] = None
+        self.seconds: Dict[str, float] = {}
+        self.calls: Dict[str, int] = {}
+        self.counters: Dict[str, float] = {}
+        self.total = 0.0
+        self._start = None
+        self._last = None
+
+    def start(self) -> None:
+        self._start = self._last = perf_counter()
+
+    def lap(self, step: str) -> None:
+        """Charge the time since the previous lap (or start) to `step`."""
+        now = perf_counter()
+        self.seconds[step] = self.seconds.get(step, 0.0) + (now - self._last)
+        self.calls[step] = self.calls.get(step, 0) + 1
+        self._last = now
+
+    def count(self, name: str, value: float = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def collect(self, ledger, writer) -> None:
+        """Read the counters of a finished run's TransactionLedger and CPFDataWriter."""
+        self.run_id = writer.run_id
+        self.counters.update(
+            transactions=ledger.transactions,
+            log_blocks=ledger.blocks,
+            queue_puts=ledger.queue_puts,
+            log_write_seconds=ledger.write_seconds,
+            db_rows=writer.rows_written,
+            db_commits=writer.commits,
+            db_flush_seconds=writer.flush_seconds,
+        )
+
+    def stop(self) -> None:
+        self.total = perf_counter() - self._start
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'run_id': self.run_id,
+            'total_seconds': self.total,
+            'steps': {step: {'calls': self.calls[step], 'seconds': self.seconds[step]} for step in self.seconds},
+            'counters': dict(self.counters),
+        }
+
+    def save_json(self, filename: str = RUN_METRICS_JSON) -> None:
+        with open(filename, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def save(self, database: str = DATABASE_NAME) -> None:
+        """Write the metrics to the run_metrics table under run_id (steps, counters and 'total')."""
+        rows = [(self.run_id, 'total', 'total', 1, self.total, None)]
+        rows += [(self.run_id, step, 'step', self.calls[step], self.seconds[step], None) for step in self.seconds]
+        rows += [(self.run_id, name, 'counter', None, None, float(value)) for name, value in self.counters.items()]
+        conn = sqlite3.connect(database)
+        try:
+            create_run_metrics_table(conn)
+            with conn:
+                conn.executemany(INSERT_RUN_METRICS_SQL, rows)
+        finally:
+            conn.close()
+
+    def report(self) -> str:
+        """The steps as a table (slowest first) followed by the counters."""
+        total = self.total or sum(self.seconds.values()) or 1.0
+        lines = [f"run {self.run_id}: {self.total:.3f} s",
+                 f"{'step':<12}{'calls':>8}{'seconds':>11}{'share':>8}{'us/call':>10}  covers"]
+        for step in sorted(self.seconds, key=self.seconds.get, reverse=True):
+            seconds, calls = self.seconds[step], self.calls[step]
+            lines.append(f"{step:<12}{calls:>8}{seconds:>11.4f}{seconds / total:>8.1%}{seconds / calls * 1e6:>10.1f}"
+                         f"  {STEP_LABELS.get(step, '')}")
+        for name in sorted(self.counters, key=lambda name: COUNTERS.index(name) if name in COUNTERS else len(COUNTERS)):
+            value = self.counters[name]
+            lines.append(f"{name:<20}{value:>12.4f}" if name.endswith('_seconds') else f"{name:<20}{int(value):>12,}")
+        return "\n".join(lines)
+
+    def __repr__(self):
+        return f"RunMetrics(run_id={self.run_id!r}, steps={len(self.seconds)}, total={self.total:.3f}s)"
+
+
+class NullMetrics(RunMetrics):
+    """Disabled metrics: every call is a no-op, so an uninstrumented run pays one empty call per step."""
+    enabled = False
+
+    def start(self) -> None:
+        pass
+
+    def lap(self, step: str) -> None:
+        pass
+
+    def count(self, name: str, value: float = 1) -> None:
+        pass
+
+    def collect(self, ledger, writer) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+
+NULL_METRICS = NullMetrics()
+
+
+def load_run_metrics(database: str = DATABASE_NAME, run_id: str = None) -> Optional[RunMetrics]:
+    """The metrics saved for `run_id` (default: the last run that saved any), or None."""
+    conn = sqlite3.connect(database)
+    try:
+        create_run_metrics_table(conn)
+        if run_id is None:
+            row = conn.execute("SELECT run_id FROM run_metrics ORDER BY rowid DESC LIMIT 1").fetchone()
+            if row is None:
+                return None
+            run_id = row[0]
+        rows = conn.execute(f"SELECT {', '.join(RUN_METRICS_COLUMNS)} FROM run_metrics WHERE run_id = ? ORDER BY rowid",
+                            (run_id,)).fetchall()
+    finally:
+        conn.close()
+    if not rows:
+        return None
+    metrics = RunMetrics()
+    metrics.run_id = run_id
+    for _, metric, kind, calls, seconds, value in rows:
+        if kind == 'total':
+            metrics.total = seconds
+        elif kind == 'step':
+            metrics.calls[metric] = calls
+            metrics.seconds[metric] = seconds
+        else:
+            metrics.counters[metric] = value
+    return metrics
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Show the step timings and counters saved by a simulation run.")
+    parser.add_argument('--database', default=DATABASE_NAME, help="simulation database")
+    parser.add_argument('--run-id', default=None, help="run to show (default: the last run with metrics)")
+    parser.add_argument('--json', action='store_true', help="print the metrics as JSON")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    metrics = load_run_metrics(args.database, args.run_id)
+    if metrics is None:
+        print("No run metrics in the database; run cpf_run_simulation_v9.py --metrics first.")
+    else:
+        print(json.dumps(metrics.to_dict(), indent=2) if args.json else metrics.report())
@@ -0,0 +1,35 @@
+# cpf_money_v1.py
+from __init__ import SRC_DIR
+import numpy as np
+
+# How the engines keep money: 'float' balances are floats rounded to 2 decimals after every
+# change (the original arithmetic); 'cents' balances are int64 cents, see CentsCPFAccount
+MONEY_MODES = ['float', 'cents']
+
+
+def check_money(money: str) -> str:
+    """Validate a money mode name."""
+    if money not in MONEY_MODES:
+        raise ValueError(f"Unsupported money mode: {money}. Use one of {MONEY_MODES}")
+    return money
+
+
+def to_cents(amount):
+    """
+    Integer cents of an amount in dollars, rounded half to even: exact for amounts that are
+    already whole cents. An amount or a NumPy array of amounts (an int64 array).
+    """
+    if isinstance(amount, np.ndarray):
+        return np.rint(amount * 100).astype(np.int64)
+    return int(round(amount * 100))
+
+
+def whole_cents(value):
+    """
+    Round an amount in (fractional) cents, such as rate * balance in cents, to whole cents,
+    half to even. This is the single rounding point of the 'cents' mode: interest and extra
+    interest are the only amounts that are rounded. A number or a NumPy array (int64).
+    """
+    if isinstance(value, np.ndarray):
+        return np.rint(value).astype(np.int64)
+    return round(value)
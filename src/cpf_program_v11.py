@@ -0,0 +1,868 @@
+from __init__ import SRC_DIR, CONFIG_FILENAME, CONFIG_FILENAME_FOR_USE, DATABASE_NAME, LOG_FILE_PATH
+import atexit
+from datetime import datetime
+import csv
+import json
+from cpf_config_loader_v11 import CPFConfig, CompiledCPFConfig, compile_config
+from cpf_ledger_v1 import TransactionLedger, CSVLogSink, Transaction, transaction_type, OA, SA, MA, RA, EXCESS, LOAN, BALANCE_ACCOUNTS
+from cpf_loan_v1 import annuity_payment
+from cpf_money_v1 import check_money, to_cents, whole_cents
+import os
+from datetime import date, datetime
+from array import array
+from itertools import count
+
+# Dynamically determine the src directory
+#SRC_DIR = os.path.dirname(os.path.abspath(__file__))  # Path to the src directory
+#CONFIG_FILENAME = os.path.join(SRC_DIR, 'cpf_config.json')  # Full path to the config file
+#LOG_FILE_PATH = os.path.join(SRC_DIR, "cpf_log_file.csv")  # Log file path inside src folder
+DATE_KEYS = ['startdate', 'enddate', 'birthdate']
+DATE_FORMAT = "%Y-%m-%d"
+START_REFERENCE = 100000000  # transaction and row references count up from this base
+BALANCE_INDEX = {account: code for code, account in enumerate(BALANCE_ACCOUNTS)}  # account -> index into CPFAccount.balances
+
+# Load configuration
+#config = ConfigLoader(CONFIG_FILENAME)
+
+
+def custom_serializer(obj):
+    """Custom serializer for non-serializable objects like datetime."""
+    if isinstance(obj, datetime):
+        return obj.strftime("%Y-%m-%d %H:%M:%S")
+    raise TypeError(f"Type {type(obj)} not serializable")
+
+
+def combined_balance_for_extra_interest(age: int, oa: float, sa: float, ma: float, ra: float, scale: int = 1):
+    """
+    calculate the combined balance based on age (the balances that earn extra interest);
+    the balances are in dollars, or in cents with scale=100
+    """
+    oa_balance = 0.0
+    sa_balance = 0.0
+    ma_balance = 0.0
+    ra_balance = 0.0
+
+    if age < 55:
+        #                       10_000                     -->  10_000
+        oa_balance = min(oa, 20_000 * scale)
+        #                       50_000                    -->   40_000
+        sa_balance = min(sa, 40_000 * scale)
+        if (oa_balance + sa_balance) == 60_000 * scale:
+            return oa_balance, sa_balance, 0.00, 0.00
+        ma_balance = min(ma, 40_000 * scale)
+        if (oa_balance + sa_balance + ma_balance) == 60_000 * scale:
+            return oa_balance, sa_balance, ma_balance, 0.00
+        ra_balance = 0.00
+        return oa_balance, sa_balance, ma_balance, ra_balance
+    elif age >= 55:
+        #                       50000                     -->  20000
+        oa_balance = min(oa, 20_000 * scale)
+        # sa_balance = min(sa, 10_000)
+        # if (oa_balance + sa_balance) == 30_000:
+        #    return oa_balance, sa_balance, 0.00, 0.00
+        ma_balance = min(ma, 30_000 * scale - oa_balance)
+        if (oa_balance + ma_balance) == 30_000 * scale:
+            return oa_balance, sa_balance, ma_balance, ra_balance
+        ra_balance = min(ra, 30_000 * scale)
+        if (oa_balance + ma_balance + ra_balance) == 60_000 * scale:
+            return oa_balance, sa_balance, ma_balance, ra_balance
+        return oa_balance, sa_balance, ma_balance, ra_balance
+
+
+def interest_on_cpf(rates: CompiledCPFConfig, age: int, account: str, amount: float) -> float:
+    """
+    Monthly-rate interest on one CPF account balance, rounded to 2 decimals.
+    Shared by CPFAccount and the vectorized engine so both paths round identically.
+    """
+    monthly_rate = rates.interest_rate.get(account)
+    if monthly_rate is None:
+        raise ValueError("Invalid account type. Must be 'oa', 'sa', 'ma', or 'ra'.")
+    return round(monthly_rate[age] * amount, 2)
+
+
+def extra_interest_on_cpf(rates: CompiledCPFConfig, age: int, oa: float, sa: float, ma: float, ra: float,
+                          scale: int = 1):
+    """
+    Extra interest (oa, sa, ma, ra) on the first 60k of combined balances, based on age;
+    the balances and the interest are in dollars, or in (unrounded) cents with scale=100.
+    """
+    first_rate = rates.extra_interest_first[age]
+    next_rate = rates.extra_interest_next[age]
+
+    oa_interest = 0.0
+    sa_interest = 0.0
+    ma_interest = 0.0
+    ra_interest = 0.0
+    oa_balance, sa_balance, ma_balance, ra_balance = (
+        combined_balance_for_extra_interest(age, oa, sa, ma, ra, scale)
+    )
+
+    if age < 55:
+        oa_interest = oa_balance * first_rate
+        sa_interest = sa_balance * first_rate
+        ma_interest = ma_balance * first_rate
+        ra_interest = 0.0
+        return (0, oa_interest + sa_interest, ma_interest, ra_interest)
+    elif age >= 55:
+        first_30k = min((oa_balance + sa_balance + ma_balance + ra_balance), 30_000 * scale)
+        next_30k = min(
+            oa_balance + sa_balance + ma_balance + ra_balance - first_30k, 30_000 * scale
+        )
+
+        if first_30k == 30_000 * scale:
+            ra_interest = 30_000 * scale * first_rate
+        elif next_30k == 30_000 * scale:
+            ra_interest = 30_000 * scale * next_rate
+        else:
+            ra_interest = 0.0
+
+        return (oa_interest, sa_interest, ma_interest, ra_interest)
+
+
+def interest_cents(rates: CompiledCPFConfig, age: int, account: str, balance: int) -> int:
+    """interest_on_cpf in the 'cents' money mode: the interest on a balance in cents, in whole cents."""
+    monthly_rate = rates.interest_rate.get(account)
+    if monthly_rate is None:
+        raise ValueError("Invalid account type. Must be 'oa', 'sa', 'ma', or 'ra'.")
+    return whole_cents(monthly_rate[age] * balance)
+
+
+def extra_interest_cents(rates: CompiledCPFConfig, age: int, oa: int, sa: int, ma: int, ra: int):
+    """extra_interest_on_cpf in the 'cents' money mode: (oa, sa, ma, ra) whole cents on balances in cents."""
+    return tuple(whole_cents(amount) for amount in extra_interest_on_cpf(rates, age, oa, sa, ma, ra, scale=100))
+
+
+def _balance_attribute(code: int) -> property:
+    """The plain `_<account>_balance` float of an account: reads and writes CPFAccount.balances, without logging."""
+    def fget(self):
+        return self.balance(code)
+
+    def fset(self, value):
+        self.balances[code] = self._units(value)
+    return property(fget, fset)
+
+
+def _balance_facade(code: int) -> property:
+    """
+    The `<account>_balance` property of an account: reads (balance, message), and setting a
+    (balance, message) pair or a bare balance posts the change to the ledger.
+    """
+    def fget(self):
+        return self.balance(code), self._messages[code]
+
+    def fset(self, data):
+        if isinstance(data, (tuple, list)) and len(data) == 2:
+            value, message = data
+        else:
+            value, message = float(data), "no message"
+        self._post(code, self._units(value), message)
+    return property(fget, fset)
+
+
+class CPFAccount:
+    money = 'float'  # the money mode (see cpf_money_v1): `balances` are floats rounded to cents
+
+    def __init__(self, config_loader, ledger: TransactionLedger = None):  # Accept config_loader
+        self.config = config_loader  # Store the config_loader instance
+        self.rates = compile_config(config_loader)  # age-indexed rate tables for the monthly lookups
+        self.current_date: datetime = datetime.now()
+        self.date_key: str = None
+        self.message: str = None
+        self.startdate = None
+        self.enddate = None
+        self.birthdate = None
+        self.salary = self.config.salary
+        self.age = 0
+        self.payout = 0.0
+
+        # Account balances and their last messages, indexed by the account codes OA ... LOAN;
+        # every balance is kept rounded to cents
+        self.balances = array('d', bytes(8 * len(BALANCE_ACCOUNTS)))
+        self._messages = [None] * len(BALANCE_ACCOUNTS)
+        self.start_reference = START_REFERENCE
+        self.counter = count(1)
+        self.trandaction_reference = 0
+        self.dbcounter = count(1)
+        self.dbreference = 0
+        
+        # Log saving setup: transactions are buffered in column blocks and written in bulk
+        self.ledger = ledger if ledger is not None else TransactionLedger(CSVLogSink(LOG_FILE_PATH))
+
+        # Register cleanup function
+        atexit.register(self.close_log_writer)
+        
+    def add_db_reference(self):
+        self.dbreference = self.start_reference + next(self.dbcounter)
+        return self.dbreference
+    
+    def add_transaction_reference(self):
+        self.trandaction_reference = self.start_reference + next(self.counter)
+        return self.trandaction_reference
+
+    def snapshot(self) -> dict:
+        """JSON-serialisable state of the account: balances, reference counters, date, age and payout."""
+        return {
+            "balances": {account: self.balance(BALANCE_INDEX[account]) for account in ["oa", "sa", "ma", "ra", "loan", "excess"]},
+            "money": self.money,
+            "transaction_reference": self.trandaction_reference,
+            "dbreference": self.dbreference,
+            "date_key": self.date_key,
+            "current_date": self.current_date.isoformat(),
+            "age": self.age,
+            "payout": self.payout,
+        }
+
+    def restore(self, state: dict) -> None:
+        """Set the account back to a snapshot(); the counters continue after the saved references."""
+        for account, balance in state["balances"].items():
+            self.balances[BALANCE_INDEX[account]] = self._units(balance)
+        self.trandaction_reference = state["transaction_reference"]
+        self.counter = count(self.trandaction_reference - self.start_reference + 1)
+        self.dbreference = state["dbreference"]
+        self.dbcounter = count(self.dbreference - self.start_reference + 1)
+        self.date_key = state["date_key"]
+        self.current_date = date.fromisoformat(state["current_date"])
+        self.age = state["age"]
+        self.payout = state["payout"]
+
+    def save_log_to_file(self, log_entry):
+        """Append a Transaction, or a log entry dict (cpf_log_file.csv fields), to the transaction ledger."""
+        if not isinstance(log_entry, Transaction):
+            log_entry = Transaction.from_dict(log_entry)
+        self.ledger.log_transaction(log_entry)
+
+    def balance(self, code: int) -> float:
+        """The balance of account `code` in dollars."""
+        return self.balances[code]
+
+    def _units(self, amount: float) -> float:
+        """An amount in dollars as `balances` keeps it: rounded to cents."""
+        return round(amount, 2)
+
+    def _post(self, code: int, new_balance: float, message: str) -> None:
+        """
+        Set the balance of account `code` to `new_balance` (rounded to cents) and log the change
+        with the current date, age and message.
+        """
+        balances = self.balances
+        old_balance = balances[code]
+        balances[code] = new_balance
+        self._messages[code] = self.message = message
+        # TransactionLedger.log with the account code at hand (the balance codes are the ledger's
+        # account codes); both balances are already rounded to cents, only the difference is not
+        amount = new_balance - old_balance
+        ledger = self.ledger
+        ledger.append(self.current_date.toordinal(), self.add_transaction_reference(), self.age, code,
+                      old_balance, new_balance, round(amount, 2), transaction_type(amount),
+                      ledger.intern_message(message))
+
+    def _log_transaction(self, account: str, old_balance: float, new_balance: float, diff: float):
+        """Log one balance change of `account` with the current date, age and message."""
+        self.ledger.log(
+            self.current_date,
+            self.add_transaction_reference(),
+            self.age,
+            account,
+            old_balance,
+            new_balance,
+            diff,
+            self.message,
+        )
+
+    def close_log_writer(self):
+        """Flush the remaining transactions and stop the ledger writer."""
+        try:
+            self.ledger.close()
+        except Exception as e:
+            print(f"Error while closing log writer: {e}")
+
+    # The balances as attributes, a facade over `balances`: `oa_balance` and friends read
+    # (balance, message) and post to the ledger when set, `_oa_balance` and friends are the bare floats.
+    oa_balance = _balance_facade(OA)
+    sa_balance = _balance_facade(SA)
+    ma_balance = _balance_facade(MA)
+    ra_balance = _balance_facade(RA)
+    excess_balance = _balance_facade(EXCESS)
+    loan_balance = _balance_facade(LOAN)
+    _oa_balance = _balance_attribute(OA)
+    _sa_balance = _balance_attribute(SA)
+    _ma_balance = _balance_attribute(MA)
+    _ra_balance = _balance_attribute(RA)
+    _excess_balance = _balance_attribute(EXCESS)
+    _loan_balance = _balance_attribute(LOAN)
+
+    @property
+    def combined_balance(self):
+        # Always calculate the combined balance dynamically
+        self._combined_balance = (
+            self._oa_balance + self._sa_balance + self._ma_balance + self._ra_balance
+        )
+        return self._combined_balance, self._combined_message
+
+    @combined_balance.setter
+    def combined_balance(self, data):
+        # Setter logic remains unchanged
+        if isinstance(data, (tuple, list)) and len(data) == 2:
+            value, self.message = data
+        else:
+            value, self.message = float(data), "no message"
+        old_balance = self._combined_balance
+        diff = value - old_balance
+        self._combined_balance = value.__round__(2)
+        self._combined_message = self.message
+        self._log_transaction("combined", old_balance, value, diff)
+
+    @property
+    def combinedbelow55_balance(self):
+        # Dynamically calculate the combined below 55 balance if age <= 55
+        if self.current_date and self.birthdate:
+            age = (self.current_date.year - self.birthdate.year) - (
+                (self.current_date.month, self.current_date.day)
+                < (self.birthdate.month, self.birthdate.day)
+            )
+            if age < 55:
+                self._combinedbelow55_balance = (
+                    self._oa_balance + self._sa_balance + self._ma_balance
+                )
+        return self._combinedbelow55_balance, self._combinedbelow55_balance_message
+
+    @combinedbelow55_balance.setter
+    def combinedbelow55_balance(self, data):
+        # Setter logic remains unchanged
+        if isinstance(data, (tuple, list)) and len(data) == 2:
+            value, self.message = data
+        else:
+            value, self.message = float(data), "no message"
+        old_balance = self._combinedbelow55_balance
+        diff = value - old_balance
+        self._combinedbelow55_balance = value.__round__(2)
+        self._combinedbelow55_balance_message = self.message
+        self._log_transaction("combined_below_55", old_balance, value, diff)
+
+    @property
+    def combinedabove55_balance(self):
+        # Dynamically calculate the combined above 55 balance if age >= 55
+        if self.current_date and self.birthdate:
+            age = (self.current_date.year - self.birthdate.year) - (
+                (self.current_date.month, self.current_date.day)
+                < (self.birthdate.month, self.birthdate.day)
+            )
+            if age >= 55:
+                self._combinedabove55_balance = (
+                    self._oa_balance + self._ra_balance + self._ma_balance
+                )
+        return self._combinedabove55_balance, self._combinedabove55_balance_message
+
+    @combinedabove55_balance.setter
+    def combinedabove55_balance(self, data):
+        # Setter logic remains unchanged
+        if isinstance(data, (tuple, list)) and len(data) == 2:
+            value, self.message = data
+        else:
+            value, self.message = float(data), "no message"
+        old_balance = self._combinedabove55_balance
+        diff = value - old_balance
+        self._combinedabove55_balance = value.__round__(2)
+        self._combinedabove55_balance_message = self.message
+        self._log_transaction("combined_above_55", old_balance, value, diff)
+
+    def __enter__(self):
+        """Enter the runtime context related to this object."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Exit the runtime context and ensure resources are released."""
+        self.close_log_writer()
+        return False
+
+    def close(self):
+        """Ensure the log writer process is properly closed."""
+        self.close_log_writer()
+
+    def convert_date_strings(self, key:str, date_str:str):    
+        """
+        Convert date strings in the configuration to datetime objects.
+        """
+        
+        if isinstance(date_str, str) and key.lower() in DATE_KEYS:
+            try:
+                return datetime.strptime(date_str, DATE_FORMAT).date()
+            except ValueError:
+                pass
+        elif isinstance(date_str, (date, datetime)):
+            return date_str
+        else:
+            raise ValueError(f"Invalid date format for {key}: {date_str}. Expected format: YYYY-MM-DD")
+        
+    def get_date_dict(self, startdate, enddate, birthdate):
+        """Generate a date dictionary.  #this is called once only"""
+        print(
+            "Warning: get_date_dict needs implementation in CPFAccount or be imported correctly."
+        )
+        from cpf_date_generator_v3 import generate_date_dict
+
+        return generate_date_dict(startdate, enddate, birthdate)
+
+    def update_balance(self, account: str, new_balance: float, message: str):
+        """
+        Sets the account balance to the specified new_balance and logs the change.
+        The logged 'amount' reflects the difference from the old balance.
+        # this is called every month
+        """
+        code = BALANCE_INDEX.get(account)
+        if code is None:
+            print(f"Error: Invalid account name for update_balance: {account}")
+            return  # Or raise ValueError
+        # Set the new balance using the provided value
+        self.balances[code] = self._units(new_balance)
+
+    def record_inflow(self, account: str, amount: float, message: str = "") -> None:
+        """Records an inflow of funds into a specified account."""
+        code = BALANCE_INDEX.get(account)
+        if code is None:
+            print(f"Error: Invalid account name for record_inflow: {account}")
+            return
+
+        if not isinstance(amount, (int, float)) or abs(amount) < 1e-9:
+            return  # Skip invalid or zero inflow
+
+        # Update the balance and log the change
+        self._post(code, (self.balances[code] + amount).__round__(2), message)
+
+    def record_outflow(self, account: str, amount: float, message: str = "") -> None:
+        """Records an outflow of funds from a specified account."""
+        code = BALANCE_INDEX.get(account)
+        if code is None:
+            print(f"Error: Invalid account name for record_outflow: {account}")
+            return
+
+        if not isinstance(amount, (int, float)) or abs(amount) < 1e-9:
+            return  # Skip invalid or zero outflow
+
+        # Update the balance and log the change
+        self._post(code, (self.balances[code] - amount).__round__(2), message)
+
+    def credit_interest(self, interest_message: str, extra_interest_message: str) -> None:
+        """
+        Steps 17-18: the December interest and extra interest of the OA, SA, MA and RA, both
+        worked out on the balances before either is recorded.
+        """
+        interest = {}
+        for account in ['oa', 'sa', 'ma', 'ra']:
+            account_balance = self.balances[BALANCE_INDEX[account]]
+            interest[account] = 0.0
+            if account_balance > 0:
+                interest[account] = self.calculate_interest_on_cpf(account=account, amount=account_balance).__round__(2)
+        extra_interest = self.calculate_extra_interest()
+        for account in ['oa', 'sa', 'ma', 'ra']:
+            self.record_inflow(account=account, amount=interest[account], message=interest_message)
+        for account, amount in zip(['oa', 'sa', 'ma', 'ra'], extra_interest):
+            self.record_inflow(account=account, amount=amount.__round__(2), message=extra_interest_message)
+
+    def pay_out(self, amount: float, message: str) -> float:
+        """Step 19: move `amount`, capped by the RA, from the RA to the excess account; returns the payout."""
+        ra_balance = self.balance(RA)
+        self.payout = max(min(amount, ra_balance), 0.00)
+        if ra_balance > 0:
+            self.record_outflow(account='ra', amount=self.payout, message=message)
+            self.record_inflow(account='excess', amount=self.payout, message=message)
+        else:
+            self.payout = 0.0
+        return self.payout
+
+    def balance_row(self) -> tuple:
+        """The OA, SA, MA, RA, loan and excess balances in dollars, in cpf_data column order."""
+        balances = self.balances
+        return (balances[OA].__round__(2), balances[SA].__round__(2), balances[MA].__round__(2),
+                balances[RA].__round__(2), balances[LOAN].__round__(2), balances[EXCESS].__round__(2))
+
+    def insert_data(
+        self,
+        writer,
+        date_key,
+        dbreference,
+        age,
+        _oa_balance,
+        _sa_balance,
+        _ma_balance,
+        _ra_balance,
+        _loan_balance,
+        _excess_balance,
+        payout,
+        message
+    ):
+        """Buffers one month of CPF data in the CPFDataWriter; rows are committed in batches."""
+        writer.add_row(
+            date_key,
+            dbreference,
+            age,
+            _oa_balance,
+            _sa_balance,
+            _ma_balance,
+            _ra_balance,
+            _loan_balance,
+            _excess_balance,
+            payout,
+            message
+        )
+
+    def calculate_cpf_allocation(self, account: str) -> float:
+        """
+        Calculates the allocation amount for a specific CPF account based on age and total CPF contribution.
+        """
+        # Ensure total contributions are calculated
+        if self.total_contribution == 0.0:
+            raise ValueError(
+                "Total contributions have not been calculated. Call `calculate_total_contributions` first."
+            )
+
+        # Determine allocation rates based on age
+        if self.age < 55:
+            alloc_percentage = getattr(self.config,f"allocationbelow55{account}", 0)
+            self._oa_allocation55 = alloc_percentage * self.total_contribution
+            self._sa_allocation55 = alloc_percentage * self.total_contribution
+            self._ma_allocation55 = alloc_percentage * self.total_contribution
+            self._ra_allocation55 = 0.0
+
+        elif 55 <= self.age < 60:
+            alloc_percentage = getattr(self.config,
+                f"allocationabove55{account}56to60", 0
+            )
+            self._oa_allocation_5560 = alloc_percentage * self.total_contribution
+            self._sa_allocation_5560 = (
+                alloc_percentage * self.total_contribution if self.age <= 55 else 0.0
+            )
+            self._ma_allocation_5560 = alloc_percentage * self.total_contribution
+            self._ra_allocation_5560 = (
+                alloc_percentage * self.total_contribution if self.age > 55 else 0.0
+            )
+        elif 60 <= self.age < 65:
+            alloc_percentage = getattr(self.config,f"allocationabove55{account}61to65",0)
+            self._oa_allocation6065 = alloc_percentage * self.total_contribution
+            self._ma_allocation6065 = alloc_percentage * self.total_contribution
+            self._ra_allocation6065 = alloc_percentage * self.total_contribution
+
+        elif 65 <= self.age < 70:
+            alloc_percentage = getattr(self.config,
+                f"allocation_above_55{account}66_to_70", 0
+            )
+            self._oa_allocation6570 = alloc_percentage * self.total_contribution
+            self._ma_allocation6570 = alloc_percentage * self.total_contribution
+            self._ra_allocation6570 = alloc_percentage * self.total_contribution
+
+        else:  # age >= 70
+            alloc_percentage = getattr(self.config,
+                f"allocation_above_55{account}above_70", 0
+            )
+            self._oa_allocation70 = alloc_percentage * self.total_contribution
+            self._ma_allocation70 = alloc_percentage * self.total_contribution
+            self._ra_allocation70 = alloc_percentage * self.total_contribution
+
+        # Calculate the allocation amount
+        allocation_amount = self.total_contribution * alloc_percentage
+        return allocation_amount
+
+    def compute_and_add_allocation(self):
+        """
+        Compute the CPF allocation amounts for each category (oa, sa, ma, ra) based on the age
+        and add them to the configuration using the add_key_value method.
+        """
+        # Retrieve the salary cap
+        salary_cap = getattr(self.config,"salarycap", 0)
+        self.calculate_total_contributions()
+    #    allocation = {}
+    #    mydict = {}
+    #    with open(CONFIG_FILENAME, "r") as file:
+    #        mydict = json.load(file)
+    #    # Determine the correct age bracket for contribution rates
+    #    allocation = {
+    #        "allocation_below_55": {
+    #            "oa": {
+    #                "allocation": 0.6217,
+    #                "amount": 0.6217 * self.total_contribution,
+    #            },
+    #            "sa": {
+    #                "allocation": 0.1621,
+    #                "amount": 0.1621 * self.total_contribution,
+    #            },
+    #            "ma": {
+    #                "allocation": 0.2162,
+    #                "amount": 0.2162 * self.total_contribution,
+    #            },
+    #        },
+    #        "allocation_above_55": {
+    #            "oa": {
+    #                "56_to_60": {
+    #                    "allocation": 0.3694,
+    #                    "amount": 0.3694 * self.total_contribution,
+    #                },
+    #                "61_to_65": {
+    #                    "allocation": 0.149,
+    #                    "amount": 0.149 * self.total_contribution,
+    #                },
+    #                "66_to_70": {
+    #                    "allocation": 0.0607,
+    #                    "amount": 0.0607 * self.total_contribution,
+    #                },
+    #                "above_70": {
+    #                    "allocation": 0.08,
+    #                    "amount": 0.08 * self.total_contribution,
+    #                },
+    #            },
+    #            "sa": {"allocation": 0.00, "amount": 0.0},
+    #            "ma": {
+    #                "56_to_60": {
+    #                    "allocation": 0.323,
+    #                    "amount": 0.323 * self.total_contribution,
+    #                },
+    #                "61_to_65": {
+    #                    "allocation": 0.4468,
+    #                    "amount": 0.4468 * self.total_contribution,
+    #                },
+    #                "66_to_70": {
+    #                    "allocation": 0.6363,
+    #                    "amount": 0.6363 * self.total_contribution,
+    #                },
+    #                "above_70": {
+    #                    "allocation": 0.84,
+    #                    "amount": 0.84 * self.total_contribution,
+    #                },
+    #            },
+    #            "ra": {
+    #                "56_to_60": {
+    #                    "allocation": 0.3076,
+    #                    "amount": self.total_contribution * 0.3076,
+    #                },
+    #                "61_to_65": {
+    #                    "allocation": 0.4042,
+    #                    "amount": self.total_contribution * 0.4042,
+    #                },
+    #                "66_to_70": {
+    #                    "allocation": 0.303,
+    #                    "amount": self.total_contribution * 0.303,
+    #                },
+    #                "above_70": {
+    #                    "allocation": 0.08,
+    #                    "amount": self.total_contribution * 0.08,
+    #                },
+    #            },
+    #        },
+    #    }
+    #    allocation.update(mydict)
+    #    with open(CONFIG_FILENAME, "w") as file:
+    #        json.dump(allocation, file, indent=4)
+
+    # self.config.add_key_value(allocation, None)
+    # self.config.save()
+
+    def calculate_combined_balance(self):
+        """calculate the combined balance based on age"""
+        return combined_balance_for_extra_interest(
+            self.age, self._oa_balance, self._sa_balance, self._ma_balance, self._ra_balance
+        )
+
+    def calculate_interest_on_cpf(self, account: str, amount: float) -> float:
+        """
+        Apply interest to all CPF accounts at the end of the year.
+        This is called every December - 12 of every year.
+        """
+        return interest_on_cpf(self.rates, self.age, account, amount)
+
+    def calculate_extra_interest(self):
+        """
+        Apply extra interest to SA and MA accounts based on age.
+        This is called every December - 12 of every year.
+        """
+        return extra_interest_on_cpf(
+            self.rates, self.age, self._oa_balance, self._sa_balance, self._ma_balance, self._ra_balance
+        )
+
+    def get_cpf_contribution_rate(self, age: int, is_employee: bool) -> float:
+        """
+        Retrieve CPF contribution rate based on age and employment status.
+        """
+        table = self.rates.employee_rate if is_employee else self.rates.employer_rate
+        return table[age]
+
+    def calculate_cpf_contribution(self, is_employee: bool) -> float:
+        """
+        Calculates CPF contribution based on salary, age, and employment status.
+        """
+        capped_salary = min(self.salary, self.rates.salarycap)
+
+        # The brackets here end inclusively (up to 55 is below55, 56 to 60 is 55to60, ...),
+        # one year later than get_cpf_contribution_rate, hence the age - 1 lookup.
+        table = self.rates.employee_rate if is_employee else self.rates.employer_rate
+        rate = table[max(self.age - 1, 0)]
+
+        # Calculate the contribution
+        contribution = capped_salary * rate
+        if is_employee:
+            self.employee_contribution = contribution
+        else:
+            self.employer_contribution = contribution
+
+        return contribution
+
+    def calculate_total_contributions(self) -> float:
+        """
+        Calculates the total CPF contributions (employee + employer) based on salary and age.
+        Updates the `self.total_contribution` attribute.
+        """
+        # Calculate employee and employer contributions
+        employee_contribution = self.calculate_cpf_contribution(is_employee=True)
+        employer_contribution = self.calculate_cpf_contribution(is_employee=False)
+
+        # Update the total contributions
+        self.total_contribution = employee_contribution + employer_contribution
+        # return self.total_contribution
+        setattr(self, "total_contribution", self.total_contribution)
+
+    def calculate_cpf_payout(self,types:str) -> float:
+        """Calculates the CPF payout amount based on age and retirement sum.
+        only starts at the age of 67
+        """
+        payout_age = self.rates.cpfpayoutage
+        payout = self.rates.retirement_payouts.get(types, 0.0)
+
+        if self.age >= payout_age:
+            self.payout = payout
+            return self.payout
+        else:
+            return 0.0  # No payout before payout age
+
+    def custom_serializer(self, obj):
+        """called every month to save the log"""
+        if isinstance(obj, datetime):
+            return obj.strftime("%Y-%m-%d")  # Convert datetime to string
+        raise TypeError("Type not serializable")
+
+    def calculate_the_loan_amortization(self, interest_rate: float = 3.0, term_years: int = 30) -> float:
+        """
+        Level monthly payment that repays the current loan balance over `term_years` at
+        `interest_rate` percent a year. The run itself pays its loans from the amortization
+        schedule of the config (see cpf_loan_v1.LoanSchedule).
+        """
+        if self._loan_balance <= 0:
+            return 0.0
+        return int(annuity_payment(round(self._loan_balance * 100), interest_rate / 100 / 12, term_years * 12)) / 100
+
+
+class CentsCPFAccount(CPFAccount):
+    """
+    CPFAccount in the 'cents' money mode: `balances` are int64 cents. An amount is converted to
+    cents once, when it is recorded (to_cents), and interest is rounded to whole cents once, when
+    it is worked out (whole_cents); every other step is integer arithmetic. The ledger, the
+    facades and snapshot() still take and give dollars (cents / 100, the exact 2-decimal value).
+    """
+    money = 'cents'
+
+    def __init__(self, config_loader, ledger: TransactionLedger = None):
+        super().__init__(config_loader, ledger=ledger)
+        self.balances = array('q', bytes(8 * len(BALANCE_ACCOUNTS)))
+
+    def balance(self, code: int) -> float:
+        return self.balances[code] / 100
+
+    def _units(self, amount: float) -> int:
+        return to_cents(amount)
+
+    def _post(self, code: int, new_balance: int, message: str) -> None:
+        """Set the balance of account `code` to `new_balance` cents and log the change in dollars."""
+        balances = self.balances
+        old_balance = balances[code]
+        balances[code] = new_balance
+        self._messages[code] = self.message = message
+        amount = new_balance - old_balance
+        ledger = self.ledger
+        ledger.append(self.current_date.toordinal(), self.add_transaction_reference(), self.age, code,
+                      old_balance / 100, new_balance / 100, amount / 100, transaction_type(amount),
+                      ledger.intern_message(message))
+
+    def record_inflow(self, account: str, amount: float, message: str = "") -> None:
+        """Records an inflow of funds into a specified account."""
+        code = BALANCE_INDEX.get(account)
+        if code is None:
+            print(f"Error: Invalid account name for record_inflow: {account}")
+            return
+        if not isinstance(amount, (int, float)):
+            return
+        cents = to_cents(amount)
+        if cents:  # skip zero inflows
+            self._post(code, self.balances[code] + cents, message)
+
+    def record_outflow(self, account: str, amount: float, message: str = "") -> None:
+        """Records an outflow of funds from a specified account."""
+        code = BALANCE_INDEX.get(account)
+        if code is None:
+            print(f"Error: Invalid account name for record_outflow: {account}")
+            return
+        if not isinstance(amount, (int, float)):
+            return
+        cents = to_cents(amount)
+        if cents:  # skip zero outflows
+            self._post(code, self.balances[code] - cents, message)
+
+    def credit_interest(self, interest_message: str, extra_interest_message: str) -> None:
+        balances = self.balances
+        codes = [OA, SA, MA, RA]
+        interest = [interest_cents(self.rates, self.age, account, balances[code]) if balances[code] > 0 else 0
+                    for account, code in zip(['oa', 'sa', 'ma', 'ra'], codes)]
+        extra_interest = extra_interest_cents(self.rates, self.age, *(balances[code] for code in codes))
+        for amounts, message in [(interest, interest_message), (extra_interest, extra_interest_message)]:
+            for code, cents in zip(codes, amounts):
+                if cents:
+                    self._post(code, balances[code] + cents, message)
+
+    def balance_row(self) -> tuple:
+        balances = self.balances
+        return (balances[OA] / 100, balances[SA] / 100, balances[MA] / 100,
+                balances[RA] / 100, balances[LOAN] / 100, balances[EXCESS] / 100)
+
+
+ACCOUNT_CLASSES = {'float': CPFAccount, 'cents': CentsCPFAccount}  # money mode -> account class
+
+
+def account_class(money: str = 'float') -> type:
+    """The CPFAccount class of a money mode (see cpf_money_v1.MONEY_MODES)."""
+    return ACCOUNT_CLASSES[check_money(money)]
+
+
+if __name__ == "__main__":
+    try:
+        config_loader = CPFConfig(CONFIG_FILENAME)
+        myself = CPFAccount(config_loader=config_loader)
+        ages = [25, 55, 60, 65, 70, 75]
+        for age in ages:
+            myself.age = age
+            myself.salary = 5000  # Example salary
+            contribution = myself.calculate_cpf_contribution(is_employee=True)
+            print(f"Age: {age}, Employee Contribution: {contribution}")
+
+            # Test salary cap retrieval
+            salary_cap = config_loader.salarycap
+            print(f"Salary Cap: {salary_cap}")
+
+        # Test CPF contribution calculation
+        myself.salary = 6000  # Update salary for testing
+        for age in ages:
+            myself.age = age
+            employee_contribution = myself.calculate_cpf_contribution(is_employee=True)
+            employer_contribution = myself.calculate_cpf_contribution(is_employee=False)
+            total_contribution = employee_contribution + employer_contribution
+            print(
+                f"Age: {age}, Employee Contribution: {employee_contribution}, Employer Contribution: {employer_contribution}, Total Contribution: {total_contribution}"
+            )
+
+        # Test transaction ledger
+        print("Testing transaction ledger...")
+        myself.date_key = datetime.now().strftime("%Y-%m-%d")
+        myself.oa_balance = (1000.0, "Initial OA balance")
+        myself.sa_balance = (2000.0, "Initial SA balance")
+        myself.record_inflow("oa", 500.0, "Monthly contribution")
+        myself.record_outflow("sa", 300.0, "Medical expenses")
+        myself.close_log_writer()  # Ensure logs are flushed to the file
+        print("Log writer test completed. Check the log file for entries.")
+
+    except Exception as e:
+        print(f"An error occurred: {e}")
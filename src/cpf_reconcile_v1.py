@@ -0,0 +1,123 @@
+# cpf_reconcile_v1.py
+from __init__ import SRC_DIR, LOG_FILE_PATH, CPF_REPORT, OUTPUT_MISMATCHES
+import argparse
+import sys
+import time
+import numpy as np
+import pandas as pd
+from cpf_binlog_v1 import BinaryLog, is_binary_log
+from cpf_build_reports_v1 import SKIPPED_LOAN_AGE, SKIPPED_LOAN_AMOUNT
+
+DEFAULT_TOLERANCE = 0.005  # amounts are in dollars and cents; anything above half a cent is a mismatch
+MISMATCH_COLUMNS = ["transaction_reference", "amount_log", "account", "type", "REF", "ACCOUNT", "amount_report", "difference"]
+LOG_COLUMNS = ["transaction_reference", "age", "account", "amount", "type"]
+REPORT_COLUMNS = ["REF", "ACCOUNT", "TYPE", "INFLOW", "OUTFLOW"]
+
+
+def load_log(log_file: str = LOG_FILE_PATH) -> pd.DataFrame:
+    """The columns of the transaction log needed to reconcile, from the CSV or the binary log."""
+    if is_binary_log(log_file):
+        log = BinaryLog(log_file)
+        return pd.DataFrame({
+            "transaction_reference": log["reference"],
+            "age": log["age"],
+            "account": np.array(log.accounts, dtype=object)[log["account"]],
+            "amount": log["amount"],
+            "type": np.array(log.types, dtype=object)[log["type"]],
+        })
+    return pd.read_csv(log_file, usecols=LOG_COLUMNS,
+                       dtype={"transaction_reference": np.int64, "age": np.int64, "amount": np.float64})
+
+
+def load_report(report_file: str = CPF_REPORT) -> pd.DataFrame:
+    """REF, ACCOUNT, TYPE and the signed amount of every report row."""
+    report = pd.read_csv(report_file, usecols=REPORT_COLUMNS,
+                         dtype={"REF": np.int64, "INFLOW": np.float64, "OUTFLOW": np.float64})
+    # only one of INFLOW / OUTFLOW is non-zero; OUTFLOW carries the negative amount
+    report["amount_report"] = report["INFLOW"] + report["OUTFLOW"]
+    return report[["REF", "ACCOUNT", "TYPE", "amount_report"]]
+
+
+class ReconciliationResult:
+    """Outcome of reconcile(): row counts and the mismatching rows (MISMATCH_COLUMNS)."""
+    def __init__(self, log_rows: int, report_rows: int, skipped: int, mismatches: pd.DataFrame, elapsed: float):
+        self.log_rows = log_rows
+        self.report_rows = report_rows
+        self.skipped = skipped
+        self.mismatches = mismatches
+        self.elapsed = elapsed
+
+    @property
+    def ok(self) -> bool:
+        return self.mismatches.empty
+
+    def __repr__(self):
+        return (f"ReconciliationResult(log_rows={self.log_rows}, report_rows={self.report_rows}, "
+                f"skipped={self.skipped}, mismatches={len(self.mismatches)}, elapsed={self.elapsed:.3f}s)")
+
+
+def reconcile(log_file: str = LOG_FILE_PATH, report_file: str = CPF_REPORT, output_file: str = OUTPUT_MISMATCHES,
+              tolerance: float = DEFAULT_TOLERANCE) -> ReconciliationResult:
+    """
+    Join the transaction log and cpf_report.csv on transaction_reference / REF and write every row
+    whose account, type or amount disagrees (amounts beyond `tolerance`), or that exists on one
+    side only, to `output_file`. The age-55 loan rows that build_report leaves out on purpose are
+    not reported. The file is always written, with just the header when everything matches.
+    """
+    start = time.perf_counter()
+    log = load_log(log_file)
+    report = load_report(report_file)
+    amount_log = log["amount"].to_numpy().round(2)
+    skipped = ((log["account"] == "loan") & (log["age"] == SKIPPED_LOAN_AGE)
+               & (np.abs(amount_log) > SKIPPED_LOAN_AMOUNT)).to_numpy()
+    log = pd.DataFrame({
+        "transaction_reference": log["transaction_reference"].to_numpy(),
+        "amount_log": amount_log,
+        "account": log["account"].to_numpy(),
+        "type": log["type"].to_numpy(),
+        "skipped": skipped,
+    })
+
+    merged = log.merge(report, how="outer", left_on="transaction_reference", right_on="REF",
+                       indicator=True, sort=False)
+    in_log = merged["_merge"] != "right_only"
+    in_report = merged["_merge"] != "left_only"
+    expected_skip = merged["skipped"].fillna(False).astype(bool).to_numpy() & ~in_report.to_numpy()
+    difference = merged["amount_log"].fillna(0.0) - merged["amount_report"].fillna(0.0)
+    bad = (
+        (in_log & ~in_report)
+        | (in_report & ~in_log)
+        | (merged["account"] != merged["ACCOUNT"])
+        | (merged["type"] != merged["TYPE"])
+        | (difference.abs() > tolerance)
+    ).to_numpy() & ~expected_skip
+    merged["difference"] = difference.round(2)
+    mismatches = merged.loc[bad, MISMATCH_COLUMNS]
+    for column in ["transaction_reference", "REF"]:
+        mismatches[column] = mismatches[column].astype("Int64")
+    mismatches.to_csv(output_file, index=False)
+    return ReconciliationResult(len(log), len(report), int(expected_skip.sum()), mismatches.reset_index(drop=True),
+                                time.perf_counter() - start)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Reconcile the transaction log with cpf_report.csv.")
+    parser.add_argument('--log', default=LOG_FILE_PATH, help="transaction log (CSV or binary)")
+    parser.add_argument('--report', default=CPF_REPORT, help="report built from the log")
+    parser.add_argument('--output', default=OUTPUT_MISMATCHES, help="CSV file for the mismatching rows")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help="allowed amount difference")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    """Run the reconciliation; the exit status is 1 when there are mismatches, so it can gate a batch run."""
+    args = parse_args(argv)
+    result = reconcile(args.log, args.report, args.output, args.tolerance)
+    print(f"log rows: {result.log_rows:,}, report rows: {result.report_rows:,}, "
+          f"expected skips: {result.skipped:,}, mismatches: {len(result.mismatches):,} "
+          f"({result.elapsed:.2f} s) -> {args.output}")
+    return 0 if result.ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
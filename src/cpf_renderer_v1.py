@@ -0,0 +1,193 @@
+# cpf_renderer_v1.py
+from __init__ import SRC_DIR
+import sys
+from typing import Any, Callable, Dict, List, Tuple
+
+# Violet color ANSI escape code of the header, and the code that resets it
+VIOLET = "\033[35m"
+RESET = "\033[0m"
+TABLE_WIDTH = 150
+
+
+class Renderer:
+    """
+    Where main() in cpf_run_simulation_v9 sends what it used to print.
+    The simulation only passes values: the run summary to start(), every month's rounded
+    balances to month(), the age-55 transfer row to transfer() and one-off notes as a template
+    plus values to note(). Formatting, buffering and the progress bar belong to the renderer.
+    This base class renders nothing, so a headless run does no formatting or terminal I/O.
+    """
+    def start(self, info: Dict[str, Any], total: int, initial: int = 0) -> None:
+        """Run summary (startdate, enddate, birthdate, age, retirement_amount, balances) and the month count."""
+
+    def month(self, date_key: str, age: int, oa: float, sa: float, ma: float, ra: float,
+              loan: float, excess: float, payout: float) -> None:
+        """Balances at the end of one month."""
+
+    def transfer(self, date_key: str, age: int, oa: float, sa: float, ma: float, ra: float,
+                 loan: float, excess: float, payout: float) -> None:
+        """The amounts moved to the RA in the birthday month at 55 (the '<date_key>-cpf' row)."""
+
+    def note(self, template: str, **values: Any) -> None:
+        """A one-off message, template.format(**values)."""
+
+    def close(self) -> None:
+        """Write out whatever is still buffered."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+
+class TableRenderer(Renderer):
+    """
+    The interactive output: the violet run summary, one table row per month and the age-55
+    transfer row, as main() printed them. Rows are buffered and written once per simulated year
+    (after every December) and before any note; with `progress` a tqdm bar runs on stderr.
+    """
+    def __init__(self, stream=None, progress: bool = True):
+        self.stream = stream or sys.stdout
+        self.progress = progress
+        self._lines: List[str] = []
+        self._bar = None
+
+    def start(self, info: Dict[str, Any], total: int, initial: int = 0) -> None:
+        balances = info['balances']
+        self._lines += [
+            f"{VIOLET}{'Simulation of CPF Data':^{TABLE_WIDTH}}{RESET}",
+            f"{VIOLET}====================================={RESET}",
+            f"{VIOLET}== Start Date: {info['startdate']}{RESET}",
+            f"{VIOLET}== End Date: {info['enddate']}{RESET}",
+            f"{VIOLET}== Birth Date: {info['birthdate']}{RESET}",
+            f"{VIOLET}== Age: {info['age']}{RESET}",
+            f"{VIOLET}== Retirement Amount: {info['retirement_amount']:>18,.2f}{RESET}",
+            f"{VIOLET}== OA Balance Amount: {balances['oa']:>18,.2f}{RESET}",
+            f"{VIOLET}== SA Balance Amount: {balances['sa']:>18,.2f}{RESET}",
+            f"{VIOLET}== MA Balance Amount: {balances['ma']:>18,.2f}{RESET}",
+            f"{VIOLET}== Loan Balance Amount: {balances['loan']:>16,.2f}{RESET}",
+            f"{VIOLET}======================================{RESET}",
+            f"{VIOLET}{'-' * TABLE_WIDTH}{RESET}",
+            f"{'Month and Year':<15}{'Age':<5}{'OA Balance':<15}{'SA Balance':<15}{'MA Balance':<15}{'RA Balance':<15}"
+            f"{'Loan Amount':<12}{'Excess Cash':<12}{'CPF Payout':<12}",
+            "-" * TABLE_WIDTH,
+        ]
+        self.flush()
+        if self.progress:
+            from tqdm import tqdm
+            self._bar = tqdm(total=total, initial=initial, desc="Processing CPF Data", unit="month", colour="blue")
+
+    def month(self, date_key, age, oa, sa, ma, ra, loan, excess, payout) -> None:
+        self._lines.append(f"{date_key:<15}{age:<5}"
+                           f"{float(oa):<15,.2f}{float(sa):<15,.2f}"
+                           f"{float(ma):<15,.2f}{float(ra):<15,.2f}"
+                           f"{float(loan):<12,.2f}{float(excess):<12,.2f}"
+                           f"{float(payout):<12,.2f}")
+        if self._bar is not None:
+            self._bar.update()
+        if date_key.endswith("-12"):
+            self.flush()
+
+    def transfer(self, date_key, age, oa, sa, ma, ra, loan, excess, payout) -> None:
+        self._lines.append(f"{date_key}-cpf".ljust(15) + f"{age:<4}"
+                           f"{float(oa):<15,.2f}{sa:<15,.2f}"
+                           f"={float(ma):<14,.2f}+{float(ra):<14,.2f}"
+                           f"{float(loan):<13,.2f}{float(excess):<12,.2f}"
+                           f"{float(payout):<12,.2f}")
+
+    def note(self, template: str, **values: Any) -> None:
+        self._lines.append(template.format(**values))
+        self.flush()
+
+    def flush(self) -> None:
+        if self._lines:
+            self.stream.write("\n".join(self._lines) + "\n")
+            self.stream.flush()
+            self._lines = []
+
+    def close(self) -> None:
+        self.flush()
+        if self._bar is not None:
+            self._bar.close()
+            self._bar = None
+
+
+class ProgressRenderer(Renderer):
+    """Only the tqdm progress bar; notes are written above it with tqdm.write."""
+    def __init__(self):
+        self._bar = None
+
+    def start(self, info: Dict[str, Any], total: int, initial: int = 0) -> None:
+        from tqdm import tqdm
+        self._bar = tqdm(total=total, initial=initial, desc="Processing CPF Data", unit="month", colour="blue")
+
+    def month(self, date_key, age, oa, sa, ma, ra, loan, excess, payout) -> None:
+        self._bar.update()
+
+    def note(self, template: str, **values: Any) -> None:
+        from tqdm import tqdm
+        tqdm.write(template.format(**values))
+
+    def close(self) -> None:
+        if self._bar is not None:
+            self._bar.close()
+            self._bar = None
+
+
+class EventRenderer(Renderer):
+    """
+    Silent structured output: every call becomes an (event, payload) pair, passed to `callback`
+    when given and otherwise kept in `events`. Payloads are plain dicts of the values main()
+    passed; notes keep their template unformatted next to the values.
+    """
+    ROW_FIELDS = ("date_key", "age", "oa", "sa", "ma", "ra", "loan", "excess", "payout")
+
+    def __init__(self, callback: Callable[[str, Dict[str, Any]], None] = None):
+        self.events: List[Tuple[str, Dict[str, Any]]] = []
+        self.emit = callback or (lambda event, payload: self.events.append((event, payload)))
+
+    def start(self, info: Dict[str, Any], total: int, initial: int = 0) -> None:
+        self.emit("start", dict(info, total=total, initial=initial))
+
+    def month(self, *row) -> None:
+        self.emit("month", dict(zip(self.ROW_FIELDS, row)))
+
+    def transfer(self, *row) -> None:
+        self.emit("transfer", dict(zip(self.ROW_FIELDS, row)))
+
+    def note(self, template: str, **values: Any) -> None:
+        self.emit("note", dict(values, template=template))
+
+    def close(self) -> None:
+        self.emit("close", {})
+
+
+RENDERERS = {
+    'table': TableRenderer,
+    'progress': ProgressRenderer,
+    'events': EventRenderer,
+    'none': Renderer,
+}
+
+
+def make_renderer(name: str) -> Renderer:
+    """A renderer by RENDERERS name."""
+    if name not in RENDERERS:
+        raise ValueError(f"Unsupported renderer: {name}. Use one of {list(RENDERERS)}")
+    return RENDERERS[name]()
+
+
+if __name__ == "__main__":
+    # Example usage: the same two months through the table and the event renderer
+    info = {'startdate': "2025-05-01", 'enddate': "2025-06-30", 'birthdate': "1974-07-06", 'age': 50,
+            'retirement_amount': 106500.0, 'balances': {'oa': 1000.0, 'sa': 2000.0, 'ma': 3000.0, 'loan': 500.0}}
+    events = EventRenderer()
+    for renderer in (TableRenderer(progress=False), events):
+        with renderer:
+            renderer.start(info, total=2)
+            renderer.month("2025-05", 50, 1100.0, 2100.0, 3100.0, 0.0, 400.0, 0.0, 0.0)
+            renderer.month("2025-06", 50, 1200.0, 2200.0, 3200.0, 0.0, 300.0, 0.0, 0.0)
+            renderer.note("Stopping simulation at age {age} as RA balance is zero.", age=50)
+    print(events.events[1])
@@ -0,0 +1,254 @@
+# cpf_result_cache_v1.py
+from __init__ import SRC_DIR, CONFIG_FILENAME, DATABASE_NAME, LOG_FILE_PATH, RESULT_CACHE
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import tempfile
+import time
+import zlib
+from datetime import date, datetime
+from typing import Any, List, Optional, Tuple
+from cpf_config_loader_v11 import CPFConfig, CompiledCPFConfig
+from cpf_db_writer_v1 import CPFDataWriter, CPF_DATA_COLUMNS, new_run_id
+from cpf_binlog_v1 import binary_log_name
+from cpf_run_simulation_v9 import ENGINE_VERSION, main
+from cpf_renderer_v1 import Renderer
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024  # compressed size of all entries before the least recently used go
+CACHED_LOG_FORMATS = ["csv", "binary"]  # the log formats an entry can hold
+
+CREATE_CACHE_SQL = """
+    CREATE TABLE IF NOT EXISTS results (
+        key TEXT PRIMARY KEY,
+        engine_version TEXT NOT NULL,
+        log_format TEXT NOT NULL,
+        rows BLOB NOT NULL,
+        log BLOB NOT NULL,
+        size INTEGER NOT NULL,
+        created REAL NOT NULL,
+        last_used INTEGER NOT NULL
+    );
+"""
+
+
+def _canonical(value: Any) -> Any:
+    """Config values in a form that hashes the same however they were loaded or set."""
+    if isinstance(value, (datetime, date)):
+        return value.strftime("%Y-%m-%d")
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return value
+
+
+def config_hash(config, log_format: str = "csv") -> str:
+    """
+    SHA-256 of the config attributes (sorted, numbers as floats, dates as YYYY-MM-DD), the log
+    format and ENGINE_VERSION. The raw 'data' dict is left out: the engine only reads attributes.
+    """
+    values = config._values if isinstance(config, CompiledCPFConfig) else vars(config)
+    canonical = {key: _canonical(value) for key, value in values.items() if key != 'data'}
+    text = json.dumps([ENGINE_VERSION, log_format, canonical], sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class CachedResult:
+    """The outcome of one simulated config: cpf_data rows (without run_id) and the log file bytes."""
+    def __init__(self, key: str, rows: List[Tuple], log: bytes, log_format: str, hit: bool):
+        self.key = key
+        self.rows = rows
+        self.log = log
+        self.log_format = log_format
+        self.hit = hit
+
+    def write_outputs(self, database: str = DATABASE_NAME, log_file: str = LOG_FILE_PATH, run_id: str = None) -> str:
+        """Write the log to log_file (<name>.bin for a binary log) and the rows under run_id; returns the run_id."""
+        filename = binary_log_name(log_file) if self.log_format == "binary" else log_file
+        with open(filename, "wb") as f:
+            f.write(self.log)
+        with CPFDataWriter(database, run_id=run_id, batch_size=max(len(self.rows), 1)) as writer:
+            for row in self.rows:
+                writer.add_row(*row)
+        return writer.run_id
+
+    def __repr__(self):
+        return f"CachedResult(key={self.key[:12]}..., rows={len(self.rows)}, log={len(self.log):,} bytes, hit={self.hit})"
+
+
+class ResultCache:
+    """
+    Content-addressed store of simulation results in one SQLite file.
+    Entries are keyed by config_hash(), so a changed config or ENGINE_VERSION never hits a stale
+    entry. Rows and log are zlib-compressed; when the entries exceed `max_bytes` the least
+    recently used are evicted.
+    """
+    def __init__(self, path: str = RESULT_CACHE, max_bytes: int = DEFAULT_MAX_BYTES):
+        if max_bytes is None or max_bytes < 1:
+            raise ValueError(f"max_bytes must be a positive integer, got {max_bytes}")
+        self.path = path
+        self.max_bytes = max_bytes
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        with self.conn:
+            self.conn.execute(CREATE_CACHE_SQL)
+
+    def get(self, config, log_format: str = "csv") -> Optional[CachedResult]:
+        """The cached result of `config`, or None."""
+        key = config_hash(config, log_format)
+        row = self.conn.execute("SELECT rows, log FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        with self.conn:
+            self.conn.execute("UPDATE results SET last_used = ? WHERE key = ?", (time.time_ns(), key))
+        return CachedResult(key, pickle.loads(zlib.decompress(row[0])), zlib.decompress(row[1]), log_format, hit=True)
+
+    def put(self, config, rows: List[Tuple], log: bytes, log_format: str = "csv") -> CachedResult:
+        """Store the result of `config` and evict down to max_bytes; an entry larger than that is not kept."""
+        key = config_hash(config, log_format)
+        rows_blob = zlib.compress(pickle.dumps([tuple(row) for row in rows], protocol=pickle.HIGHEST_PROTOCOL), 1)
+        log_blob = zlib.compress(log, 1)
+        size = len(rows_blob) + len(log_blob)
+        if size <= self.max_bytes:
+            with self.conn:
+                self.conn.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                  (key, ENGINE_VERSION, log_format, rows_blob, log_blob, size, time.time(), time.time_ns()))
+            self.evict()
+        return CachedResult(key, list(rows), log, log_format, hit=False)
+
+    def evict(self) -> int:
+        """Drop least recently used entries until the cache fits in max_bytes; returns how many went."""
+        total = self.size()
+        if total <= self.max_bytes:
+            return 0
+        victims = []
+        for key, size in self.conn.execute("SELECT key, size FROM results ORDER BY last_used"):
+            if total <= self.max_bytes:
+                break
+            victims.append((key,))
+            total -= size
+        with self.conn:
+            self.conn.executemany("DELETE FROM results WHERE key = ?", victims)
+        return len(victims)
+
+    def invalidate(self, config=None, log_format: str = None, key: str = None) -> int:
+        """Remove the entries of one config (all log formats unless given) or one key; returns how many."""
+        if key is not None:
+            keys = [key]
+        elif config is not None:
+            keys = self._keys(config, log_format)
+        else:
+            raise ValueError("Give the config or the key of the entry to invalidate.")
+        with self.conn:
+            return sum(self.conn.execute("DELETE FROM results WHERE key = ?", (k,)).rowcount for k in keys)
+
+    def invalidate_stale(self) -> int:
+        """Remove the entries of other engine versions, which can no longer hit."""
+        with self.conn:
+            return self.conn.execute("DELETE FROM results WHERE engine_version != ?", (ENGINE_VERSION,)).rowcount
+
+    def clear(self) -> int:
+        with self.conn:
+            return self.conn.execute("DELETE FROM results").rowcount
+
+    def size(self) -> int:
+        """Total compressed size of the entries in bytes."""
+        return self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    @staticmethod
+    def _keys(config, log_format: str = None) -> List[str]:
+        """The keys of a config's entries: of one log format, or of every CACHED_LOG_FORMATS one."""
+        return [config_hash(config, fmt) for fmt in ([log_format] if log_format else CACHED_LOG_FORMATS)]
+
+    def contains(self, config, log_format: str = None) -> bool:
+        """Whether a config has an entry, in `log_format` or (by default) in any log format."""
+        keys = self._keys(config, log_format)
+        query = f"SELECT 1 FROM results WHERE key IN ({', '.join('?' * len(keys))})"
+        return self.conn.execute(query, keys).fetchone() is not None
+
+    def __contains__(self, config):
+        return self.contains(config)
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+
+def read_run(database: str, run_id: str) -> List[Tuple]:
+    """The cpf_data rows of a run, without the run_id column, in month order."""
+    conn = sqlite3.connect(database)
+    try:
+        return conn.execute(f"SELECT {', '.join(CPF_DATA_COLUMNS[1:])} FROM cpf_data WHERE run_id = ? ORDER BY dbreference",
+                            (run_id,)).fetchall()
+    finally:
+        conn.close()
+
+
+def run_cached(config: CPFConfig = None, cache: ResultCache = None, database: str = DATABASE_NAME,
+               log_file: str = LOG_FILE_PATH, run_id: str = None, log_format: str = "csv",
+               write_outputs: bool = True) -> CachedResult:
+    """
+    Return the result of `config`, simulating only when it is not cached.
+    With write_outputs the log file and the cpf_data rows (under run_id) are written as by
+    main(), from the cache on a hit; without, a miss is simulated in a temporary directory and
+    nothing outside the cache is touched.
+    """
+    if config is None:
+        config = CPFConfig(CONFIG_FILENAME)
+    own_cache = cache is None
+    cache = cache or ResultCache()
+    try:
+        result = cache.get(config, log_format)
+        if result is not None:
+            if write_outputs:
+                result.write_outputs(database, log_file, run_id)
+            return result
+        run_id = run_id or new_run_id()
+        with tempfile.TemporaryDirectory() as workdir:
+            if not write_outputs:
+                database = os.path.join(workdir, "cpf_simulation.db")
+                log_file = os.path.join(workdir, "cpf_log_file.csv")
+            main(config, database=database, log_file=log_file, run_id=run_id, log_format=log_format, renderer=Renderer())
+            with open(binary_log_name(log_file) if log_format == "binary" else log_file, "rb") as f:
+                log = f.read()
+            return cache.put(config, read_run(database, run_id), log, log_format)
+    finally:
+        if own_cache:
+            cache.close()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate a config through the result cache.")
+    parser.add_argument('--config', default=CONFIG_FILENAME, help="configuration file")
+    parser.add_argument('--log-format', choices=['csv', 'binary'], default='csv', help="transaction log format")
+    parser.add_argument('--no-outputs', action='store_true', help="do not write the log file and cpf_data rows")
+    parser.add_argument('--invalidate', action='store_true', help="drop the cached result of the config")
+    parser.add_argument('--clear', action='store_true', help="drop every cached result")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    config = CPFConfig(args.config)
+    with ResultCache() as cache:
+        if args.clear or args.invalidate:
+            removed = cache.clear() if args.clear else cache.invalidate(config)
+            print(f"{removed} cached result(s) removed")
+        else:
+            start = time.perf_counter()
+            result = run_cached(config, cache, log_format=args.log_format, write_outputs=not args.no_outputs)
+            print(f"{'hit' if result.hit else 'miss'}: {len(result.rows)} rows, {len(result.log):,} log bytes "
+                  f"in {(time.perf_counter() - start) * 1000:.1f} ms")
+        print(f"cache: {len(cache)} entries, {cache.size():,} bytes")
@@ -0,0 +1,401 @@
+from cpf_config_loader_v11 import CPFConfig, compile_config
+from cpf_program_v11 import account_class, START_REFERENCE
+from cpf_date_generator_v3 import DateGenerator, age_on
+from cpf_db_writer_v1 import CPFDataWriter, DEFAULT_BATCH_SIZE
+from cpf_ledger_v1 import TransactionLedger, RA
+from cpf_binlog_v1 import log_sink, LOG_FORMATS
+from cpf_checkpoint_v1 import (CHECKPOINT_KINDS, checkpoint_positions, latest_run, find_resume_point,
+                               load_log_prefix, prefix_balances_match, replay_log_prefix, RunLogSeal)
+from cpf_money_v1 import MONEY_MODES
+from cpf_metrics_v1 import RunMetrics, NULL_METRICS, RUN_METRICS_JSON
+from cpf_renderer_v1 import Renderer, TableRenderer, RENDERERS, make_renderer
+from cpf_schedule_v1 import build_schedule
+import argparse
+import itertools
+import os
+import json
+import pickle
+import sys
+from datetime import datetime, timedelta, date
+
+# Dynamically determine the src directory
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))  # Path to the src directory
+CONFIG_FILENAME = os.path.join(SRC_DIR, 'cpf_config.json')  # Full path to the config file
+DATABASE_NAME = os.path.join(SRC_DIR, 'cpf_simulation.db')  # Full path to the database file
+LOG_FILE_PATH = os.path.join(SRC_DIR, 'cpf_log_file.csv')  # Full path to the transaction log
+DATE_KEYS = ['startdate', 'enddate', 'birthdate']
+DATE_FORMAT = "%Y-%m-%d"
+ENGINE_VERSION = "9.2"  # bump whenever a change alters the simulated cpf_data rows or transaction log
+
+# Load the configuration file
+#config_loader = ConfigLoader(CONFIG_FILENAME)
+
+def loan_computation_first_three_years(cpf):
+    # Corrected implementation for loan_payments
+    #loan_payments = cpf.config.getdata('loanpayments', {})
+    payment_key = 'year12' if cpf.age < 24 else 'year3'
+    float(getattr(cpf.config, f'loanpayments{payment_key}', 0.0)) 
+
+def compute_age(startdate : datetime.date, birthdate : datetime.date) -> int:
+    """
+    Compute the age based on the start date and birth date.
+    The age increments by 1 every July 6.
+    """
+    # Calculate the base age
+    base_age = age_on(startdate, birthdate)
+    #if startdate.month >= birthdate.month:
+    #    base_age += 1
+    return  base_age
+                
+                
+def main(config_loader: CPFConfig = None, database: str = DATABASE_NAME, log_file: str = LOG_FILE_PATH,
+         run_id: str = None, batch_size: int = DEFAULT_BATCH_SIZE, journal_mode: str = 'WAL', synchronous: str = 'NORMAL',
+         log_format: str = 'csv', checkpoint_at=CHECKPOINT_KINDS, resume_from: str = None, date_list: str = None,
+         metrics: RunMetrics = None, renderer: Renderer = None, money: str = 'float'):
+    """
+    Run the monthly CPF simulation.
+    The cpf_data rows are buffered and committed in batches of `batch_size` under `run_id`
+    (a timestamp when not given), so several runs can share cpf_simulation.db.
+    With log_format='binary' the transaction log is written as <log_file>.bin (see cpf_binlog_v1),
+    with 'none' it is not written. The month list goes to `date_list` (cpf_date_list.csv by default).
+    The state is checkpointed after the months in `checkpoint_at` (see cpf_checkpoint_v1; None
+    or [] to disable). With `resume_from` (a run_id, or 'latest') the run continues from the
+    latest checkpoint of that run that the config changes do not affect: its log and cpf_data
+    rows up to the checkpoint are copied and only the remaining months are simulated.
+    With `metrics` (a cpf_metrics_v1.RunMetrics) the time and calls of every step and the log
+    and database counters are recorded and saved to the run_metrics table of `database`.
+    Everything shown to the user goes through `renderer` (see cpf_renderer_v1; default: the
+    buffered TableRenderer with a progress bar); the loop itself formats no text.
+    With money='cents' the balances are kept as integer cents (see cpf_money_v1 and
+    CentsCPFAccount); a run only resumes from checkpoints of the same money mode.
+    """
+    if renderer is None:
+        renderer = TableRenderer()
+    account_type = account_class(money)
+    metrics = metrics or NULL_METRICS
+    lap = metrics.lap
+    metrics.start()
+    # Step 1: Load the configuration
+    if config_loader is None:
+        config_loader = CPFConfig(CONFIG_FILENAME)
+    rates = compile_config(config_loader)  # age-indexed tables for the monthly lookups
+    startdate = rates.startdate
+    enddate = rates.enddate
+    birthdate = rates.birthdate
+    payouttype = rates.payouttype
+    if rates.pledgeyourhdbat55.lower() == 'no':
+        retirement_amount = rates.retirement_sums.get(payouttype, 0)
+    else: 
+        retirement_amount = rates.retirement_sums['frs'] /2
+    
+    # Validate that the dates are loaded correctly
+    if not all([startdate, enddate, birthdate]):
+        raise ValueError("Missing required date values in the configuration file. Please check 'startdate', 'enddate', and 'birthdate'.")
+
+    # Step 2: Generate the date dictionary
+    dategen = DateGenerator(start_date=startdate, end_date=enddate, birth_date=birthdate)
+    calendar = dategen.generate_calendar()  # month-end dates and ages as arrays
+    dategen.save_file(dategen.date_list, format='csv', filename=date_list)  # Step 3 Save the date_dict to file after generation
+  
+    if not len(calendar):
+        renderer.note("Error: date_dict is empty. Loop will not run.")
+        renderer.close()
+        return  # Exit if empty
+    schedule = build_schedule(rates, calendar)  # the loan, allocation, interest, payout and transfer events of every month
+
+    checkpoints = checkpoint_positions(calendar, rates, checkpoint_at)
+    checkpoint = None
+    if resume_from is not None:
+        source_run = latest_run(database) if resume_from == 'latest' else resume_from
+        if source_run is not None:
+            checkpoint, source_log = find_resume_point(database, source_run, rates, calendar, money)
+        if checkpoint is not None:
+            # read the prefix before this run's log replaces the file, and check it led to the checkpoint
+            try:
+                prefix = load_log_prefix(source_log['log_file'], source_log['log_format'],
+                                         checkpoint.state['transaction_reference'] - START_REFERENCE)
+            except (OSError, ValueError):
+                prefix = None
+            if prefix is None or not prefix_balances_match(prefix[0], checkpoint.state):
+                checkpoint = None
+        if checkpoint is None:
+            renderer.note("No usable checkpoint in run {run_id}; simulating from the start date.", run_id=source_run)
+
+    is_initial = checkpoint is None
+    is_display_special_july = False
+    orig_oa_bal = orig_sa_bal = orig_ma_bal = orig_loan_bal = orig_cpf_payout = None
+    # Step 4: Calculate CPF per month using CPFAccount
+    # the seal is entered first so it records the log's signature after the account has closed it
+    with RunLogSeal(database) as seal, account_type(rates, ledger=TransactionLedger(log_sink(log_file, log_format))) as cpf:
+        # Step 5  Set the initial values
+        cpf.startdate = cpf.convert_date_strings(key='startdate', date_str=startdate)
+        cpf.enddate = cpf.convert_date_strings(key='enddate', date_str=enddate)
+        cpf.birthdate = cpf.convert_date_strings(key='birthdate', date_str=birthdate)
+        cpf.current_date =  cpf.startdate
+        cpf.age = compute_age(cpf.startdate, cpf.birthdate)
+        cpf.date_key = cpf.current_date.strftime('%Y-%m')
+        
+       
+     
+        # Step 6-7 hand the run summary to the renderer, which shows the headers
+        start = 0 if checkpoint is None else checkpoint.position + 1
+        renderer.start({'startdate': cpf.startdate, 'enddate': cpf.enddate, 'birthdate': cpf.birthdate, 'age': cpf.age,
+                        'retirement_amount': retirement_amount, 'balances': rates.balances}, len(calendar), start)
+
+        # Step 8  determine if inital balance is needed.
+        if checkpoint is not None:
+            renderer.note("Resuming run {run_id} after {date_key} ({kind} checkpoint)...",
+                          run_id=checkpoint.run_id, date_key=checkpoint.date_key, kind=checkpoint.kind)
+            state = checkpoint.state
+            cpf.restore(state)
+            replay_log_prefix(cpf.ledger, *prefix)
+            is_display_special_july = state['is_display_special_july']
+            orig_oa_bal, orig_sa_bal, orig_ma_bal, orig_loan_bal, orig_cpf_payout = state['special_july']
+        if is_initial:
+            renderer.note("Loading initial balances from config...")
+            # Use property setters to ensure logging                                                                                                            
+            # Step 9 set the initial balances
+           
+            #Step 10 record the initial balances
+            for account in ['oa', 'sa', 'ma', 'ra', 'excess', 'loan']:
+                cpf.record_inflow(account=account, amount=rates.balances[account], message=f"Initial Balance of {account}")
+            is_initial = False
+            
+       #  Step 11 the loan payments of each month are in the schedule (see cpf_loan_v1)
+      
+        with CPFDataWriter(database, run_id=run_id, batch_size=batch_size,
+                           journal_mode=journal_mode, synchronous=synchronous) as writer, renderer:
+            if checkpoints or checkpoint is not None:
+                writer.start_run(pickle.dumps(rates), getattr(cpf.ledger.sink, 'filename', None), log_format)
+                seal.register(writer.run_id, getattr(cpf.ledger.sink, 'filename', None))
+            if checkpoint is not None:
+                writer.copy_run(checkpoint.run_id, checkpoint.position, checkpoint.state['dbreference'])
+            ###################################################################################
+            # LOOP STARTS HERE
+            ###################################################################################
+           
+            months = itertools.islice(zip(calendar.rows(), schedule.months()), start, None)
+            balances = cpf.balances  # the account state, indexed by OA ... LOAN (in dollars, or cents)
+            lap('setup')
+            for position, ((date_key, period_start, period_end, age), events) in enumerate(months, start):
+                lap('progress')
+                # Step 12: Update the current date and age
+                cpf.dbreference = cpf.add_db_reference() #this is a unique reference for logging.
+                cpf.date_key = date_key
+                cpf.current_date = period_end #just get the values already generated.
+                cpf.age = age
+                lap('age_update')
+
+                # Step 13 loan payments from the amortization schedule (see cpf_loan_v1): the whole
+                # payment leaves the OA, its principal part reduces the loan
+                if events.loan is not None:
+                    phase, loan_payment, loan_principal, message = events.loan
+                    cpf.record_outflow(account='oa',   amount=loan_payment, message=message)
+                    cpf.record_outflow(account='loan', amount=loan_principal, message=message)
+                lap('loans')
+                # Steps 14-16 Allocation of CPF Salaries by the scheduled bracket: below 55 (and in the
+                # transfer month at 55) to the OA, SA and MA, from 55 to the OA, MA and RA by age
+                for account, amount, message in events.allocations:
+                    cpf.record_inflow(account=account, amount=amount, message=message)
+                lap('allocation')
+
+                # Steps 17-18 Apply interest and extra interest at the end of the year
+                if events.interest is not None:
+                    cpf.credit_interest(*events.interest)
+                lap('interest')
+
+                # Step 19 CPF payout: the scheduled amount from the payout age, capped by the RA
+                cpf.pay_out(events.payout, events.payout_message)
+                lap('payout')
+                if events.stop and balances[RA] == 0.0:
+                    renderer.note("Stopping simulation at age {age} as RA balance is zero.", age=cpf.age)
+                    break
+
+
+                # Step 20 Display balances including July 2029
+                cpf.date_key = date_key
+                oa_bal, sa_bal, ma_bal, ra_bal, loan_bal, excess_bal = cpf.balance_row()
+                payout = cpf.payout.__round__(2)
+                renderer.month(date_key, cpf.age, oa_bal, sa_bal, ma_bal, ra_bal, loan_bal, excess_bal, cpf.payout)
+                
+                
+                
+                # Step 21 Special case for the birthday month at age 55 (the scheduled transfer)
+                if events.transfer is not None:
+                    is_display_special_july = True
+                    orig_oa_bal = oa_bal
+                    orig_sa_bal = sa_bal
+                    orig_ma_bal = ma_bal
+                    orig_loan_bal = loan_bal
+                    orig_cpf_payout = payout
+                
+                 # this is to print a special information for birthday month at age 55                         
+                if is_display_special_july:    
+                    # Step 22 Special printing for age 55 and month 7
+                                        
+                    # RA is set to the chosen retirement sum, or FRS / 2 if you pledged your hdb house at age 55
+                    retirement_amount = rates.transfer_amount
+                    display_oa_bal = -orig_oa_bal
+                    display_sa_bal = -orig_sa_bal
+                    display_ma_bal = orig_ma_bal
+                    display_loan_bal = -orig_loan_bal if loan_bal > 0 else 0.0             
+                    display_ra_bal =  retirement_amount
+                    display_excess_bal = (orig_oa_bal + orig_sa_bal - orig_loan_bal - retirement_amount)
+                    display_cpf_payout = orig_cpf_payout
+                                                       
+                    renderer.transfer(date_key, cpf.age, display_oa_bal, display_sa_bal, display_ma_bal, display_ra_bal,
+                                      display_loan_bal, display_excess_bal, display_cpf_payout)
+                    lap('display')
+
+                    
+                      
+                    # Step 23 Record the special case in the database
+                    cpf.record_inflow(account= 'oa',  amount= display_oa_bal,  message= events.transfer)
+                    cpf.record_inflow(account= 'sa',  amount= display_sa_bal,  message= events.transfer)
+                    cpf.record_inflow(account= 'loan',amount= display_loan_bal,message= events.transfer)
+                    cpf.record_inflow(account= 'ra',  amount= display_ra_bal,  message= events.transfer)
+                    cpf.record_inflow(account= 'excess',amount= display_excess_bal,message= events.transfer)
+                    lap('transfer')
+                    
+                    
+                    is_display_special_july = False   
+                else:
+                    lap('display')
+                    
+                # Step 24 Insert data into the database for every iteration
+                if events.ra_zero_message is not None and balances[RA] == 0.0:
+                    cpf.message = events.ra_zero_message
+                else:
+                    cpf.message = events.row_message
+                if not is_display_special_july:
+                    cpf.insert_data(writer, str(date_key),int(cpf.dbreference) ,int(cpf.age), float(oa_bal), float(sa_bal), float(ma_bal), float(ra_bal), float(loan_bal), float(excess_bal), float(payout),str(cpf.message))
+                lap('db_insert')
+
+                # Step 25 Checkpoint the state after this month (see cpf_checkpoint_v1)
+                if position in checkpoints:
+                    state = cpf.snapshot()
+                    state.update(year=position + 2, is_display_special_july=is_display_special_july,
+                                 special_july=[orig_oa_bal, orig_sa_bal, orig_ma_bal, orig_loan_bal, orig_cpf_payout])
+                    writer.add_checkpoint(position, date_key, cpf.age, checkpoints[position], json.dumps(state))
+                    lap('checkpoint')
+        lap('close_db')
+    lap('close_log')
+    metrics.collect(cpf.ledger, writer)
+    metrics.stop()
+    if metrics.enabled:
+        metrics.save(database)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the monthly CPF simulation.")
+    parser.add_argument('--config', default=CONFIG_FILENAME, help="configuration file")
+    parser.add_argument('--run-id', default=None, help="run_id of the cpf_data rows (default: a timestamp)")
+    parser.add_argument('--database', default=DATABASE_NAME, help="SQLite database of the cpf_data rows")
+    parser.add_argument('--log-file', default=LOG_FILE_PATH, help="transaction log (written as <name>.bin with --log-format binary)")
+    parser.add_argument('--log-format', choices=LOG_FORMATS, default='csv', help="transaction log format")
+    parser.add_argument('--resume', nargs='?', const='latest', default=None, metavar='RUN_ID',
+                        help="continue from the latest usable checkpoint of a run (default: the latest run)")
+    parser.add_argument('--no-checkpoints', action='store_true', help="do not save checkpoints")
+    parser.add_argument('--renderer', choices=[name for name in RENDERERS if name != 'events'], default='table',
+                        help="table: balances per month (default), progress: progress bar only, none: no output")
+    parser.add_argument('--metrics', nargs='?', const=RUN_METRICS_JSON, default=None, metavar='FILE',
+                        help="time every step, save the timings to run_metrics and FILE and print them")
+    parser.add_argument('--money', choices=MONEY_MODES, default='float',
+                        help="float: balances rounded to cents after every change (default), cents: integer cents")
+    return parser.parse_args(argv)
+
+
+def cli(argv=None) -> int:
+    """Run the simulation with the options of parse_args (also `cpf_cli_v1.py simulate`)."""
+    args = parse_args(argv)
+    metrics = RunMetrics() if args.metrics else None
+    main(CPFConfig(args.config), database=args.database, log_file=args.log_file, run_id=args.run_id,
+         log_format=args.log_format, checkpoint_at=[] if args.no_checkpoints else CHECKPOINT_KINDS,
+         resume_from=args.resume, metrics=metrics, renderer=make_renderer(args.renderer), money=args.money)
+    if metrics is not None:
+        metrics.save_json(args.metrics)
+        print(metrics.report())
+    return 0
+
+
+if __name__ == "__main__":
+    # Call the main function 
+    sys.exit(cli())
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
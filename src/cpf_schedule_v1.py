@@ -0,0 +1,180 @@
+# cpf_schedule_v1.py
+from __init__ import SRC_DIR, CONFIG_FILENAME
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from cpf_config_loader_v11 import CPFConfig, compile_config, to_date
+from cpf_loan_v1 import loan_schedule
+
+# Event kinds of a month, in the order the run loop applies them
+EVENT_KINDS = ['loan_payment', 'allocate', 'interest', 'extra_interest', 'payout', 'stop', 'transfer']
+LOAN_PHASES = (1, 2, 3, 4)  # year 1, 2, 3 and 4-and-beyond of the loan payments, by month of the run
+BELOW55, ABOVE55 = 'below55', 'above55'  # allocation brackets; the transfer month at 55 still allocates below55
+
+
+class MonthEvents:
+    """
+    What happens in one month of the run, resolved ahead of time.
+    `loan` is (phase, OA debit, loan credit, message) or None, `allocations` the (account, amount, message)
+    inflows, `interest` the (interest, extra interest) messages of a December or None, `payout`
+    the amount due before the RA cap, `stop` whether the month ends the run once the RA is empty,
+    and `transfer` the message of the age-55 transfer or None. Only the balance-dependent
+    parts (the RA cap, the interest amounts, the stop itself) are left to the loop.
+    """
+    __slots__ = ("position", "age", "loan", "bracket", "allocations", "interest", "payout", "payout_message",
+                 "stop", "transfer", "row_message", "ra_zero_message")
+
+    def __init__(self, position: int, age: int, loan, bracket: str, allocations, interest, payout, payout_message: str,
+                 stop: bool, transfer: Optional[str], row_message: str, ra_zero_message: Optional[str]):
+        self.position = position
+        self.age = age
+        self.loan = loan
+        self.bracket = bracket
+        self.allocations = allocations
+        self.interest = interest
+        self.payout = payout
+        self.payout_message = payout_message
+        self.stop = stop
+        self.transfer = transfer
+        self.row_message = row_message
+        self.ra_zero_message = ra_zero_message
+
+    def events(self) -> List[Tuple[str, Any]]:
+        """The month as an ordered list of (kind, detail) pairs, kinds as in EVENT_KINDS."""
+        events = []
+        if self.loan is not None:
+            events.append(('loan_payment', self.loan))
+        events.append(('allocate', (self.bracket, self.allocations)))
+        if self.interest is not None:
+            events.append(('interest', self.interest[0]))
+            events.append(('extra_interest', self.interest[1]))
+        if self.payout:
+            events.append(('payout', (self.payout, self.payout_message)))
+        if self.stop:
+            events.append(('stop', self.ra_zero_message))
+        if self.transfer is not None:
+            events.append(('transfer', self.transfer))
+        return events
+
+    def __repr__(self):
+        return f"MonthEvents({self.position}, age={self.age}, {[kind for kind, _ in self.events()]})"
+
+
+class EventSchedule:
+    """
+    The event calendar of a run: for every month of the calendar, which loan phase pays, which
+    allocation bracket applies, whether interest is due, the payout due and whether the month is
+    the age-55 transfer. It is derived once from the month calendar columns (see
+    cpf_date_generator_v3.month_calendar) and the config, as arrays for the vectorized engines
+    and as one MonthEvents per month for the scalar loop of cpf_run_simulation_v9.
+    """
+    def __init__(self, config, columns: Dict[str, np.ndarray]):
+        self.rates = rates = compile_config(config)
+        birthdate = to_date('birthdate', rates.birthdate)
+        self.age = age = columns["age"]
+        self.month = month = columns["month"]
+        self.n = n = len(age)
+
+        # Step 15: the birthday month at 55 closes the SA and moves the balances to the RA
+        transfer = np.flatnonzero((age == 55) & (month == birthdate.month))
+        self.transfer_index = int(transfer[0]) if len(transfer) else n
+        self.is_transfer = np.zeros(n, dtype=bool)
+        self.is_transfer[self.transfer_index:self.transfer_index + 1] = True
+        # Step 13: the loan phase counts the months of the run; the payments come from the
+        # amortization schedule of the config's loans, which the transfer settles
+        self.loan_phase = np.minimum(np.arange(1, n + 1), LOAN_PHASES[-1])
+        self.loans = loan_schedule(rates, n, self.transfer_index)
+        self.has_loan = self.loans.payment != 0
+        # Steps 14-16: allocation bracket
+        self.below55 = (age < 55) | self.is_transfer
+        # Step 17: December interest; Step 19: payout from cpfpayoutage
+        self.is_interest = month == 12
+        self.payout_due = age >= rates.cpfpayoutage
+        self.payout_amount = rates.retirement_payouts.get(rates.payouttype, 0.0)
+        # the months whose balances are not just the ordinary flows
+        self.special = self.is_interest | self.is_transfer
+        self._months = None
+
+    def months(self) -> List[MonthEvents]:
+        """One MonthEvents per month of the calendar (built on first use)."""
+        if self._months is None:
+            self._months = self._build_months()
+        return self._months
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, position: int) -> MonthEvents:
+        return self.months()[position]
+
+    def _build_months(self) -> List[MonthEvents]:
+        payments, principals = self.loans.payments()
+        payout_amount = self.payout_amount
+        by_age: Dict[Tuple[int, bool], Dict[str, Any]] = {}
+        months = []
+        for position, (age, month, has_loan, phase, below55, interest, payout_due, transfer) in enumerate(zip(
+                self.age.tolist(), self.month.tolist(), self.has_loan.tolist(), self.loan_phase.tolist(),
+                self.below55.tolist(), self.is_interest.tolist(), self.payout_due.tolist(), self.is_transfer.tolist())):
+            # everything but the loan phase and the month depends on the age and bracket only
+            key = (age, below55)
+            parts = by_age.get(key)
+            if parts is None:
+                parts = by_age[key] = self._age_parts(age, below55)
+            loan = None
+            if has_loan:
+                loan = (phase, payments[position], principals[position], parts['loan_messages'][phase])
+            months.append(MonthEvents(
+                position, age, loan, BELOW55 if below55 else ABOVE55, parts['allocations'],
+                parts['interest'] if interest else None,
+                payout_amount if payout_due else 0.0, parts['payout_message'],
+                age > 55, parts['transfer'] if transfer else None,
+                parts['december_message'] if interest else parts['row_message'], parts['ra_zero_message']))
+        return months
+
+    def _age_parts(self, age: int, below55: bool) -> Dict[str, Any]:
+        """The messages and allocations shared by every month at `age` in one bracket."""
+        rates = self.rates
+        if below55:
+            allocations = tuple((account, rates.allocation_below55[account], f"Allocation for {label} at age {age}")
+                                for account, label in [('oa', 'OA'), ('sa', 'SA'), ('ma', 'MA')])
+        else:
+            allocations = tuple((account, rates.allocation[account][age], f"Allocation for {account} at age {age}")
+                                for account in ['oa', 'ma', 'ra'])
+        # Step 24 message of the cpf_data row, the RA-empty case aside
+        if age == 55:
+            row_message = december_message = "Age 55 - Special case for CPF payout"
+        elif age == 67:
+            row_message = december_message = f"Age {age} - CPF payout"
+        else:
+            row_message = f"Age {age} - Regular CPF calculation"
+            december_message = f"End of year {age} - CPF Interest"
+        return {
+            'allocations': allocations,
+            'loan_messages': {phase: f"Loan payment from OA Account at year {phase} age {age}" if phase < 4
+                              else f"Loan payment from OA Account at year 4, age {age}" for phase in LOAN_PHASES},
+            # the interest loop of Step 17 leaves `account` at 'ra' for every message
+            'interest': (f"Interest for ra at age {age}", f"Extra Interest for ra at age {age}"),
+            'payout_message': f"CPF payout at age {age}",
+            'transfer': f"transfer_cpf_age={age}",
+            'row_message': row_message,
+            'december_message': december_message,
+            'ra_zero_message': f"Age {age} - RA balance is zero" if age > 55 else None,
+        }
+
+
+def build_schedule(config, calendar) -> EventSchedule:
+    """The EventSchedule of a config over a MonthCalendar (see DateGenerator.generate_calendar)."""
+    return EventSchedule(config, calendar.columns)
+
+
+if __name__ == "__main__":
+    # Example usage: the event calendar around the age-55 transfer
+    from cpf_date_generator_v3 import DateGenerator
+    rates = compile_config(CPFConfig(CONFIG_FILENAME))
+    calendar = DateGenerator(start_date=rates.startdate, end_date=rates.enddate,
+                             birth_date=rates.birthdate).generate_calendar()
+    schedule = build_schedule(rates, calendar)
+    print(f"{len(schedule)} months, transfer at month {schedule.transfer_index}, "
+          f"{int(schedule.is_interest.sum())} interest months, payout from month "
+          f"{int(np.argmax(schedule.payout_due)) if schedule.payout_due.any() else None}")
+    for position in range(max(schedule.transfer_index - 1, 0), min(schedule.transfer_index + 2, len(schedule))):
+        print(calendar.date_keys[position], schedule[position].events())
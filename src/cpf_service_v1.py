@@ -0,0 +1,515 @@
+# cpf_service_v1.py
+from __init__ import SRC_DIR, CONFIG_FILENAME
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import queue as queues
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+DEFAULT_HOST = "127.0.0.1"  # local only; the service has no authentication
+DEFAULT_PORT = 8502         # 8501 is the interactive front end of `make docker-run`
+DEFAULT_TIMEOUT = 60.0      # seconds a request may wait for its simulation
+MAX_BODY = 1024 * 1024
+STREAM_CHUNK_QUEUE = 8      # simulated years buffered between a streaming worker and its client
+STREAM_POLL = 0.1           # seconds between the stop checks of a streaming worker and its handler
+
+ROW_COLUMNS = ["date_key", "age", "oa", "sa", "ma", "ra", "loan", "excess", "payout"]  # EventRenderer.ROW_FIELDS
+HTTP_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large",
+                500: "Internal Server Error", 503: "Service Unavailable", 504: "Gateway Timeout"}
+
+# ------------------------------------------------------------------ worker processes
+_BASE_CONFIG = None
+
+
+def _preload(config_filename: str) -> None:
+    """Pool initializer: import the simulation once and load the base config the requests override."""
+    global _BASE_CONFIG
+    import cpf_run_simulation_v9  # noqa: F401  (the import is the preloading)
+    from cpf_config_loader_v11 import CPFConfig
+    _BASE_CONFIG = CPFConfig(config_filename)
+
+
+def _run(overrides: Dict[str, Any], emit) -> None:
+    """Simulate the base config with `overrides`, headless and without files, sending renderer events to emit."""
+    from cpf_run_simulation_v9 import main
+    from cpf_renderer_v1 import EventRenderer
+    from cpf_sweep_v1 import apply_overrides
+    main(apply_overrides(_BASE_CONFIG, overrides), database=":memory:", log_format="none", checkpoint_at=[],
+         date_list=os.devnull, renderer=EventRenderer(emit))
+
+
+def simulate(overrides: Dict[str, Any]) -> Dict[str, Any]:
+    """Worker: the monthly rows, the age-55 transfer row and the notes of one simulation."""
+    result = {'columns': ROW_COLUMNS, 'rows': [], 'transfer': None, 'notes': []}
+
+    def emit(event, payload):
+        if event == 'month':
+            result['rows'].append([payload[column] for column in ROW_COLUMNS])
+        elif event == 'transfer':
+            result['transfer'] = [payload[column] for column in ROW_COLUMNS]
+        elif event == 'note':
+            result['notes'].append(payload.pop('template').format(**payload))
+
+    _run(overrides, emit)
+    return result
+
+
+class StreamCancelled(Exception):
+    """Raised in a streaming worker whose client timed out or went away."""
+
+
+def simulate_stream(overrides: Dict[str, Any], queue, stop) -> int:
+    """
+    Worker: put the rows on `queue` a simulated year at a time as {'event': ..., column: value}
+    dicts, then None. Once the `stop` event is set the simulation is abandoned (StreamCancelled);
+    a full queue blocks the worker only until then.
+    """
+    chunk: List[Dict[str, Any]] = []
+    months = 0
+
+    def put(item):
+        # one stop check per simulated year: the event lives in the manager process
+        while not stop.is_set():
+            try:
+                return queue.put(item, timeout=STREAM_POLL)
+            except queues.Full:
+                pass
+        raise StreamCancelled()
+
+    def emit(event, payload):
+        nonlocal chunk, months
+        if event in ('month', 'transfer'):
+            chunk.append(dict(payload, event=event))
+            months += event == 'month'
+            if event == 'month' and payload['date_key'].endswith('-12'):
+                put(chunk)
+                chunk = []
+        elif event == 'note':
+            chunk.append({'event': 'note', 'text': payload.pop('template').format(**payload)})
+
+    try:
+        _run(overrides, emit)
+        if chunk:
+            put(chunk)
+    finally:
+        queue.put(None)  # read by the handler or, once stopped, by its drain
+    return months
+
+
+# ------------------------------------------------------------------ service
+class ServiceMetrics:
+    """Counters of the /metrics endpoint."""
+    def __init__(self):
+        self.started = time.time()
+        self.requests = 0
+        self.simulations = 0
+        self.coalesced = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.bad_requests = 0  # answered 400, 404, 405 or 413
+        self.completed = 0     # answered in full, the requests whose latency is observed
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.completed += 1
+        self.latency_total += seconds
+        self.latency_max = max(self.latency_max, seconds)
+
+    def to_dict(self) -> Dict[str, Any]:
+        values = dict(vars(self))
+        values['uptime'] = time.time() - values.pop('started')
+        values['latency_mean'] = self.latency_total / self.completed if self.completed else 0.0
+        return values
+
+
+class RequestError(Exception):
+    """An HTTP error response: status code and message."""
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class SimulationService:
+    """
+    Local HTTP front end to the simulation.
+    POST /simulate takes a JSON object of config attributes to override in the base config and
+    answers with the monthly rows, or with ?stream=1 as NDJSON written a simulated year at a time
+    while the worker is still running. Simulations run on a process pool whose workers have the
+    modules and the base config loaded once. Identical configs in flight (same config_hash) share
+    one simulation. At most `max_pending` simulations are queued or running; beyond that the
+    service answers 503 at once, and a request that waits longer than its timeout gets 504.
+    GET /health and GET /metrics report the state and the counters.
+    """
+    def __init__(self, config_filename: str = CONFIG_FILENAME, workers: int = None, max_pending: int = None,
+                 timeout: float = DEFAULT_TIMEOUT):
+        from cpf_config_loader_v11 import CPFConfig
+        self.config_filename = config_filename
+        self.base_config = CPFConfig(config_filename)
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.workers * 4
+        self.timeout = timeout
+        self.metrics = ServiceMetrics()
+        self.pending = 0
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._manager = None
+        self._draining = set()
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    # -------------------------------------------------------------- lifecycle
+    async def start(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> asyncio.AbstractServer:
+        self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_preload,
+                                             initargs=(self.config_filename,))
+        # start every worker now so the first requests do not pay for the imports
+        await asyncio.gather(*(asyncio.get_running_loop().run_in_executor(self._executor, _noop)
+                               for _ in range(self.workers)))
+        # the stream queues live in a manager process: started before the server socket exists,
+        # it holds no copy of the listening socket or of any client's
+        self._manager = multiprocessing.Manager()
+        self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        for task in list(self._draining):
+            task.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+
+    @property
+    def port(self) -> int:
+        return self._server.sockets[0].getsockname()[1]
+
+    # -------------------------------------------------------------- simulations
+    def _config_key(self, overrides: Dict[str, Any]) -> str:
+        from cpf_result_cache_v1 import config_hash
+        from cpf_sweep_v1 import apply_overrides
+        if not isinstance(overrides, dict):
+            raise RequestError(400, "The body must be a JSON object of config attributes.")
+        try:
+            return config_hash(apply_overrides(self.base_config, overrides), "none")
+        except (KeyError, ValueError, TypeError) as e:
+            raise RequestError(400, str(e))
+
+    def _reserve(self) -> None:
+        if self.pending >= self.max_pending:
+            self.metrics.rejected += 1
+            raise RequestError(503, f"{self.pending} simulations pending; retry later.")
+        self.pending += 1
+        self.metrics.simulations += 1
+
+    def _release(self, _future=None) -> None:
+        self.pending -= 1
+
+    async def run(self, overrides: Dict[str, Any], timeout: float = None) -> Tuple[Dict[str, Any], bool]:
+        """The result of one simulation and whether it was shared with an identical request in flight."""
+        key = self._config_key(overrides)
+        future = self._inflight.get(key)
+        shared = future is not None
+        if shared:
+            self.metrics.coalesced += 1
+        else:
+            self._reserve()
+            future = asyncio.wrap_future(self._executor.submit(simulate, overrides))
+            self._inflight[key] = future
+            future.add_done_callback(self._release)
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        try:
+            # shielded: a waiter that times out must not cancel the simulation the others share
+            result = await asyncio.wait_for(asyncio.shield(future), timeout or self.timeout)
+        except asyncio.TimeoutError:
+            self.metrics.timeouts += 1
+            raise RequestError(504, f"No result within {timeout or self.timeout:g} s.")
+        return dict(result, key=key), shared
+
+    async def stream(self, overrides: Dict[str, Any], writer: asyncio.StreamWriter, timeout: float = None) -> bool:
+        """
+        Run one simulation and write its rows as chunked NDJSON while it runs; whether all rows
+        were sent. When the stream times out or its client goes away, the worker is told to stop;
+        its slot is free once it has.
+        """
+        self._config_key(overrides)
+        self._reserve()
+        queue = self._manager.Queue(maxsize=STREAM_CHUNK_QUEUE)  # a slow client holds the worker back
+        stop = self._manager.Event()
+        loop = asyncio.get_running_loop()
+        future = asyncio.wrap_future(self._executor.submit(simulate_stream, overrides, queue, stop))
+        future.add_done_callback(self._release)
+        deadline = loop.time() + (timeout or self.timeout)
+        finished = completed = False
+        try:
+            writer.write(_headers(200, "application/x-ndjson", chunked=True))
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    self.metrics.timeouts += 1
+                    await _write_chunk(writer, [{'event': 'error', 'status': 504, 'error': "timeout"}])
+                    break
+                # a bounded get, so no thread is left waiting on the queue after the stream ends
+                chunk = await loop.run_in_executor(None, _get, queue, min(remaining, STREAM_POLL))
+                if chunk is _EMPTY and future.done():
+                    chunk = None  # the worker died without its None
+                if chunk is _EMPTY:
+                    continue
+                if chunk is None:
+                    finished = True
+                    try:
+                        await future
+                        completed = True
+                    except Exception as e:
+                        self.metrics.errors += 1
+                        await _write_chunk(writer, [{'event': 'error', 'status': 500, 'error': str(e)}])
+                    break
+                await _write_chunk(writer, chunk)
+            writer.write(b"0\r\n\r\n")
+            await writer.drain()
+        finally:
+            if not finished:
+                self._stop_stream(queue, stop, future)
+        return completed
+
+    def _stop_stream(self, queue, stop, future: asyncio.Future) -> None:
+        """Tell a streaming worker to stop and keep emptying its queue until it has finished."""
+        stop.set()
+        task = asyncio.ensure_future(self._drain(queue, future))
+        self._draining.add(task)
+        task.add_done_callback(self._draining.discard)
+
+    async def _drain(self, queue, future: asyncio.Future) -> None:
+        loop = asyncio.get_running_loop()
+        while not future.done():
+            if await loop.run_in_executor(None, _get, queue, STREAM_POLL) is None:
+                break
+        try:
+            await future
+        except Exception:
+            pass  # StreamCancelled, or an error no client is left to read
+
+    # -------------------------------------------------------------- HTTP
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        start = time.perf_counter()
+        self.metrics.requests += 1
+        try:
+            method, target, body = await _read_request(reader)
+            url = urlsplit(target)
+            query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            if url.path in ("/health", "/metrics"):
+                if method != "GET":
+                    raise RequestError(405, "Use GET.")
+                await _respond(writer, 200, self.health() if url.path == "/health" else self.metrics.to_dict())
+            elif url.path == "/simulate":
+                if method != "POST":
+                    raise RequestError(405, "Use POST with a JSON body.")
+                try:
+                    overrides = json.loads(body or b"{}")
+                    timeout = min(float(query.get('timeout', self.timeout)), self.timeout)
+                except ValueError as e:
+                    raise RequestError(400, f"Invalid request: {e}")
+                if query.get('stream') in ('1', 'true', 'yes'):
+                    if not await self.stream(overrides, writer, timeout):
+                        return  # a timeout or error event, already counted
+                else:
+                    result, shared = await self.run(overrides, timeout)
+                    await _respond(writer, 200, dict(result, coalesced=shared))
+            else:
+                raise RequestError(404, f"No such endpoint: {url.path}")
+            self.metrics.observe(time.perf_counter() - start)
+        except RequestError as e:
+            if e.status not in (503, 504):  # those are counted as rejected and timeouts
+                self.metrics.bad_requests += 1
+            await _respond(writer, e.status, {'error': str(e)})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            self.metrics.errors += 1
+            await _respond(writer, 500, {'error': f"{type(e).__name__}: {e}"})
+        finally:
+            writer.close()
+
+    def health(self) -> Dict[str, Any]:
+        return {'status': "ok", 'workers': self.workers, 'pending': self.pending, 'max_pending': self.max_pending,
+                'inflight': len(self._inflight), 'timeout': self.timeout}
+
+
+def _noop() -> None:
+    pass
+
+
+_EMPTY = object()  # what _get returns when the queue stayed empty
+
+
+def _get(queue, timeout: float):
+    """queue.get, giving up after `timeout` seconds with _EMPTY."""
+    try:
+        return queue.get(timeout=timeout)
+    except queues.Empty:
+        return _EMPTY
+
+
+async def _read_request(reader: asyncio.StreamReader) -> Tuple[str, str, bytes]:
+    """Method, target and body of one HTTP/1.1 request."""
+    request_line = (await reader.readline()).decode("latin-1").strip()
+    parts = request_line.split()
+    if len(parts) != 3:
+        raise RequestError(400, f"Malformed request line: {request_line!r}")
+    headers = {}
+    while True:
+        line = (await reader.readline()).decode("latin-1").strip()
+        if not line:
+            break
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", 0) or 0)
+    if length > MAX_BODY:
+        raise RequestError(413, f"Body larger than {MAX_BODY} bytes.")
+    body = await reader.readexactly(length) if length else b""
+    return parts[0].upper(), parts[1], body
+
+
+def _headers(status: int, content_type: str, length: int = None, chunked: bool = False) -> bytes:
+    lines = [f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}", f"Content-Type: {content_type}", "Connection: close"]
+    lines.append("Transfer-Encoding: chunked" if chunked else f"Content-Length: {length}")
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+
+async def _respond(writer: asyncio.StreamWriter, status: int, payload: Dict[str, Any]) -> None:
+    body = json.dumps(payload).encode("utf-8")
+    writer.write(_headers(status, "application/json", len(body)) + body)
+    await writer.drain()
+
+
+async def _write_chunk(writer: asyncio.StreamWriter, rows: List[Dict[str, Any]]) -> None:
+    data = "".join(json.dumps(row) + "\n" for row in rows).encode("utf-8")
+    writer.write(f"{len(data):x}\r\n".encode("latin-1") + data + b"\r\n")
+    await writer.drain()  # waits while the client is not reading
+
+
+async def _open_request(port: int, method: str, target: str, body: bytes = b"") -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    """Send one request to a service on localhost; the response is for the caller to read."""
+    reader, writer = await asyncio.open_connection(DEFAULT_HOST, port)
+    writer.write(f"{method} {target} HTTP/1.1\r\nHost: {DEFAULT_HOST}\r\nContent-Length: {len(body)}\r\n\r\n"
+                 .encode("latin-1") + body)
+    await writer.drain()
+    return reader, writer
+
+
+async def _pending_after(service: SimulationService, seconds: float) -> int:
+    """The pending count once it is back to 0, or after `seconds`."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + seconds
+    while service.pending and loop.time() < deadline:
+        await asyncio.sleep(0.05)
+    return service.pending
+
+
+async def check_streams(config_filename: str = CONFIG_FILENAME, wait: float = 10.0) -> List[str]:
+    """
+    The streaming check of the service on localhost with one worker: the problems found, empty
+    when it passes. A stream that times out and a stream whose client disconnects must both
+    free their slot, and a stream and a plain request after them must complete, the stream
+    ending with EOF (no process other than the service may hold the client's socket). A 404
+    after them counts as a bad request, and only the two complete answers are timed.
+    """
+    problems = []
+    service = SimulationService(config_filename, workers=1, max_pending=2)
+    await service.start(port=0)
+    try:
+        reader, writer = await _open_request(service.port, "POST", "/simulate?stream=1&timeout=0.02", b"{}")
+        try:
+            response = await asyncio.wait_for(reader.read(), wait)
+            if b'"status": 504' not in response:
+                problems.append("a stream past its timeout did not end with a 504 error event")
+        except asyncio.TimeoutError:
+            problems.append(f"a stream past its timeout was still open after {wait:g} s")
+        writer.close()
+        if await _pending_after(service, wait):
+            problems.append(f"a stream that timed out left pending at {service.pending}")
+
+        reader, writer = await _open_request(service.port, "POST", "/simulate?stream=1", b"{}")
+        await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), wait)
+        writer.transport.abort()  # disconnect after the headers, leaving the worker to fill its queue
+        if await _pending_after(service, wait):
+            problems.append(f"a stream whose client disconnected left pending at {service.pending}")
+
+        reader, writer = await _open_request(service.port, "POST", "/simulate?stream=1", b"{}")
+        try:
+            response = await asyncio.wait_for(reader.read(), wait)
+            if not response.endswith(b"0\r\n\r\n") or b'"event": "error"' in response:
+                problems.append("a stream after the aborted ones did not complete")
+        except asyncio.TimeoutError:
+            problems.append(f"a stream after the aborted ones did not reach EOF within {wait:g} s")
+        writer.close()
+
+        reader, writer = await _open_request(service.port, "POST", "/simulate", b"{}")
+        try:
+            status = (await asyncio.wait_for(reader.read(), wait)).split(b" ", 2)[1]
+            if status != b"200":
+                problems.append(f"a request after the streams got {status.decode()}")
+        except asyncio.TimeoutError:
+            problems.append(f"a request after the streams got no answer within {wait:g} s")
+        writer.close()
+
+        reader, writer = await _open_request(service.port, "GET", "/nope")
+        await asyncio.wait_for(reader.read(), wait)
+        writer.close()
+        metrics = service.metrics.to_dict()
+        if metrics['bad_requests'] != 1 or metrics['completed'] != 2:
+            problems.append(f"/metrics does not count the 404 as a bad request apart from the latency: {metrics}")
+    finally:
+        await service.close()
+    return problems
+
+
+async def serve(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, **options) -> None:
+    service = SimulationService(**options)
+    server = await service.start(host, port)
+    print(f"CPF simulation service on http://{host}:{service.port} "
+          f"({service.workers} workers, {service.max_pending} pending at most)")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.close()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serve CPF simulations over HTTP on this machine.")
+    parser.add_argument('--config', default=CONFIG_FILENAME, help="base configuration file the requests override")
+    parser.add_argument('--host', default=DEFAULT_HOST, help="address to listen on (default: localhost only)")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: number of cores)")
+    parser.add_argument('--max-pending', type=int, default=None, help="simulations queued or running before 503")
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help="seconds a request may wait")
+    parser.add_argument('--check', action='store_true',
+                        help="instead of serving, check on a free port that aborted streams free their worker")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.check:
+        problems = asyncio.run(check_streams(args.config))
+        for problem in problems:
+            print(f"FAIL: {problem}")
+        if not problems:
+            print("OK")
+        raise SystemExit(1 if problems else 0)
+    try:
+        asyncio.run(serve(args.host, args.port, config_filename=args.config, workers=args.workers,
+                          max_pending=args.max_pending, timeout=args.timeout))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,162 @@
+# cpf_sweep_v1.py
+from __init__ import SRC_DIR, CONFIG_FILENAME
+import argparse
+import copy
+import csv
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List
+
+from cpf_config_loader_v11 import CPFConfig
+
+SWEEP_RESULTS = os.path.join(SRC_DIR, 'cpf_sweep_results.csv')  # default output of the CLI
+BALANCE_COLUMNS = ['oa', 'sa', 'ma', 'ra', 'loan', 'excess']  # order of the balances in a cpf_data row
+SALARY_KEYS = ['salary', 'salarycap']
+
+
+def capped_salary(config: CPFConfig) -> float:
+    return min(float(config.salary), float(config.salarycap))
+
+
+def apply_overrides(base_config: CPFConfig, overrides: Dict[str, Any]) -> CPFConfig:
+    """
+    Return a copy of base_config with the flattened attributes in `overrides` replaced.
+    The allocation amounts in the config are derived from the capped salary, so a salary or
+    salarycap override rescales every allocation...amount attribute accordingly.
+    """
+    config = copy.copy(base_config)
+    for key, value in overrides.items():
+        if not hasattr(base_config, key):
+            raise KeyError(f"Unknown config attribute: {key}")
+        setattr(config, key, value)
+
+    if any(key in overrides for key in SALARY_KEYS):
+        old, new = capped_salary(base_config), capped_salary(config)
+        if old <= 0:
+            raise ValueError("Cannot rescale allocation amounts: the base config has no salary.")
+        for attr, value in vars(base_config).items():
+            if attr.startswith('allocation') and attr.endswith('amount') and attr not in overrides:
+                setattr(config, attr, value * new / old)
+    return config
+
+
+def expand_grid(grid: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    """Cartesian product of a {attribute: [values]} grid as a list of override dicts."""
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+
+def _balances(prefix: str, row) -> Dict[str, Any]:
+    if row is None:
+        return {f"{prefix}_{name}": None for name in BALANCE_COLUMNS}
+    return {f"{prefix}_{name}": value for name, value in zip(BALANCE_COLUMNS, row[3:9])}
+
+
+def summarize(simulation) -> Dict[str, Any]:
+    """
+    Final and milestone balances of a finished run (see cpf_vector_engine_v1): the birthday
+    month at 55 (before the RA transfer), the first month at 67 and the last month simulated.
+    Only those rows are built, so a jump-ahead run never expands its skipped months.
+    """
+    count = simulation.month_count
+    at_55 = simulation.row(simulation.transfer_index) if simulation.transfer_index < count else None
+    first_67 = next((m for m, age in enumerate(simulation.ages[:count]) if age == 67), None)
+    at_67 = simulation.row(first_67) if first_67 is not None else None
+    final = simulation.row(count - 1) if count else None
+    result = {
+        'months': count,
+        'final_date': final[0] if final else None,
+        'final_age': final[2] if final else None,
+        'ra_exhausted_age': simulation.stop_age,
+        'total_payout': round(sum(simulation.payouts()), 2),
+    }
+    result.update(_balances('final', final))
+    result.update(_balances('age55', at_55))
+    result.update(_balances('age67', at_67))
+    return result
+
+
+def run_scenario(task) -> Dict[str, Any]:
+    """
+    Worker: simulate one override set with the vectorized engine, jumping over the quiet months.
+    Nothing is written to cpf_simulation.db or cpf_log_file.csv and no log process is started.
+    """
+    from cpf_vector_engine_v1 import VectorizedSimulation
+    index, base_config, overrides = task
+    config = apply_overrides(base_config, overrides)
+    simulation = VectorizedSimulation(config, jump_ahead=True).run()
+    result = {'scenario': index, 'overrides': json.dumps(overrides, sort_keys=True)}
+    result.update(summarize(simulation))
+    return result
+
+
+def run_sweep(base_config: CPFConfig, scenarios: List[Dict[str, Any]], max_workers: int = None) -> List[Dict[str, Any]]:
+    """
+    Run every override set in `scenarios` against base_config on a process pool sized to the
+    number of cores, returning one result dict per scenario in input order.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    tasks = [(index, base_config, overrides) for index, overrides in enumerate(scenarios)]
+    if max_workers == 1 or len(tasks) == 1:
+        return [run_scenario(task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=min(max_workers, len(tasks))) as executor:
+        return list(executor.map(run_scenario, tasks, chunksize=max(1, len(tasks) // (max_workers * 4))))
+
+
+def save_results(results: List[Dict[str, Any]], filename: str = SWEEP_RESULTS):
+    """Write the sweep result table as CSV."""
+    if not results:
+        raise ValueError("No sweep results to save.")
+    with open(filename, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(results[0].keys()))
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def parse_value(text: str) -> Any:
+    """Parse one CLI value as JSON (numbers, booleans), falling back to the plain string."""
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        return text
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run CPF what-if scenarios in parallel.")
+    parser.add_argument('--config', default=CONFIG_FILENAME, help="base configuration file")
+    parser.add_argument('--set', dest='grid', action='append', default=[], metavar='KEY=V1,V2,...',
+                        help="sweep an attribute over comma-separated values; repeat to build a grid")
+    parser.add_argument('--scenarios', help="JSON file with a list of override objects")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: number of cores)")
+    parser.add_argument('--output', default=SWEEP_RESULTS, help="CSV file for the result table")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    base_config = CPFConfig(args.config)
+    scenarios = []
+    if args.scenarios:
+        with open(args.scenarios) as f:
+            scenarios.extend(json.load(f))
+    if args.grid:
+        grid = {}
+        for item in args.grid:
+            key, _, values = item.partition('=')
+            grid[key.strip()] = [parse_value(v.strip()) for v in values.split(',')]
+        scenarios.extend(expand_grid(grid))
+    if not scenarios:
+        scenarios = [{}]
+
+    results = run_sweep(base_config, scenarios, max_workers=args.workers)
+    save_results(results, args.output)
+    for result in results:
+        print(f"{result['scenario']:>4} {result['overrides']:<60} final excess {result['final_excess'] or 0.0:>14,.2f}"
+              f"  RA exhausted at {result['ra_exhausted_age']}")
+    print(f"{len(results)} scenarios saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,523 @@
+# cpf_vector_engine_v1.py
+from __init__ import SRC_DIR, CONFIG_FILENAME, DATABASE_NAME, LOG_FILE_PATH
+from bisect import bisect_right
+import numpy as np
+from cpf_config_loader_v11 import CPFConfig, compile_config, to_date
+from cpf_date_generator_v3 import age_on, month_calendar
+from cpf_program_v11 import interest_on_cpf, extra_interest_on_cpf, interest_cents, extra_interest_cents
+from cpf_db_writer_v1 import CPFDataWriter, DEFAULT_BATCH_SIZE
+from cpf_binlog_v1 import log_sink
+from cpf_ledger_v1 import TransactionLedger, ACCOUNT_CODES, NO_CHANGE, INFLOW, OUTFLOW
+from cpf_schedule_v1 import EventSchedule
+from cpf_money_v1 import check_money, to_cents
+
+ENGINE_VERSION = "vector-2"
+START_REFERENCE = 100000000  # same base as cpf_program_v11.START_REFERENCE
+
+OA, SA, MA, RA, EXCESS, LOAN = (ACCOUNT_CODES[a] for a in ['oa', 'sa', 'ma', 'ra', 'excess', 'loan'])
+BALANCE_ACCOUNTS = [OA, SA, MA, RA, LOAN, EXCESS]  # column order of the cpf_data balances
+RA_COLUMN = BALANCE_ACCOUNTS.index(RA)
+
+
+class VectorizedSimulation:
+    """
+    NumPy engine for the monthly CPF loop of cpf_run_simulation_v9.main().
+    The horizon is split into stretches of ordinary months, whose loan payments, allocations and
+    payouts are applied with cumulative sums over integer cents, and the event months (December
+    interest, the age-55 transfer and the month the RA runs out), which are stepped one at a time.
+    It produces the same cpf_data rows and transaction log as the scalar path.
+
+    With `jump_ahead` a stretch is not expanded at all: the balances jump from its first month to
+    its last with one difference of precomputed prefix sums of the monthly flows, and no
+    transaction log is kept. The event months are stepped as usual, so the balances at every
+    event are the month-by-month ones. The rows of the skipped months are rebuilt from the same
+    prefix sums only when asked for, one at a time with row() or all at once with `rows`.
+
+    The balances are integer cents in both money modes; `money` picks the arithmetic of the
+    event months to match: 'float' rounds like CPFAccount, 'cents' like CentsCPFAccount.
+    """
+    def __init__(self, config: CPFConfig, jump_ahead: bool = False, money: str = 'float'):
+        self.config = config = compile_config(config)
+        self.jump_ahead = jump_ahead
+        self.money = check_money(money)
+        self.startdate = to_date('startdate', config.startdate)
+        self.enddate = to_date('enddate', config.enddate)
+        self.birthdate = to_date('birthdate', config.birthdate)
+        self.payouttype = config.payouttype
+        self._rows = []
+        self._segment_starts = []
+        self._segments = []
+        self.messages = []
+        self._message_ids = {}
+        self._chunks = []
+        self.transactions = None
+
+        cal = month_calendar(self.startdate, self.enddate, self.birthdate)
+        self.n = n = len(cal["age"])
+        self.age = cal["age"]
+        self.month = cal["month"]
+        self.ordinal = cal["ordinal"]
+        self.date_keys = cal["date_key"].tolist()
+        self.ages = self.age.tolist()
+        self.months = self.month.tolist()
+
+        # the same event calendar as the scalar loop: brackets, loan phases, interest, payout and transfer
+        self.schedule = schedule = EventSchedule(config, cal)
+        self.transfer_index = schedule.transfer_index
+
+        self._build_allocations()
+        self._build_loan_schedule()
+        self.payout_amount = config.payout_amount
+        self.payout_cents = np.where(schedule.payout_due, to_cents(float(config.payout_amount)), 0)
+        self.special = schedule.special
+        if jump_ahead:
+            self._build_prefix()
+
+    def intern(self, message: str) -> int:
+        message_id = self._message_ids.get(message)
+        if message_id is None:
+            message_id = self._message_ids[message] = len(self.messages)
+            self.messages.append(message)
+        return message_id
+
+    def _age_messages(self, template: str, ages) -> np.ndarray:
+        """Message ids of `template` formatted for each age in `ages`."""
+        lookup = {age: self.intern(template.format(age=age)) for age in set(ages.tolist())}
+        return np.array([lookup[a] for a in ages.tolist()], dtype=np.int64)
+
+    def _build_allocations(self):
+        """Steps 14-16: the three allocation slots (account, cents, message) of every month."""
+        cfg = self.config
+        n = self.n
+        below = self.schedule.below55
+        self.alloc_account = np.empty((n, 3), dtype=np.int64)
+        self.alloc_cents = np.zeros((n, 3), dtype=np.int64)
+        self.alloc_message = np.zeros((n, 3), dtype=np.int64)
+        below_accounts = [(OA, 'oa', 'OA'), (SA, 'sa', 'SA'), (MA, 'ma', 'MA')]
+        for slot, (code, account, label) in enumerate(below_accounts):
+            amount = to_cents(cfg.allocation_below55[account])
+            self.alloc_account[:, slot] = code
+            self.alloc_cents[below, slot] = amount
+            self.alloc_message[below, slot] = self._age_messages(f"Allocation for {label} at age {{age}}", self.age[below])
+        above = ~below
+        for slot, (code, account) in enumerate([(OA, 'oa'), (MA, 'ma'), (RA, 'ra')]):
+            self.alloc_account[above, slot] = code
+            table = np.array([to_cents(amount) for amount in cfg.allocation[account]], dtype=np.int64)
+            self.alloc_cents[above, slot] = table[self.age[above]]
+            self.alloc_message[above, slot] = self._age_messages(f"Allocation for {account} at age {{age}}", self.age[above])
+
+    def _build_loan_schedule(self):
+        """Step 13: the monthly OA debits and loan credits of the amortization schedule (see cpf_loan_v1)."""
+        n = self.n
+        phase = self.schedule.loan_phase
+        self.loan_cents = self.schedule.loans.payment
+        self.loan_principal_cents = self.schedule.loans.principal
+        self.loan_message = np.zeros(n, dtype=np.int64)
+        for year in (1, 2, 3):
+            mask = phase == year
+            self.loan_message[mask] = self._age_messages(
+                f"Loan payment from OA Account at year {year} age {{age}}", self.age[mask])
+        mask = phase == 4
+        self.loan_message[mask] = self._age_messages("Loan payment from OA Account at year 4, age {age}", self.age[mask])
+
+    def _build_prefix(self):
+        """Cumulative cents moved into each BALANCE_ACCOUNTS column by the ordinary months before month i."""
+        flows = np.zeros((self.n, len(BALANCE_ACCOUNTS)), dtype=np.int64)
+        for column, code in enumerate(BALANCE_ACCOUNTS):
+            flows[:, column] = np.where(self.alloc_account == code, self.alloc_cents, 0).sum(axis=1)
+        flows[:, BALANCE_ACCOUNTS.index(OA)] -= self.loan_cents
+        flows[:, BALANCE_ACCOUNTS.index(LOAN)] -= self.loan_principal_cents
+        flows[:, RA_COLUMN] -= self.payout_cents
+        flows[:, BALANCE_ACCOUNTS.index(EXCESS)] += self.payout_cents
+        self._prefix = np.zeros((self.n + 1, len(BALANCE_ACCOUNTS)), dtype=np.int64)
+        np.cumsum(flows, axis=0, out=self._prefix[1:])
+
+    # ------------------------------------------------------------------ scalar event months
+    def _record(self, account: int, amount: float, message_id: int, outflow: bool = False):
+        """record_inflow / record_outflow on one account, with the scalar path's rounding."""
+        if not isinstance(amount, (int, float)):
+            return
+        if self.money == 'cents':
+            cents = to_cents(amount)
+            self._record_cents(account, -cents if outflow else cents, message_id)
+            return
+        if abs(amount) < 1e-9:
+            return
+        old = self.bal[account]
+        current = old / 100
+        new_balance = (current - amount) if outflow else (current + amount)
+        new = to_cents(new_balance.__round__(2))
+        self.bal[account] = new
+        self._pending.append((self._ordinal, self._age, account, old, new, message_id))
+
+    def _record_cents(self, account: int, cents: int, message_id: int):
+        """Add `cents` to one account, as CentsCPFAccount posts it."""
+        if cents:
+            old = self.bal[account]
+            self.bal[account] = new = old + cents
+            self._pending.append((self._ordinal, self._age, account, old, new, message_id))
+
+    def _flush_pending(self):
+        if self.jump_ahead:
+            self._pending = []
+        elif self._pending:
+            self._chunks.append(np.array(self._pending, dtype=np.int64))
+            self._pending = []
+
+    def _row_message(self, age: int, month: int) -> str:
+        """Step 24 message of the cpf_data row."""
+        if age == 55:
+            return f"Age 55 - Special case for CPF payout"
+        elif self.bal[RA] == 0 and age >= 55:
+            return f"Age {age} - RA balance is zero"
+        elif age == 67:
+            return f"Age {age} - CPF payout"
+        elif month == 12:
+            return f"End of year {age} - CPF Interest"
+        return f"Age {age} - Regular CPF calculation"
+
+    def _step_month(self, i: int) -> bool:
+        """Run one month exactly like the scalar loop body. Returns False when the run stops."""
+        cfg = self.config
+        age, month = self.ages[i], self.months[i]
+        self._ordinal, self._age = int(self.ordinal[i]), age
+        pay = int(self.loan_cents[i])
+        if pay:
+            self._record(OA, pay / 100, int(self.loan_message[i]), outflow=True)
+            self._record(LOAN, int(self.loan_principal_cents[i]) / 100, int(self.loan_message[i]), outflow=True)
+        for slot in range(3):
+            self._record(int(self.alloc_account[i, slot]), int(self.alloc_cents[i, slot]) / 100,
+                         int(self.alloc_message[i, slot]))
+
+        if month == 12 and self.money == 'cents':
+            self._interest_cents(age)
+        elif month == 12:
+            interest = {}
+            for code, account in [(OA, 'oa'), (SA, 'sa'), (MA, 'ma'), (RA, 'ra')]:
+                balance = self.bal[code] / 100
+                interest[code] = interest_on_cpf(cfg, age, account, balance).__round__(2) if balance > 0 else 0.0
+            extra = extra_interest_on_cpf(cfg, age, *(self.bal[c] / 100 for c in (OA, SA, MA, RA)))
+            message_id = self.intern(f"Interest for ra at age {age}")
+            for code in (OA, SA, MA, RA):
+                self._record(code, interest[code], message_id)
+            message_id = self.intern(f"Extra Interest for ra at age {age}")
+            for code, amount in zip((OA, SA, MA, RA), extra):
+                self._record(code, amount.__round__(2), message_id)
+
+        payout = float(self.payout_amount) if age >= cfg.cpfpayoutage else 0.0
+        ra_balance = self.bal[RA] / 100
+        payout = max(min(payout, ra_balance), 0.00)
+        if ra_balance > 0:
+            message_id = self.intern(f"CPF payout at age {age}")
+            self._record(RA, payout, message_id, outflow=True)
+            self._record(EXCESS, payout, message_id)
+        else:
+            payout = 0.0
+        if self.bal[RA] == 0 and age > 55:
+            self.stop_age = age
+            return False
+
+        row = [self.bal[c] / 100 for c in BALANCE_ACCOUNTS]
+        if i == self.transfer_index:
+            self._transfer(age, *row)
+        row = (self.date_keys[i], START_REFERENCE + i + 1, age, *row, payout.__round__(2), self._row_message(age, month))
+        if self.jump_ahead:
+            self._segment_starts.append(i)
+            self._segments.append((i, i + 1, None, row))
+        else:
+            self._rows.append(row)
+        return True
+
+    def _interest_cents(self, age: int):
+        """Steps 17-18 in the 'cents' money mode, as CentsCPFAccount.credit_interest."""
+        cfg = self.config
+        codes = [OA, SA, MA, RA]
+        interest = [interest_cents(cfg, age, account, self.bal[code]) if self.bal[code] > 0 else 0
+                    for account, code in zip(['oa', 'sa', 'ma', 'ra'], codes)]
+        extra = extra_interest_cents(cfg, age, *(self.bal[code] for code in codes))
+        for amounts, message in [(interest, f"Interest for ra at age {age}"), (extra, f"Extra Interest for ra at age {age}")]:
+            message_id = self.intern(message)
+            for code, cents in zip(codes, amounts):
+                self._record_cents(code, cents, message_id)
+
+    def _transfer(self, age, oa_bal, sa_bal, ma_bal, ra_bal, loan_bal, excess_bal):
+        """Steps 21-23: close the SA and move the OA and SA balances into the RA at 55."""
+        cfg = self.config
+        retirement_amount = cfg.transfer_amount
+        display_loan_bal = -loan_bal if loan_bal > 0 else 0.0
+        display_excess_bal = (oa_bal + sa_bal - loan_bal - retirement_amount)
+        message_id = self.intern(f"transfer_cpf_age={age}")
+        self._record(OA, -oa_bal, message_id)
+        self._record(SA, -sa_bal, message_id)
+        self._record(LOAN, display_loan_bal, message_id)
+        self._record(RA, retirement_amount, message_id)
+        self._record(EXCESS, display_excess_bal, message_id)
+
+    # ------------------------------------------------------------------ vectorized stretches
+    def _stretch(self, i: int, j: int) -> int:
+        """
+        Apply months [i, j) that have no interest or transfer with cumulative sums.
+        Stops early at the first month where the RA cannot cover the payout (or runs dry);
+        returns the index of the first month that was not applied.
+        """
+        k = j - i
+        loan = self.loan_cents[i:j]
+        principal = self.loan_principal_cents[i:j]
+        payout = self.payout_cents[i:j]
+        alloc_account = self.alloc_account[i:j]
+        alloc_cents = self.alloc_cents[i:j]
+        ra_alloc = np.where(alloc_account == RA, alloc_cents, 0).sum(axis=1)
+
+        # RA before and after each month's payout, assuming no month has to be clipped
+        ra_after = self.bal[RA] + np.cumsum(ra_alloc - payout)
+        ra_before = ra_after + payout
+        ages = self.age[i:j]
+        bad = np.flatnonzero(((payout > 0) & (ra_before < payout)) | ((ra_after == 0) & (ages > 55)))
+        if len(bad):
+            k = int(bad[0])
+            j = i + k
+            loan, principal, payout = loan[:k], principal[:k], payout[:k]
+            alloc_account, alloc_cents = alloc_account[:k], alloc_cents[:k]
+            ra_after = ra_after[:k]
+        if k == 0:
+            return i
+
+        # slots per month: loan (oa, loan), three allocations, payout (ra, excess)
+        accounts = np.empty((k, 7), dtype=np.int64)
+        amounts = np.empty((k, 7), dtype=np.int64)
+        messages = np.empty((k, 7), dtype=np.int64)
+        accounts[:, 0], amounts[:, 0], messages[:, 0] = OA, -loan, self.loan_message[i:j]
+        accounts[:, 1], amounts[:, 1], messages[:, 1] = LOAN, -principal, self.loan_message[i:j]
+        accounts[:, 2:5], amounts[:, 2:5], messages[:, 2:5] = alloc_account, alloc_cents, self.alloc_message[i:j]
+        payout_message = self._age_messages("CPF payout at age {age}", self.age[i:j])
+        accounts[:, 5], amounts[:, 5], messages[:, 5] = RA, -payout, payout_message
+        accounts[:, 6], amounts[:, 6], messages[:, 6] = EXCESS, payout, payout_message
+
+        month_index = np.repeat(np.arange(i, j), 7)
+        accounts, amounts, messages = accounts.ravel(), amounts.ravel(), messages.ravel()
+        active = amounts != 0
+        month_index, accounts, amounts, messages = month_index[active], accounts[active], amounts[active], messages[active]
+
+        new = np.empty_like(amounts)
+        month_end = np.empty((k, 6), dtype=np.int64)
+        for column, code in enumerate(BALANCE_ACCOUNTS):
+            mask = accounts == code
+            running = self.bal[code] + np.cumsum(np.where(mask, amounts, 0))
+            new[mask] = running[mask]
+            per_month = np.zeros(k, dtype=np.int64)
+            np.add.at(per_month, month_index[mask] - i, amounts[mask])
+            month_end[:, column] = self.bal[code] + np.cumsum(per_month)
+            self.bal[code] = int(month_end[-1, column])
+        self._flush_pending()
+        self._chunks.append(np.column_stack([
+            self.ordinal[month_index], self.age[month_index], accounts, new - amounts, new, messages,
+        ]))
+
+        payout_values = (payout / 100).tolist()
+        for offset, balances in enumerate((month_end / 100).tolist()):
+            self._rows.append(self._stretch_row(i + offset, balances, payout_values[offset]))
+        return j
+
+    def _stretch_row(self, m: int, balances, payout: float) -> tuple:
+        """The cpf_data row of stretch month m (never December) from its month-end balances."""
+        age = self.ages[m]
+        if age == 55:
+            message = "Age 55 - Special case for CPF payout"
+        elif balances[RA_COLUMN] == 0 and age >= 55:
+            message = f"Age {age} - RA balance is zero"
+        elif age == 67:
+            message = f"Age {age} - CPF payout"
+        else:
+            message = f"Age {age} - Regular CPF calculation"
+        return (self.date_keys[m], START_REFERENCE + m + 1, age, *balances, payout, message)
+
+    def _jump(self, i: int, j: int) -> int:
+        """
+        Closed-form counterpart of _stretch: move the balances from month i to month j in one step.
+        The RA is checked month by month for the same early stop; returns the first month not applied.
+        """
+        prefix = self._prefix
+        ra_after = self.bal[RA] + prefix[i + 1:j + 1, RA_COLUMN] - prefix[i, RA_COLUMN]
+        payout = self.payout_cents[i:j]
+        bad = np.flatnonzero(((payout > 0) & (ra_after < 0)) | ((ra_after == 0) & (self.age[i:j] > 55)))
+        if len(bad):
+            j = i + int(bad[0])
+        if j == i:
+            return i
+        start = [self.bal[code] for code in BALANCE_ACCOUNTS]
+        for code, moved in zip(BALANCE_ACCOUNTS, (prefix[j] - prefix[i]).tolist()):
+            self.bal[code] += moved
+        self._segment_starts.append(i)
+        self._segments.append((i, j, start, None))
+        return j
+
+    # ------------------------------------------------------------------ rows
+    @property
+    def month_count(self) -> int:
+        """Number of months simulated (cpf_data rows)."""
+        if not self.jump_ahead:
+            return len(self._rows)
+        return self._segments[-1][1] if self._segments else 0
+
+    def row(self, m: int) -> tuple:
+        """The cpf_data row of month index m; in a jump-ahead run a skipped month is rebuilt on demand."""
+        if not 0 <= m < self.month_count:
+            raise IndexError(f"Month {m} was not simulated ({self.month_count} months).")
+        if not self.jump_ahead:
+            return self._rows[m]
+        i, _, start, row = self._segments[bisect_right(self._segment_starts, m) - 1]
+        if row is not None:
+            return row
+        moved = (self._prefix[m + 1] - self._prefix[i]).tolist()
+        balances = [(cents + delta) / 100 for cents, delta in zip(start, moved)]
+        return self._stretch_row(m, balances, int(self.payout_cents[m]) / 100)
+
+    @property
+    def rows(self) -> list:
+        """All cpf_data rows in month order (built on first access in a jump-ahead run)."""
+        if self.jump_ahead and len(self._rows) != self.month_count:
+            self._rows = [self.row(m) for m in range(self.month_count)]
+        return self._rows
+
+    def payouts(self) -> list:
+        """The cpf_payout of every month simulated, without building the rows of skipped months."""
+        if not self.jump_ahead:
+            return [row[9] for row in self._rows]
+        values = []
+        for i, j, _, row in self._segments:
+            values.extend([row[9]] if row is not None else (self.payout_cents[i:j] / 100).tolist())
+        return values
+
+    # ------------------------------------------------------------------ driver
+    def run(self):
+        """Simulate the whole horizon; fills `rows` and `transactions`."""
+        cfg = self.config
+        self.bal = {code: 0 for code in BALANCE_ACCOUNTS}
+        self._pending = []
+        self.stop_age = None
+
+        # Steps 5-10: initial balances are logged on the start date
+        self._ordinal = self.startdate.toordinal()
+        self._age = age_on(self.startdate, self.birthdate)
+        for code, account in [(OA, 'oa'), (SA, 'sa'), (MA, 'ma'), (RA, 'ra'), (EXCESS, 'excess'), (LOAN, 'loan')]:
+            amount = cfg.balances[account]
+            self._record(code, amount, self.intern(f"Initial Balance of {account}"))
+
+        events = np.append(np.flatnonzero(self.special), self.n)
+        next_event = events[np.searchsorted(events, np.arange(self.n))].tolist()
+        i = 0
+        while i < self.n:
+            if not self.special[i]:
+                applied = (self._jump if self.jump_ahead else self._stretch)(i, next_event[i])
+                if applied == next_event[i]:
+                    i = applied
+                    continue
+                # the RA runs short in this month: step it like the scalar loop
+                i = applied
+            if not self._step_month(i):
+                break
+            i += 1
+        self._flush_pending()
+        if not self.jump_ahead:
+            self._build_transactions()
+        return self
+
+    def _build_transactions(self):
+        data = np.concatenate(self._chunks) if self._chunks else np.zeros((0, 6), dtype=np.int64)
+        ordinal, age, account, old, new, message = data.T
+        amount = new - old
+        self.transactions = {
+            "date": ordinal.astype(np.int32),
+            "reference": START_REFERENCE + 1 + np.arange(len(data), dtype=np.int64),
+            "age": age.astype(np.int16),
+            "account": account.astype(np.int8),
+            "old_balance": old / 100,
+            "new_balance": new / 100,
+            "amount": amount / 100,
+            "type": np.select([amount > 0, amount < 0], [INFLOW, OUTFLOW], NO_CHANGE).astype(np.int8),
+            "message": message,
+        }
+
+    def write(self, writer: CPFDataWriter = None, ledger: TransactionLedger = None):
+        """Write the cpf_data rows to a CPFDataWriter and the transactions to a ledger."""
+        if writer is not None:
+            for row in self.rows:
+                writer.add_row(*row)
+            writer.flush()
+        if ledger is not None:
+            if self.transactions is None:
+                raise ValueError("A jump-ahead run keeps no transaction log; run without jump_ahead to write one.")
+            ids = np.array([ledger.intern_message(m) for m in self.messages], dtype=np.int32)
+            columns = dict(self.transactions)
+            columns["message"] = ids[self.transactions["message"]] if len(ids) else columns["message"].astype(np.int32)
+            ledger.append_block(columns)
+
+
+def run_vectorized(config_loader: CPFConfig = None, database: str = DATABASE_NAME, log_file: str = LOG_FILE_PATH,
+                   run_id: str = None, batch_size: int = DEFAULT_BATCH_SIZE, log_format: str = 'csv',
+                   money: str = 'float') -> VectorizedSimulation:
+    """Vectorized counterpart of cpf_run_simulation_v9.main(): same config, same outputs."""
+    if config_loader is None:
+        config_loader = CPFConfig(CONFIG_FILENAME)
+    simulation = VectorizedSimulation(config_loader, money=money).run()
+    if database is not None:
+        with CPFDataWriter(database, run_id=run_id, batch_size=batch_size) as writer:
+            simulation.write(writer=writer)
+    if log_file is not None:
+        with TransactionLedger(log_sink(log_file, log_format)) as ledger:
+            simulation.write(ledger=ledger)
+    return simulation
+
+
+def check_parity(config_loader: CPFConfig = None, workdir: str = None, money: str = 'float') -> bool:
+    """
+    Run the scalar loop and the vectorized engine on the same config and money mode into a
+    scratch directory and compare the cpf_data rows and the transaction logs.
+    """
+    import contextlib
+    import io
+    import os
+    import sqlite3
+    import tempfile
+    import cpf_run_simulation_v9
+    from cpf_renderer_v1 import Renderer
+
+    if config_loader is None:
+        config_loader = CPFConfig(CONFIG_FILENAME)
+    workdir = workdir or tempfile.mkdtemp(prefix="cpf_parity_")
+    database = os.path.join(workdir, "parity.db")
+    scalar_log = os.path.join(workdir, "scalar_log.csv")
+    vector_log = os.path.join(workdir, "vector_log.csv")
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        cpf_run_simulation_v9.main(config_loader, database=database, log_file=scalar_log, run_id="scalar", renderer=Renderer(),
+                                   money=money)
+    run_vectorized(config_loader, database=database, log_file=vector_log, run_id="vector", money=money)
+
+    conn = sqlite3.connect(database)
+    columns = "date_key, dbreference, age, oa_balance, sa_balance, ma_balance, ra_balance, loan_balance, excess_balance, cpf_payout, message"
+    scalar_rows = conn.execute(f"SELECT {columns} FROM cpf_data WHERE run_id = 'scalar' ORDER BY date_key").fetchall()
+    vector_rows = conn.execute(f"SELECT {columns} FROM cpf_data WHERE run_id = 'vector' ORDER BY date_key").fetchall()
+    conn.close()
+    with open(scalar_log) as f1, open(vector_log) as f2:
+        logs_equal = f1.read() == f2.read()
+    rows_equal = scalar_rows == vector_rows
+    print(f"cpf_data rows: {len(scalar_rows)} scalar, {len(vector_rows)} vectorized, identical: {rows_equal}")
+    print(f"transaction log identical: {logs_equal}")
+    return rows_equal and logs_equal
+
+
+if __name__ == "__main__":
+    import time
+    config = CPFConfig(CONFIG_FILENAME)
+    start = time.perf_counter()
+    simulation = VectorizedSimulation(config).run()
+    elapsed = time.perf_counter() - start
+    print(f"Vectorized run: {len(simulation.rows)} months, {len(simulation.transactions['reference'])} transactions "
+          f"in {elapsed * 1000:.1f} ms")
+    start = time.perf_counter()
+    jumped = VectorizedSimulation(config, jump_ahead=True).run()
+    elapsed = time.perf_counter() - start
+    same = jumped.rows == simulation.rows and jumped.stop_age == simulation.stop_age
+    print(f"Jump-ahead run: {jumped.month_count} months in {elapsed * 1000:.1f} ms, rows {'OK' if same else 'MISMATCH'}")
+    print("Parity with the scalar loop:", "OK" if check_parity(config) else "MISMATCH")
+    print("Parity with the scalar loop in cents:", "OK" if check_parity(config, money='cents') else "MISMATCH")
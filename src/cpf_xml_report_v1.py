@@ -0,0 +1,126 @@
+# cpf_xml_report_v1.py
+from __init__ import SRC_DIR, CPF_REPORT_XML
+import csv
+import io
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Union
+from xml.etree.ElementTree import iterparse
+from xml.sax.saxutils import escape
+if TYPE_CHECKING:  # pandas is imported where a DataFrame is built, off the simulation's startup path
+    import pandas as pd
+
+# <?xml ...?><CPFReport><item><DATE_KEY>...</DATE_KEY>...</item>...</CPFReport>, on one line
+XML_DECLARATION = '<?xml version="1.0" encoding="UTF-8" ?>'
+XML_ROOT = "CPFReport"
+XML_ITEM = "item"
+
+
+class XMLReportWriter:
+    """
+    Streams rows as <item> elements of a cpf_report.xml document.
+    Every row is written as soon as it is given and no element tree is built, so memory does
+    not grow with the number of rows. Values are written as str() of the cell, the same text
+    as in cpf_report.csv; None is written as an empty element.
+    """
+    def __init__(self, output_file: str = CPF_REPORT_XML, root: str = XML_ROOT, item: str = XML_ITEM):
+        self.output_file = output_file
+        self.root = root
+        self.item = item
+        self.rows = 0
+        self._file = open(output_file, "w", encoding="utf-8")
+        self._file.write(f"{XML_DECLARATION}<{root}>")
+
+    def write_rows(self, columns: List[str], rows: Iterable[Iterable[Any]]) -> None:
+        """Write rows given as value sequences in `columns` order."""
+        template = "".join(f"<{column}>{{}}</{column}>" for column in columns)
+        template = f"<{self.item}>{template}</{self.item}>"
+        write = self._file.write
+        for row in rows:
+            write(template.format(*("" if value is None else escape(str(value)) for value in row)))
+            self.rows += 1
+
+    def write_item(self, item: Dict[str, Any]) -> None:
+        """Write one row given as a dict."""
+        self.write_rows(list(item), [list(item.values())])
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.write(f"</{self.root}>")
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+
+def iter_xml_report(filename: str = CPF_REPORT_XML, item: str = XML_ITEM) -> Iterator[Dict[str, str]]:
+    """
+    Yield the <item> elements of a report as {tag: text} dicts.
+    Parsed incrementally with iterparse; every finished item is dropped from the tree, so
+    memory stays constant however long the report is.
+    """
+    root = None
+    for event, element in iterparse(filename, events=("start", "end")):
+        if event == "start":
+            if root is None:
+                root = element
+            continue
+        if element.tag == item:
+            yield {child.tag: child.text or "" for child in element}
+            root.clear()
+
+
+def _typed_frame(rows: List[Dict[str, str]]) -> 'pd.DataFrame':
+    """
+    Rows of text as a DataFrame typed exactly as pd.read_csv types cpf_report.csv: the text
+    goes through read_csv's C parser, which is also faster than converting column by column.
+    """
+    import pandas as pd
+    if not rows:
+        return pd.DataFrame()
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(rows[0].keys())
+    writer.writerows(row.values() for row in rows)
+    buffer.seek(0)
+    return pd.read_csv(buffer)
+
+
+def read_xml_report(filename: str = CPF_REPORT_XML, chunksize: int = None) -> Union['pd.DataFrame', Iterator['pd.DataFrame']]:
+    """
+    Read a report written by XMLReportWriter into a DataFrame, or, with `chunksize`, into an
+    iterator of DataFrames of at most `chunksize` rows (like pd.read_csv).
+    """
+    if chunksize is None:
+        return _typed_frame(list(iter_xml_report(filename)))
+    if chunksize < 1:
+        raise ValueError(f"chunksize must be a positive integer, got {chunksize}")
+    return _read_xml_chunks(filename, chunksize)
+
+
+def _read_xml_chunks(filename: str, chunksize: int) -> Iterator['pd.DataFrame']:
+    rows = []
+    for row in iter_xml_report(filename):
+        rows.append(row)
+        if len(rows) == chunksize:
+            yield _typed_frame(rows)
+            rows = []
+    if rows:
+        yield _typed_frame(rows)
+
+
+if __name__ == "__main__":
+    # Example usage: write cpf_report.csv as XML and read it back
+    import os
+    import tempfile
+    import pandas as pd
+    from __init__ import CPF_REPORT
+    report = pd.read_csv(CPF_REPORT)
+    xml_file = os.path.join(tempfile.gettempdir(), "cpf_report.xml")
+    with XMLReportWriter(xml_file) as writer:
+        writer.write_rows(list(report.columns), report.itertuples(index=False))
+    print(f"{writer.rows} rows written to {xml_file} ({os.path.getsize(xml_file):,} bytes)")
+    print("read back identical:", read_xml_report(xml_file).equals(report))
@@ -0,0 +1,5 @@
+# the modules import each other (and __init__) as top-level modules, as when run from src
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,7 @@
+# test_cli.py
+from cpf_cli_v1 import check_imports
+
+
+def test_simulate_imports():
+    # no DEFERRED_MODULES module at startup, and the import within IMPORT_BUDGET_MS
+    assert check_imports('simulate') == []
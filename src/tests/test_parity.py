@@ -0,0 +1,63 @@
+# test_parity.py
+# The engines must give the same cpf_data rows and transaction log as the scalar loop of main()
+import contextlib
+import io
+import itertools
+import os
+import sqlite3
+import pytest
+from __init__ import CONFIG_FILENAME
+from cpf_config_loader_v11 import CPFConfig
+from cpf_money_v1 import MONEY_MODES
+from cpf_renderer_v1 import Renderer
+from cpf_run_simulation_v9 import main
+from cpf_sweep_v1 import apply_overrides
+from cpf_vector_engine_v1 import check_parity
+from cpf_batch_v1 import BatchSimulation, MemberDataWriter, synthetic_members
+
+BALANCE_COLUMNS = "date_key, age, oa_balance, sa_balance, ma_balance, ra_balance, loan_balance, excess_balance, cpf_payout"
+
+
+@pytest.fixture(scope="module")
+def base_config():
+    return CPFConfig(CONFIG_FILENAME)
+
+
+@pytest.mark.parametrize("money", MONEY_MODES)
+def test_vector_parity(base_config, tmp_path, money):
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert check_parity(base_config, workdir=str(tmp_path), money=money)
+
+
+@pytest.mark.parametrize("salary, payouttype, pledge", list(itertools.product(
+    [3000, 6800.55], ['brs', 'ers'], ['yes', 'no'])))
+def test_cents_parity(base_config, tmp_path, salary, payouttype, pledge):
+    config = apply_overrides(base_config, {'salary': salary, 'payouttype': payouttype, 'pledgeyourhdbat55': pledge})
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert check_parity(config, workdir=str(tmp_path), money='cents')
+
+
+@pytest.mark.parametrize("money", MONEY_MODES)
+def test_batch_parity(base_config, tmp_path, money):
+    members = [{'member_id': 'base'}] + synthetic_members(5, seed=3)
+    members[2]['payouttype'] = 'ers'
+    members[3]['cpfpayoutage'] = 65
+    members[4]['rabalance'] = 1000.5
+    database = str(tmp_path / "batch.db")
+    with MemberDataWriter(database, run_id='batch') as writer:
+        BatchSimulation(base_config, members, money=money).run(writer)
+    for member in members:
+        overrides = {key: value for key, value in member.items() if key != 'member_id'}
+        main(apply_overrides(base_config, overrides), database=database, log_file=str(tmp_path / "log.csv"),
+             run_id=member['member_id'], log_format='none', checkpoint_at=[], renderer=Renderer(),
+             date_list=str(tmp_path / "dates.csv"), money=money)
+    conn = sqlite3.connect(database)
+    try:
+        for member in members:
+            scalar = conn.execute(f"SELECT {BALANCE_COLUMNS} FROM cpf_data WHERE run_id = ? ORDER BY date_key",
+                                  (member['member_id'],)).fetchall()
+            batch = conn.execute(f"SELECT {BALANCE_COLUMNS} FROM cpf_member_data WHERE run_id = 'batch' AND member_id = ? "
+                                 "ORDER BY date_key", (member['member_id'],)).fetchall()
+            assert scalar and batch == scalar, member
+    finally:
+        conn.close()